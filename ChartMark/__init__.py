@@ -1,4 +1,13 @@
 # ChartMark/__init__.py
+from ChartMark.version import __version__
 from ChartMark.api.service import ChartMark
 
-__all__ = ['ChartMark']
\ No newline at end of file
+__all__ = ['ChartMark', 'AsyncChartMark', '__version__']
+
+
+def __getattr__(name):
+    # AsyncChartMark依赖asyncio和进程池，按需导入以缩短冷启动时间
+    if name == 'AsyncChartMark':
+        from ChartMark.api.async_service import AsyncChartMark
+        return AsyncChartMark
+    raise AttributeError(f"module 'ChartMark' has no attribute '{name}'")
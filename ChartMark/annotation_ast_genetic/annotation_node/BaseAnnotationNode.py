@@ -3,6 +3,9 @@ from typing import Dict, List, Optional, Any
 from ChartMark.annotation_ast_genetic.method_node.BaseMethodNode import BaseMethodNode
 from ChartMark.annotation_ast_genetic.data_node.BaseDataNode import BaseDataNode
 from ChartMark.annotation_ast_genetic.technique_node.BaseTechnique import BaseTechnique
+from ChartMark.annotation_ast_genetic.chart_node.BaseChartNode import ChartType
+from ChartMark.vegalite_ast.ChartNode import Chart
+from ChartMark import timing, diagnostics
 
 
 class BaseAnnotationNode(BaseNode):
@@ -134,3 +137,86 @@ class BaseAnnotationNode(BaseNode):
             
         self.id = id
         return True
+    
+    def _parse_technique_to_vegalite(self, technique: BaseTechnique, vegalite_node: Chart, chart_type: ChartType) -> Dict:
+        """
+        调用单个技术实例的parse_to_vegalite方法
+        需要额外参数（如subtype）的注释子类可以重写此方法
+        
+        参数:
+            technique: 技术实例
+            vegalite_node: 当前vegalite图表实例
+            chart_type: 图表类型
+            
+        返回:
+            技术处理后的vegalite字典
+        """
+        return technique.parse_to_vegalite(vegalite_node, chart_type)
+    
+    def _apply_technique(self, technique: BaseTechnique, vegalite_node: Chart, chart_type: ChartType) -> Dict:
+        """
+        应用单个技术并按technique阶段计时，计时的接收端见ChartMark.timing
+        
+        参数:
+            technique: 技术实例
+            vegalite_node: 当前vegalite图表实例
+            chart_type: 图表类型
+            
+        返回:
+            技术处理后的vegalite字典
+        """
+        with timing.stage(timing.STAGE_TECHNIQUE, annotation=self.method.type,
+                          technique=technique.name, chart_type=chart_type):
+            return self._parse_technique_to_vegalite(technique, vegalite_node, chart_type)
+    
+    def _report_technique_error(self, technique: BaseTechnique, error: Exception) -> None:
+        """
+        报告技术应用失败，诊断信息中包含注释id、注释类型和技术名称
+        
+        参数:
+            technique: 失败的技术实例
+            error: 技术抛出的异常
+        """
+        diagnostics.warning(
+            diagnostics.CODE_TECHNIQUE_FAILED,
+            f"应用技术 {technique.name} 时出错: {str(error)}",
+            annotation_id=self.id,
+            annotation_type=self.method.type,
+            technique=technique.name,
+            error=str(error)
+        )
+    
+    def _build_chart(self, vegalite_dict: Dict) -> Chart:
+        """
+        由技术处理后的vegalite字典重建Chart实例，并按chart_parse阶段计时
+        
+        参数:
+            vegalite_dict: vegalite规范字典
+            
+        返回:
+            新的Chart实例
+        """
+        with timing.stage(timing.STAGE_CHART_PARSE, annotation=self.method.type):
+            return Chart(vegalite_dict)
+    
+    def compose_techniques_in_place(self, vegalite_node: Chart, chart_type: ChartType) -> Chart:
+        """
+        将所有技术依次直接作用在同一个Chart实例上（合成模式）
+        与parse_techniques_to_vegalite不同，每个技术处理后不会再通过to_dict重建Chart实例，
+        技术本身就是原地修改图层和encoding，因此结果可以直接作为下一个技术的输入
+        
+        参数:
+            vegalite_node: 当前vegalite图表实例，会被原地修改
+            chart_type: 图表类型，如'bar', 'line', 'scatter', 'pie'等
+            
+        返回:
+            修改后的同一个Chart实例
+        """
+        for technique in self.techniques:
+            try:
+                self._apply_technique(technique, vegalite_node, chart_type)
+            except Exception as e:
+                # 记录错误但继续处理其他技术
+                self._report_technique_error(technique, e)
+        
+        return vegalite_node
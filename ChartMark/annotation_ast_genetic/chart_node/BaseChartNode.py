@@ -1,5 +1,5 @@
 from ChartMark.annotation_ast_genetic.ast_base import BaseNode
-from typing import Dict, List, Literal, Optional, Any, Union, TypeVar
+from typing import Dict, List, Literal, Optional, Any, Union, TypeVar, Iterator
 from dataclasses import dataclass, field
 from abc import ABC, abstractmethod
 
@@ -78,3 +78,27 @@ class BaseChartNode(BaseNode, ABC):
         将节点转换为VegaLite图表规范字符串
         """
         pass
+    
+    def to_vegalite_dict(self) -> Dict:
+        """
+        将节点转换为VegaLite图表规范字典
+        默认实现解析to_vegalite_chart的结果，子类可以重写以避免字符串往返
+        """
+        from ChartMark import json_backend
+        return json_backend.loads(self.to_vegalite_chart())
+    
+    def iter_metadata(self) -> Iterator[Dict[str, Any]]:
+        """
+        逐行生成data.values的元数据
+        默认实现遍历_parse_to_metadata的结果，子类可以重写以避免构建完整的行字典列表
+        """
+        return iter(self._parse_to_metadata())
+    
+    def to_vegalite_skeleton(self) -> Dict:
+        """
+        生成data.values为空数组的VegaLite图表规范字典
+        默认实现基于to_vegalite_dict，子类可以重写以避免生成元数据
+        """
+        chart_spec = self.to_vegalite_dict()
+        chart_spec["data"]["values"] = []
+        return chart_spec
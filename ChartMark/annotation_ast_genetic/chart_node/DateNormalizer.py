@@ -0,0 +1,208 @@
+import math
+import re
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+# 支持的日期格式: YYYY-MM-DD, YYYY/MM/DD（月、日可以是1位）
+_DATE_PATTERN = re.compile(r"([0-9]{4})([-/])([0-9]{1,2})\2([0-9]{1,2})")
+# ISO日期时间: YYYY-MM-DDTHH:MM[:SS[.ffffff]][Z|±HH:MM]，日期和时间之间也可以是空格
+_DATETIME_PATTERN = re.compile(
+    r"([0-9]{4})-([0-9]{2})-([0-9]{2})[T ]([0-9]{2}):([0-9]{2})(?::([0-9]{2})(\.[0-9]{1,6})?)?"
+    r"(Z|[+-][0-9]{2}:?[0-9]{2})?"
+)
+# 整列都是标准格式YYYY-MM-DD时，各元素以换行拼接后能被该模式一次完整匹配
+_CANONICAL_COLUMN_PATTERN = re.compile(r"(?:[0-9]{4}-[0-9]{2}-[0-9]{2}\n)*[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+_EPOCH = datetime(1970, 1, 1)
+# 数值列的绝对值都不小于该值时按Unix时间戳处理（秒级约为1973年3月以后），
+# 较小的数值（如年份2020）仍按原样转为字符串
+_EPOCH_MIN = 1e8
+# 绝对值达到该值时按毫秒时间戳处理（秒级对应公元5138年）
+_EPOCH_MILLIS_MIN = 1e11
+
+# VegaLite DateTime对象中的月份名称（不区分大小写，可以是前三个字母的缩写）
+_MONTH_NAMES = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+
+def is_date_format(value: Any) -> bool:
+    """
+    检查值是否为有效的日期格式字符串
+    支持的格式: YYYY-MM-DD, YYYY/MM/DD以及ISO日期时间
+    """
+    if not isinstance(value, str):
+        return False
+    return _DATE_PATTERN.fullmatch(value) is not None or _DATETIME_PATTERN.fullmatch(value) is not None
+
+
+@lru_cache(maxsize=65536)
+def normalize_date(date_str: str) -> str:
+    """
+    格式化日期字符串为标准格式
+    - YYYY-MM-DD和YYYY/MM/DD转换为补零的YYYY-MM-DD
+    - ISO日期时间转换为YYYY-MM-DDTHH:MM:SS[.ffffff]，保留时区后缀
+    无法解析为有效日期时返回原始字符串；结果按字符串缓存，重复出现的值只解析一次
+    """
+    match = _DATE_PATTERN.fullmatch(date_str)
+    if match:
+        year, _, month, day = match.groups()
+        try:
+            datetime(int(year), int(month), int(day))
+        except ValueError:
+            return date_str
+        return f"{year}-{int(month):02d}-{int(day):02d}"
+
+    match = _DATETIME_PATTERN.fullmatch(date_str)
+    if match:
+        year, month, day, hour, minute, second, fraction, zone = match.groups()
+        try:
+            datetime(int(year), int(month), int(day), int(hour), int(minute), int(second or 0))
+        except ValueError:
+            return date_str
+        if zone and zone != "Z" and ":" not in zone:
+            zone = f"{zone[:3]}:{zone[3:]}"
+        return f"{year}-{month}-{day}T{hour}:{minute}:{second or '00'}{fraction or ''}{zone or ''}"
+
+    return _split_date(date_str)
+
+
+def _split_date(date_str: str) -> str:
+    """按分隔符拆分解析不规则的日期字符串（如带空白或符号的年月日），失败时返回原始字符串"""
+    for separator in ("-", "/"):
+        if separator not in date_str:
+            continue
+        parts = date_str.split(separator)
+        if len(parts) != 3:
+            break
+        try:
+            year, month, day = parts
+            return datetime(int(year), int(month), int(day)).strftime('%Y-%m-%d')
+        except (ValueError, TypeError):
+            break
+    return date_str
+
+
+def normalize_dates(values: Sequence[Any]) -> List[str]:
+    """
+    批量把一列x值转换为日期字符串，列的格式只识别一次
+    - 整列已经是YYYY-MM-DD时，一次正则匹配后直接复制，不逐个解析
+    - 整列都是不小于1e8的数值时视为Unix时间戳（绝对值达到1e11时为毫秒），
+      转换为UTC的ISO日期时间YYYY-MM-DDTHH:MM:SS[.fff]Z
+    - 其余情况逐个转换为字符串后调用normalize_date，重复的值只解析一次
+
+    参数:
+        values: x值序列，元素可以是字符串、数值或其他JSON值
+
+    返回:
+        日期字符串列表，长度与values相同
+    """
+    if not values:
+        return []
+    try:
+        if _CANONICAL_COLUMN_PATTERN.fullmatch("\n".join(values)):
+            return list(values)
+    except TypeError:
+        # 列中有非字符串元素
+        pass
+
+    if _is_epoch_column(values):
+        return _format_epochs(values)
+
+    cache = {}
+    result = []
+    for value in values:
+        text = value if isinstance(value, str) else str(value)
+        formatted = cache.get(text)
+        if formatted is None:
+            formatted = cache[text] = normalize_date(text)
+        result.append(formatted)
+    return result
+
+
+def _is_epoch_column(values: Sequence[Any]) -> bool:
+    """整列是否为Unix时间戳：全部是有限的数值（不含布尔值）且绝对值都不小于_EPOCH_MIN"""
+    return all(
+        isinstance(value, (int, float)) and not isinstance(value, bool)
+        and math.isfinite(value) and abs(value) >= _EPOCH_MIN
+        for value in values
+    )
+
+
+def _format_epochs(values: Sequence[Any]) -> List[str]:
+    """把时间戳列转换为UTC的ISO日期时间字符串，秒级或毫秒级由整列的最大绝对值决定"""
+    scale = 1000.0 if max(abs(value) for value in values) >= _EPOCH_MILLIS_MIN else 1.0
+    seconds = [value / scale for value in values]
+    timespec = "seconds" if all(second == int(second) for second in seconds) else "milliseconds"
+    result = []
+    for value, second in zip(values, seconds):
+        try:
+            result.append((_EPOCH + timedelta(seconds=second)).isoformat(timespec=timespec) + "Z")
+        except OverflowError:
+            # 超出datetime范围的值按原样转为字符串
+            result.append(str(value))
+    return result
+
+
+def date_string_to_seconds(date_str: str) -> Optional[float]:
+    """
+    把normalize_date输出的日期或ISO日期时间字符串转换为Unix时间戳（秒）
+    没有时区后缀时按UTC处理，与浏览器解析YYYY-MM-DD的方式一致
+
+    返回:
+        时间戳，无法解析时返回None
+    """
+    if not isinstance(date_str, str):
+        return None
+    if date_str.endswith("Z"):
+        date_str = date_str[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(date_str)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def temporal_to_seconds(value: Any) -> Optional[float]:
+    """
+    把注释中的时间值转换为Unix时间戳（秒）
+    - VegaLite DateTime对象，如{"year": 2020, "month": "apr", "date": 1}，必须包含year，
+      含有day（星期）时无法确定具体日期
+    - 日期或ISO日期时间字符串
+    - 数值按VegaLite的约定视为毫秒时间戳
+
+    返回:
+        时间戳，无法确定时返回None
+    """
+    if isinstance(value, dict):
+        return _datetime_object_to_seconds(value)
+    if isinstance(value, str):
+        return date_string_to_seconds(normalize_date(value))
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return value / 1000.0
+    return None
+
+
+def _datetime_object_to_seconds(value: Dict[str, Any]) -> Optional[float]:
+    if not isinstance(value.get("year"), int) or "day" in value:
+        return None
+    month = value.get("month")
+    if month is None and isinstance(value.get("quarter"), int):
+        month = (value["quarter"] - 1) * 3 + 1
+    if isinstance(month, str):
+        name = month[:3].lower()
+        month = _MONTH_NAMES.index(name) + 1 if name in _MONTH_NAMES else None
+    elif month is None:
+        month = 1
+    if not isinstance(month, int):
+        return None
+    try:
+        dt = datetime(
+            value["year"], month, int(value.get("date", 1)),
+            int(value.get("hours", 0)), int(value.get("minutes", 0)), int(value.get("seconds", 0)),
+            int(value.get("milliseconds", 0)) * 1000, tzinfo=timezone.utc
+        )
+    except (TypeError, ValueError):
+        return None
+    return dt.timestamp()
@@ -0,0 +1,134 @@
+import math
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from .SummaryResolver import FullData, resolve_summaries
+
+# 密度图层中各字段的名称，与图表数据的字段名区分开
+DENSITY_X = "density_x"
+DENSITY_X2 = "density_x2"
+DENSITY_Y = "density_y"
+DENSITY_Y2 = "density_y2"
+DENSITY_COUNT = "density_count"
+
+@dataclass
+class DensityGrid:
+    """
+    散点图二维分箱的结果
+    - cells: 非空格子的行字典，包含格子的x、y范围和落在其中的点数
+    - full: 分箱前的完整数据，用于在服务端计算汇总注释
+    """
+    x_name: str
+    y_name: str
+    cells: List[Dict[str, float]] = field(default_factory=list)
+    point_count: int = 0
+    kept_count: int = 0
+    full: Optional[FullData] = None
+
+
+def grid_cells(xs: Sequence[float], ys: Sequence[float], bins: int) -> List[Dict[str, float]]:
+    """
+    把点划分到bins x bins的等宽网格中，统计每个格子的点数
+
+    参数:
+        xs: x坐标序列
+        ys: y坐标序列，长度与xs相同
+        bins: 每个轴上的格子数
+
+    返回:
+        非空格子的行字典列表，字段见DENSITY_X等常量；没有有限值的点时返回空列表
+    """
+    if not (all(map(math.isfinite, xs)) and all(map(math.isfinite, ys))):
+        finite = [(x, y) for x, y in zip(xs, ys) if math.isfinite(x) and math.isfinite(y)]
+        xs = [x for x, _ in finite]
+        ys = [y for _, y in finite]
+    if not xs:
+        return []
+    x_low, x_scale = _axis_bins(min(xs), max(xs), bins)
+    y_low, y_scale = _axis_bins(min(ys), max(ys), bins)
+
+    # 每个轴多留一个格子给等于最大值的点，统计后再并入最后一个格子，避免逐点截断下标
+    stride = bins + 1
+    counts = Counter(
+        int((x - x_low) * x_scale) * stride + int((y - y_low) * y_scale)
+        for x, y in zip(xs, ys)
+    )
+    merged = Counter()
+    for key, count in counts.items():
+        x_index, y_index = divmod(key, stride)
+        merged[min(x_index, bins - 1), min(y_index, bins - 1)] += count
+
+    cells = []
+    for x_index, y_index in sorted(merged):
+        cells.append({
+            DENSITY_X: x_low + x_index / x_scale,
+            DENSITY_X2: x_low + (x_index + 1) / x_scale,
+            DENSITY_Y: y_low + y_index / y_scale,
+            DENSITY_Y2: y_low + (y_index + 1) / y_scale,
+            DENSITY_COUNT: merged[x_index, y_index],
+        })
+    return cells
+
+
+def _axis_bins(low: float, high: float, bins: int):
+    """返回轴上第一个格子的起点和每单位长度对应的格子数，所有值相同时以该值为中心取宽度为1的范围"""
+    if high == low:
+        return low - 0.5, float(bins)
+    return low, bins / (high - low)
+
+
+def extreme_indices(xs: Sequence[float], ys: Sequence[float]) -> List[int]:
+    """返回x、y最小值和最大值所在的下标，使基于极值的汇总注释在分箱后仍然准确"""
+    if not xs:
+        return []
+    return [xs.index(min(xs)), xs.index(max(xs)), ys.index(min(ys)), ys.index(max(ys))]
+
+
+def density_layer(grid: DensityGrid) -> Dict[str, Any]:
+    """
+    生成显示格子点数的rect图层，图层使用自己的data.values，不影响其他图层继承的数据
+
+    参数:
+        grid: 分箱结果
+
+    返回:
+        VegaLite图层字典
+    """
+    return {
+        "data": {"values": grid.cells},
+        "mark": {"type": "rect"},
+        "encoding": {
+            "x": {"field": DENSITY_X, "type": "quantitative", "title": grid.x_name, "axis": {"grid": False}},
+            "x2": {"field": DENSITY_X2},
+            "y": {"field": DENSITY_Y, "type": "quantitative", "title": grid.y_name, "axis": {"grid": False}},
+            "y2": {"field": DENSITY_Y2},
+            "color": {
+                "field": DENSITY_COUNT,
+                "type": "quantitative",
+                "title": "Count",
+                "scale": {"scheme": "greys"}
+            }
+        }
+    }
+
+
+def apply_density_grid(spec: Dict[str, Any], grid: Optional[DensityGrid]) -> Dict[str, Any]:
+    """
+    把分箱结果加入规范：按完整数据计算汇总注释，见SummaryResolver.resolve_summaries，并在最底层插入密度图层
+    密度图层的颜色比例尺与其他图层（如分组颜色）相互独立
+
+    参数:
+        spec: 由分箱后的图表节点生成并应用了注释的VegaLite规范字典，原地修改
+        grid: 分箱结果，为None时不做处理
+
+    返回:
+        spec本身
+    """
+    if grid is None or not isinstance(spec.get("layer"), list):
+        return spec
+    if grid.full is not None:
+        resolve_summaries(spec, grid.full)
+    spec["layer"].insert(0, density_layer(grid))
+    spec.setdefault("resolve", {}).setdefault("scale", {})["color"] = "independent"
+    return spec
@@ -0,0 +1,204 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from .DateNormalizer import date_string_to_seconds
+
+# 支持的降采样算法
+# - lttb: Largest-Triangle-Three-Buckets，保留视觉形状，每个桶选出与相邻桶构成最大三角形的点
+# - minmax: 每个桶保留最小值和最大值所在的点，保证峰值和谷值不丢失
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+# 各图表类型在服务端行判定中提供的轴类型，与图表节点生成行字典时使用的键一致
+ROW_AXES = {
+    "line": frozenset({"temporal", "quantity"}),
+    "group_line": frozenset({"temporal", "quantity", "group"}),
+    "scatter": frozenset({"x_quantity", "y_quantity"}),
+    "group_scatter": frozenset({"x_quantity", "y_quantity", "group"}),
+}
+
+# 一行数据的判定函数，参数为轴类型到值的字典，见LogicalExpression.RowValues
+RowPredicate = Callable[[Dict[str, Any]], bool]
+
+
+def parse_time_axis(x_data: Sequence[str]) -> Optional[List[float]]:
+    """把日期字符串列转换为时间戳，有无法解析的日期时返回None"""
+    xs = [date_string_to_seconds(x) for x in x_data]
+    if any(x is None for x in xs):
+        return None
+    return xs
+
+
+def time_axis(x_data: Sequence[str], timestamps: Optional[List[float]] = None) -> List[float]:
+    """
+    降采样使用的x坐标：日期字符串列的时间戳，有无法解析的日期时退化为等间距的下标
+
+    参数:
+        x_data: 日期字符串列
+        timestamps: 已由parse_time_axis解析的时间戳，为None时重新解析
+    """
+    xs = timestamps if timestamps is not None else parse_time_axis(x_data)
+    if xs is None:
+        return [float(index) for index in range(len(x_data))]
+    return xs
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    用Largest-Triangle-Three-Buckets算法选出threshold个点的下标
+
+    参数:
+        xs: x坐标序列（升序），如时间戳
+        ys: y坐标序列，长度与xs相同
+        threshold: 目标点数，不小于3
+
+    返回:
+        升序的下标列表，包含首尾两点
+    """
+    length = len(ys)
+    if threshold >= length or threshold < 3:
+        return list(range(length))
+
+    selected = [0]
+    # 首尾两点单独保留，其余的点平均分到threshold - 2个桶中
+    bucket_size = (length - 2) / (threshold - 2)
+    previous = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        # 下一个桶的平均点作为三角形的第三个顶点
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, length)
+        if next_start >= next_end:
+            next_start, next_end = length - 1, length
+        count = next_end - next_start
+        average_x = sum(xs[next_start:next_end]) / count
+        average_y = sum(ys[next_start:next_end]) / count
+
+        previous_x = xs[previous]
+        previous_y = ys[previous]
+        best = start
+        best_area = -1.0
+        for index in range(start, end):
+            # 三角形面积的两倍，比较大小时不需要除以2
+            area = abs(
+                (previous_x - average_x) * (ys[index] - previous_y)
+                - (previous_x - xs[index]) * (average_y - previous_y)
+            )
+            if area > best_area:
+                best_area = area
+                best = index
+        selected.append(best)
+        previous = best
+    selected.append(length - 1)
+    return selected
+
+
+def minmax_indices(ys: Sequence[float], threshold: int) -> List[int]:
+    """
+    把序列分成threshold // 2个桶，每个桶保留最小值和最大值所在的点
+
+    参数:
+        ys: y坐标序列
+        threshold: 目标点数，不小于2
+
+    返回:
+        升序的下标列表，包含首尾两点，长度不超过threshold + 2
+    """
+    length = len(ys)
+    if threshold >= length or threshold < 2:
+        return list(range(length))
+
+    selected = {0, length - 1}
+    bucket_count = max(threshold // 2, 1)
+    bucket_size = length / bucket_count
+    for bucket in range(bucket_count):
+        start = int(bucket * bucket_size)
+        end = min(int((bucket + 1) * bucket_size), length)
+        if start >= end:
+            continue
+        window = ys[start:end]
+        selected.add(start + min(range(len(window)), key=window.__getitem__))
+        selected.add(start + max(range(len(window)), key=window.__getitem__))
+    return sorted(selected)
+
+
+def select_indices(xs: Sequence[float], ys: Sequence[float], threshold: int, method: str = "lttb") -> List[int]:
+    """
+    按指定算法选出要保留的点，全局最小值和最大值所在的点总会保留，
+    使基于极值的注释（如最大值标记）在降采样后仍然准确
+
+    参数:
+        xs: x坐标序列（升序）
+        ys: y坐标序列，长度与xs相同
+        threshold: 目标点数
+        method: 降采样算法，见DOWNSAMPLE_METHODS
+
+    返回:
+        升序且不重复的下标列表
+
+    异常:
+        ValueError: threshold不是正数或method不受支持
+    """
+    if threshold <= 0:
+        raise ValueError("降采样的目标点数必须是正数")
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"不支持的降采样算法: {method}，可选值为{', '.join(DOWNSAMPLE_METHODS)}")
+
+    length = len(ys)
+    if length <= threshold:
+        return list(range(length))
+
+    if method == "lttb":
+        selected = set(lttb_indices(xs, ys, threshold))
+    else:
+        selected = set(minmax_indices(ys, threshold))
+    selected.add(min(range(length), key=ys.__getitem__))
+    selected.add(max(range(length), key=ys.__getitem__))
+    return sorted(selected)
+
+
+def annotation_row_filter(annotations: Optional[List[Dict]], chart_type: str) -> Optional[RowPredicate]:
+    """
+    根据注释中的data_items和coordinate目标生成行判定函数，判定为True的行在降采样时必须保留
+
+    被过滤条件选中或落在坐标范围内的行都会保留，无法确定是否选中的行（如时间值处于容差内）也会保留；
+    没有过滤条件的data_items目标表示整体数据，不要求保留具体的行；无法解析的目标和引用了图表中
+    不存在的轴类型的过滤条件被忽略，这些目标在注释渲染时同样无法生成，由注释渲染报告错误
+
+    参数:
+        annotations: ChartMark规范中的annotations列表
+        chart_type: 图表类型
+
+    返回:
+        行判定函数，没有需要保留的行时返回None
+    """
+    from ChartMark.annotation_ast_genetic.target_node.DataItemTargetNode import DataItemsTargetNode
+    from ChartMark.annotation_ast_genetic.target_node.CoordinateTargetNode import CoordinateTargetNode
+    from ChartMark.annotation_ast_genetic.target_node.filter_node.LogicalExpression import compile_any
+
+    target_classes = {
+        DataItemsTargetNode.TARGET_TYPE: DataItemsTargetNode,
+        CoordinateTargetNode.TARGET_TYPE: CoordinateTargetNode,
+    }
+    targets = []
+    for annotation in annotations or []:
+        if not isinstance(annotation, dict):
+            continue
+        for technique in annotation.get("techniques") or []:
+            target = technique.get("target") if isinstance(technique, dict) else None
+            if not isinstance(target, dict) or target.get("type") not in target_classes:
+                continue
+            if target["type"] == DataItemsTargetNode.TARGET_TYPE and not target.get("filter"):
+                continue
+            try:
+                target_node = target_classes[target["type"]](target, chart_type)
+            except (ValueError, TypeError, KeyError):
+                continue
+            filter_node = getattr(target_node, "filter_node", None)
+            if filter_node and not filter_node.axis_types() <= ROW_AXES.get(chart_type, frozenset()):
+                continue
+            targets.append(target_node)
+
+    if not targets:
+        return None
+    evaluate = compile_any([target.row_evaluator() for target in targets])
+    return lambda row: evaluate(row) is not False
@@ -0,0 +1,63 @@
+from array import array
+from typing import Any, List, Sequence
+
+# 图表节点中数值列的存储类型：连续的C double数组（array('d')），每个值占8字节且不产生float对象。
+# 支持len、下标、切片、迭代和extend，需要NumPy时可以用numpy.frombuffer(column)零拷贝得到ndarray
+FloatColumn = array
+
+
+def to_float_column(values: Sequence[Any], strict: bool = False) -> FloatColumn:
+    """
+    将数值序列批量转换为array('d')
+    全部元素都是数值时由array在C层一次完成转换，否则退回逐元素转换
+
+    参数:
+        values: 数值序列（列表或array）
+        strict: 为False时非数值元素（字符串、None、嵌套列表等）转换为0.0；
+            为True时对每个元素调用float，无法转换时抛出异常
+
+    返回:
+        新的array('d')
+
+    异常:
+        ValueError/TypeError: strict为True且存在无法转换为浮点数的元素
+    """
+    try:
+        return array('d', values)
+    except TypeError:
+        pass
+    if strict:
+        return array('d', [float(value) for value in values])
+    return array('d', [float(value) if isinstance(value, (int, float)) else 0.0 for value in values])
+
+
+def zeros(length: int) -> FloatColumn:
+    """长度为length、全部为0.0的array('d')"""
+    return array('d', bytes(8 * max(length, 0)))
+
+
+def pad_column(column: FloatColumn, length: int) -> FloatColumn:
+    """
+    用0.0把数值列原地补足到length，已经足够长时不变
+
+    返回:
+        补足后的同一个数值列
+    """
+    if len(column) < length:
+        column.extend(zeros(length - len(column)))
+    return column
+
+
+def is_float_column(values: Any) -> bool:
+    """是否为array('d')数值列"""
+    return isinstance(values, array) and values.typecode == 'd'
+
+
+def is_numeric_sequence(values: Sequence[Any]) -> bool:
+    """序列的元素是否全部为数值，array('d')直接返回True"""
+    return is_float_column(values) or all(isinstance(value, (int, float)) for value in values)
+
+
+def column_to_list(values: Sequence[Any]) -> List[Any]:
+    """把array数值列转换为Python列表（由C层批量转换），列表原样返回"""
+    return values.tolist() if isinstance(values, array) else values
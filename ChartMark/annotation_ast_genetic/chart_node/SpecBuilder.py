@@ -0,0 +1,122 @@
+import json
+import keyword
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+# 编译模板时占位符替换成的标记，标记只包含JSON字符串中无需转义的字符
+_MARKER_PATTERN = re.compile(r"@@chartmark:(\w+)@@")
+# 模板中未转义的占位符，如{title}
+_FIELD_PATTERN = re.compile(r"(?<!\{)\{(\w+)\}(?!\})")
+
+# 含标记的字符串编译后的片段：偶数下标为字面文本，奇数下标为占位符名称
+TextParts = List[str]
+
+
+def _marker(name: str) -> str:
+    return f"@@chartmark:{name}@@"
+
+
+class SpecBuilder:
+    """
+    由ORIGINAL_CHART_TEMPLATE编译得到的图表规范构建器
+
+    模板只在编译时用标记字符串填充并解析一次，并预先记录规范骨架中每个容器的位置和每个占位符所在的槽位；
+    build时浅拷贝所有容器，按记录的位置重新连接，再把字段值作为Python对象填入槽位，数据列表按引用挂载到data.values上，
+    因此既不需要拼接字符串也不需要再次解析JSON，标题和字段名中的引号、花括号也不会破坏规范
+    """
+    def __init__(self, template: str, value_fields: Iterable[str] = ("metadata_list",)):
+        """
+        参数:
+            template: str.format风格的规范模板，花括号按format规则转义
+            value_fields: 在模板中作为完整JSON值（不在引号内）出现的占位符，如"values": {metadata_list}
+        
+        异常:
+            ValueError: 占位符名称不是合法的标识符、占位符出现在键中，或模板填充标记后不是合法的JSON对象
+        """
+        value_fields = set(value_fields)
+        field_names = set(_FIELD_PATTERN.findall(template))
+        invalid = [name for name in field_names if not name.isidentifier() or keyword.iskeyword(name)]
+        if invalid:
+            raise ValueError(f"无法编译图表模板: 占位符名称无效 {', '.join(sorted(invalid))}")
+        markers = {
+            name: json.dumps(_marker(name)) if name in value_fields else _marker(name)
+            for name in field_names
+        }
+        try:
+            self.skeleton = json.loads(template.format(**markers))
+        except (KeyError, ValueError) as e:
+            raise ValueError(f"无法编译图表模板: {str(e)}")
+        if not isinstance(self.skeleton, dict):
+            raise ValueError("无法编译图表模板: 模板必须是JSON对象")
+        self.fields = frozenset(field_names)
+        self.value_fields = frozenset(value_fields & field_names)
+        # 骨架中的所有字典和列表（先序，第0个为根），以及(父容器下标, 键或下标, 子容器下标)的连接关系
+        self._containers: List[Any] = []
+        self._links: List[Tuple[int, Any, int]] = []
+        # (容器下标, 键或下标, 占位符名称)：value_fields中的占位符，直接放入原对象
+        self._value_slots: List[Tuple[int, Any, str]] = []
+        # (容器下标, 键或下标, 占位符名称)：整个字符串就是一个其他占位符，与str.format一样转换为字符串
+        self._string_slots: List[Tuple[int, Any, str]] = []
+        # (容器下标, 键或下标, 片段)：占位符嵌在其他文本中，转换为字符串后拼接
+        self._text_slots: List[Tuple[int, Any, TextParts]] = []
+        self._collect_slots(self.skeleton)
+
+    def build(self, **values: Any) -> Dict[str, Any]:
+        """
+        生成一份新的规范字典
+
+        参数:
+            **values: 各占位符的值，value_fields中的占位符直接使用原对象（如数据列表），
+                其他占位符与str.format一样转换为字符串
+
+        返回:
+            VegaLite规范字典，除字段值外不与其他调用共享任何可变对象
+
+        异常:
+            ValueError: 缺少或多出模板中的占位符
+        """
+        if values.keys() != self.fields:
+            raise ValueError(f"模板字段不匹配: 需要{', '.join(sorted(self.fields))}")
+        copies = [container.copy() for container in self._containers]
+        for parent, slot, child in self._links:
+            copies[parent][slot] = copies[child]
+        for parent, slot, name in self._value_slots:
+            copies[parent][slot] = values[name]
+        for parent, slot, name in self._string_slots:
+            copies[parent][slot] = str(values[name])
+        for parent, slot, parts in self._text_slots:
+            copies[parent][slot] = "".join(
+                str(values[part]) if index % 2 else part for index, part in enumerate(parts)
+            )
+        return copies[0]
+
+    def _collect_slots(self, node: Any) -> int:
+        """
+        先序记录容器节点及其中的连接和占位符槽位
+        覆盖浅拷贝中已有的键不会改变字典的键顺序，因此输出的键顺序与模板一致
+
+        返回:
+            node在容器列表中的下标
+        """
+        index = len(self._containers)
+        self._containers.append(node)
+        if isinstance(node, dict):
+            marker_keys = [_MARKER_PATTERN.sub(r"{\1}", key) for key in node if _MARKER_PATTERN.search(key)]
+            if marker_keys:
+                raise ValueError(f"无法编译图表模板: 占位符不能出现在键中 {', '.join(marker_keys)}")
+            entries = node.items()
+        else:
+            entries = enumerate(node)
+        for slot, value in entries:
+            if isinstance(value, (dict, list)):
+                self._links.append((index, slot, self._collect_slots(value)))
+            elif isinstance(value, str) and _MARKER_PATTERN.search(value):
+                whole = _MARKER_PATTERN.fullmatch(value)
+                if whole and whole.group(1) in self.value_fields:
+                    self._value_slots.append((index, slot, whole.group(1)))
+                elif whole:
+                    self._string_slots.append((index, slot, whole.group(1)))
+                else:
+                    self._text_slots.append((index, slot, _MARKER_PATTERN.split(value)))
+        return index
+
@@ -0,0 +1,357 @@
+import functools
+import json
+import math
+import operator
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Set, Tuple
+
+from ChartMark import diagnostics
+
+# 依赖整列数据的VegaLite转换，降采样或分箱后在data.values上计算会得到错误的结果
+SUMMARY_TRANSFORMS = frozenset({
+    "aggregate", "joinaggregate", "regression", "loess", "window",
+    "quantile", "density", "pivot", "impute",
+})
+
+
+def _mean(values: Sequence[float]) -> Optional[float]:
+    """与Vega相同的逐项更新均值"""
+    mean = 0.0
+    for count, value in enumerate(values, 1):
+        mean += (value - mean) / count
+    return mean if values else None
+
+
+def _deviation(values: Sequence[float]) -> float:
+    """与Vega相同的逐项更新离差平方和"""
+    mean = deviation = 0.0
+    for count, value in enumerate(values, 1):
+        delta = value - mean
+        mean += delta / count
+        deviation += delta * (value - mean)
+    return deviation
+
+
+def _quantile(values: Sequence[float], p: float) -> Optional[float]:
+    """与d3.quantileSorted相同的线性插值分位数"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    if len(ordered) < 2:
+        return ordered[0]
+    position = (len(ordered) - 1) * p
+    low = int(position)
+    if low + 1 >= len(ordered):
+        return ordered[-1]
+    return ordered[low] + (ordered[low + 1] - ordered[low]) * (position - low)
+
+
+def _variance(values: Sequence[float], population: bool) -> Optional[float]:
+    if len(values) < 2:
+        return None
+    return _deviation(values) / (len(values) if population else len(values) - 1)
+
+
+def _sqrt(value: Optional[float]) -> Optional[float]:
+    return None if value is None else math.sqrt(value)
+
+
+# 可以在服务端对完整数据计算的VegaLite聚合操作，参数为有效值（不含NaN），结果与Vega的计算方式一致；
+# count统计所有行，单独处理
+AGGREGATE_OPS: Dict[str, Callable[[Sequence[float]], Optional[float]]] = {
+    "valid": len,
+    "distinct": lambda values: len(set(values)),
+    "sum": lambda values: functools.reduce(operator.add, values, 0.0),
+    "mean": _mean,
+    "average": _mean,
+    "median": lambda values: _quantile(values, 0.5),
+    "q1": lambda values: _quantile(values, 0.25),
+    "q3": lambda values: _quantile(values, 0.75),
+    "min": lambda values: min(values) if values else None,
+    "max": lambda values: max(values) if values else None,
+    "variance": lambda values: _variance(values, population=False),
+    "variancep": lambda values: _variance(values, population=True),
+    "stdev": lambda values: _sqrt(_variance(values, population=False)),
+    "stdevp": lambda values: _sqrt(_variance(values, population=True)),
+}
+
+
+@dataclass
+class FullData:
+    """
+    降采样或分箱前的完整数据，用于在服务端计算汇总注释
+    - columns: 字段名到完整列的映射，键和值与data.values中的行字典一致，分组图表包括分组字段
+    - numeric: 可以参与计算的数值列，时间字段的值为时间戳
+    - temporal: numeric中值为时间戳的字段，只用于回归的自变量
+    - kept: 已经输出到data.values中的行在完整列中的下标
+    """
+    columns: Dict[str, Sequence[Any]]
+    numeric: Dict[str, Sequence[float]]
+    kept: Set[int] = field(default_factory=set)
+    temporal: FrozenSet[str] = frozenset()
+
+    @property
+    def row_count(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """完整数据中第index行的行字典"""
+        return {name: column[index] for name, column in self.columns.items()}
+
+
+def _group_rows(full: FullData, groupby: Any) -> Optional[Dict[Tuple[Any, ...], Optional[List[int]]]]:
+    """按groupby字段把行下标分组，分组按首次出现的顺序排列；不分组时下标为None，表示所有行"""
+    if not groupby:
+        return {(): None}
+    if not isinstance(groupby, list):
+        return None
+    columns = [full.columns.get(name) for name in groupby]
+    if any(column is None for column in columns):
+        return None
+    groups: Dict[Tuple[Any, ...], Optional[List[int]]] = {}
+    for index, key in enumerate(zip(*columns)):
+        groups.setdefault(key, []).append(index)
+    return groups
+
+
+def _aggregate(full: FullData, operation: Dict[str, Any], indices: Optional[List[int]]) -> Optional[float]:
+    """对一组行计算一个聚合操作，无法在服务端计算时返回None"""
+    op = operation.get("op")
+    if op == "count":
+        return full.row_count if indices is None else len(indices)
+    function = AGGREGATE_OPS.get(op)
+    name = operation.get("field")
+    column = full.numeric.get(name)
+    if function is None or column is None or name in full.temporal:
+        return None
+    values = column if indices is None else [column[index] for index in indices]
+    if any(map(math.isnan, values)):
+        values = [value for value in values if not math.isnan(value)]
+    value = function(values)
+    if value is None or not math.isfinite(value):
+        return None
+    return value
+
+
+def _aggregate_groups(
+    full: FullData, transform: Dict[str, Any], key: str
+) -> Optional[List[Tuple[Tuple[Any, ...], Optional[List[int]], Dict[str, float]]]]:
+    """计算aggregate或joinaggregate转换每个分组的结果，返回(分组键, 行下标, 别名到结果)的列表"""
+    operations = transform.get(key)
+    groups = _group_rows(full, transform.get("groupby"))
+    if not isinstance(operations, list) or not operations or groups is None:
+        return None
+    results = []
+    for group_key, indices in groups.items():
+        values = {}
+        for operation in operations:
+            if not isinstance(operation, dict) or not operation.get("as"):
+                return None
+            value = _aggregate(full, operation, indices)
+            if value is None:
+                return None
+            values[operation["as"]] = value
+        results.append((group_key, indices, values))
+    return results
+
+
+def _resolve_aggregate(layer: Dict[str, Any], full: FullData) -> bool:
+    """aggregate的结果作为图层的data.values，每个分组一行"""
+    transforms = layer["transform"]
+    groupby = transforms[0].get("groupby") or []
+    results = _aggregate_groups(full, transforms[0], "aggregate")
+    if results is None:
+        return False
+    layer["data"] = {"values": [dict(zip(groupby, group_key), **values) for group_key, _, values in results]}
+    _drop_first_transform(layer)
+    return True
+
+
+def _resolve_joinaggregate(spec: Dict[str, Any], layer: Dict[str, Any], full: FullData) -> bool:
+    """
+    joinaggregate替换为把完整数据的结果写成常量的calculate，带groupby时按分组取值；
+    完整数据中值等于结果的行（如中位数所在的点）补充到data.values中，使随后的比较标记出与完整数据相同的点
+    """
+    transforms = layer["transform"]
+    groupby = transforms[0].get("groupby") or []
+    values = (spec.get("data") or {}).get("values")
+    results = _aggregate_groups(full, transforms[0], "joinaggregate")
+    if results is None or not isinstance(values, list):
+        return False
+
+    calculates = []
+    for operation in transforms[0]["joinaggregate"]:
+        alias = operation["as"]
+        expression = "null"
+        for group_key, _, group_values in reversed(results):
+            constant = json.dumps(group_values[alias])
+            if not groupby:
+                expression = constant
+                break
+            test = " && ".join(
+                f"datum[{json.dumps(name)}] === {json.dumps(key)}" for name, key in zip(groupby, group_key)
+            )
+            expression = f"({test}) ? {constant} : {expression}"
+        calculates.append({"calculate": expression, "as": alias})
+
+    missing = set()
+    for group_key, indices, group_values in results:
+        for operation in transforms[0]["joinaggregate"]:
+            column = full.numeric.get(operation.get("field"))
+            if column is None or operation.get("field") in full.temporal:
+                continue
+            value = group_values[operation["as"]]
+            candidates = range(full.row_count) if indices is None else indices
+            missing.update(index for index in candidates if column[index] == value and index not in full.kept)
+    for index in sorted(missing):
+        values.append(full.row(index))
+    full.kept.update(missing)
+
+    layer["transform"] = calculates + transforms[1:]
+    return True
+
+
+def _resolve_regression(layer: Dict[str, Any], full: FullData) -> bool:
+    """
+    在服务端用最小二乘拟合线性回归，与Vega相同，每个分组输出自变量范围两端的两行，作为图层的data.values
+    """
+    transform = layer["transform"][0]
+    if transform.get("method", "linear") != "linear" or transform.get("extent") or transform.get("params"):
+        return False
+    y_name = transform.get("regression")
+    x_name = transform.get("on")
+    xs = full.numeric.get(x_name)
+    ys = full.numeric.get(y_name)
+    groupby = transform.get("groupby") or []
+    groups = _group_rows(full, groupby)
+    if xs is None or ys is None or y_name in full.temporal or groups is None:
+        return False
+    x_alias, y_alias = transform.get("as") or (x_name, y_name)
+    x_values = full.columns.get(x_name, xs)
+
+    rows = []
+    for group_key, indices in groups.items():
+        points = range(full.row_count) if indices is None else indices
+        group_x = [xs[index] for index in points]
+        group_y = [ys[index] for index in points]
+        if not (all(map(math.isfinite, group_x)) and all(map(math.isfinite, group_y))):
+            points = [index for index, x, y in zip(points, group_x, group_y) if math.isfinite(x) and math.isfinite(y)]
+            group_x = [xs[index] for index in points]
+            group_y = [ys[index] for index in points]
+        if not points:
+            return False
+        mean_x = math.fsum(group_x) / len(points)
+        mean_y = math.fsum(group_y) / len(points)
+        sxx = math.fsum([(x - mean_x) * (x - mean_x) for x in group_x])
+        sxy = math.fsum([(x - mean_x) * (y - mean_y) for x, y in zip(group_x, group_y)])
+        slope = sxy / sxx if sxx else 0.0
+        for position in (group_x.index(min(group_x)), group_x.index(max(group_x))):
+            row = dict(zip(groupby, group_key))
+            row[x_alias] = x_values[points[position]]
+            row[y_alias] = mean_y + slope * (group_x[position] - mean_x)
+            rows.append(row)
+
+    layer["data"] = {"values": rows}
+    _drop_first_transform(layer)
+    return True
+
+
+def _drop_first_transform(layer: Dict[str, Any]) -> None:
+    if len(layer["transform"]) > 1:
+        layer["transform"] = layer["transform"][1:]
+    else:
+        del layer["transform"]
+
+
+def _summary_kind(transform: Any) -> Optional[str]:
+    """转换属于SUMMARY_TRANSFORMS时返回其类型"""
+    if isinstance(transform, dict):
+        for key in transform:
+            if key in SUMMARY_TRANSFORMS:
+                return key
+    return None
+
+
+def _anchors_row(layer: Dict[str, Any], transform: Dict[str, Any]) -> bool:
+    """
+    不排序、不分组的row_number窗口只用于选出一行作为标记的锚点（如注释框），
+    图层编码不引用字段时，选出哪一行不影响结果
+    """
+    operations = transform.get("window")
+    if any(key in transform for key in ("sort", "groupby", "frame")) or not isinstance(operations, list):
+        return False
+    if not all(isinstance(operation, dict) and operation.get("op") == "row_number" for operation in operations):
+        return False
+    encoding = layer.get("encoding") or {}
+    return not any(isinstance(channel, dict) and ("field" in channel or "condition" in channel)
+                   for channel in encoding.values())
+
+
+def _resolve_layer(spec: Dict[str, Any], layer: Dict[str, Any], full: FullData) -> Optional[str]:
+    """
+    处理一个图层，返回无法处理的汇总类型；图层不需要处理或处理成功时返回None
+
+    带过滤条件的汇总只涉及被注释选中的行，这些行在降采样和分箱后仍然完整保留，无需处理
+    """
+    transforms = layer.get("transform") or []
+    for position, transform in enumerate(transforms):
+        kind = _summary_kind(transform)
+        if kind is None or (kind == "window" and _anchors_row(layer, transform)):
+            continue
+        if any(isinstance(previous, dict) and "filter" in previous for previous in transforms[:position]):
+            return None
+        if position == 0:
+            if kind == "aggregate" and _resolve_aggregate(layer, full):
+                return None
+            if kind == "joinaggregate" and _resolve_joinaggregate(spec, layer, full):
+                return None
+            if kind == "regression" and _resolve_regression(layer, full):
+                return None
+        return kind
+
+    encoding = layer.get("encoding")
+    if isinstance(encoding, dict) and not transforms:
+        for channel in encoding.values():
+            if isinstance(channel, dict) and channel.get("aggregate"):
+                return "aggregate"
+    return None
+
+
+def resolve_summaries(spec: Dict[str, Any], full: FullData) -> int:
+    """
+    在服务端对完整数据计算图层中的汇总，使汇总注释不受降采样或分箱后data.values只包含部分行的影响
+    - 第一个转换是aggregate（可带groupby）：结果作为图层的data.values
+    - 第一个转换是joinaggregate（可带groupby）：替换为常量的calculate，值等于结果的行补充到data.values中
+    - 第一个转换是线性regression（可带groupby）：拟合结果的两个端点作为图层的data.values
+    其他汇总（非线性回归、loess、window等转换，AGGREGATE_OPS以外的操作，时间字段上的聚合，
+    编码中的aggregate）无法处理，保留在客户端按data.values计算，并报告CODE_SUMMARY_UNRESOLVED诊断
+
+    参数:
+        spec: 应用了注释的VegaLite规范字典，原地修改
+        full: 降采样或分箱前的完整数据
+
+    返回:
+        处理的图层数
+    """
+    resolved = 0
+    unresolved = []
+    top_kind = next(filter(None, map(_summary_kind, spec.get("transform") or [])), None)
+    if top_kind:
+        unresolved.append(("顶层", top_kind))
+    for index, layer in enumerate(spec.get("layer") or []):
+        if not isinstance(layer, dict) or "data" in layer:
+            continue
+        transforms = layer.get("transform")
+        kind = _resolve_layer(spec, layer, full)
+        if kind is not None:
+            unresolved.append((f"第{index}个图层", kind))
+        elif transforms is not layer.get("transform"):
+            resolved += 1
+
+    for where, kind in unresolved:
+        diagnostics.warning(
+            diagnostics.CODE_SUMMARY_UNRESOLVED,
+            f"警告：{where}的{kind}汇总无法在服务端按完整数据计算，结果只基于data.values中保留的"
+            f"{len(full.kept)}/{full.row_count}行"
+        )
+    return resolved
@@ -1,16 +1,19 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Iterator, Callable
 from abc import ABC, abstractmethod
 from ..BaseChartNode import BaseChartNode
+from ..FloatColumn import FloatColumn, column_to_list
+from ..SpecBuilder import SpecBuilder
 
 class BaseGroupNode(BaseChartNode, ABC):
     """
     分组图表节点基类，除了基本属性外，还包含分类相关属性
+    每个分组的数值数据以array('d')数值列（见FloatColumn）保存，to_dict返回嵌套列表
     """
     def __init__(self, chart_obj: Dict = None):
         super().__init__(chart_obj)        
         
         self.x_data: List[str] = []  # 一维字符串数组
-        self.y_data: List[List[float]] = []  # 二维数值数组
+        self.y_data: List[FloatColumn] = []  # 每个分组一个数值列
         self.classify: List[str]= []
         
         self.classify_name = chart_obj.get("classify_name", "") if chart_obj is not None else ""        
@@ -24,8 +27,8 @@ class BaseGroupNode(BaseChartNode, ABC):
             "type": self.type,
             "x_name": self.x_name,
             "y_name": self.y_name,
-            "x_data": self.x_data,
-            "y_data": self.y_data,
+            "x_data": _nested_to_list(self.x_data),
+            "y_data": _nested_to_list(self.y_data),
             "classify": self.classify,
             "classify_name": self.classify_name
         }
@@ -41,6 +44,75 @@ class BaseGroupNode(BaseChartNode, ABC):
         返回:
             包含x_name、y_name和classify_name作为键的字典列表
         """
+        is_x_data_2d = self._check_metadata_source()
+        
+        # 生成元数据列表，数值列先批量转换为列表，避免逐个下标访问时装箱
+        metadata_list = []
+        x_name = self.x_name
+        y_name = self.y_name
+        classify_name = self.classify_name
+        
+        # 处理x_data为一维数组的情况
+        if not is_x_data_2d:
+            x_values = column_to_list(self.x_data)
+            for group_index in range(len(self.classify)):
+                group_name = self.classify[group_index]
+                
+                # 生成该分组的元数据
+                metadata_list.extend(
+                    {x_name: x, y_name: y, classify_name: group_name}
+                    for x, y in zip(x_values, column_to_list(self.y_data[group_index]))
+                )
+        
+        # 处理x_data为二维数组的情况
+        else:
+            for group_index in range(len(self.classify)):
+                group_name = self.classify[group_index]
+                group_x_data = column_to_list(self.x_data[group_index])
+                group_y_data = column_to_list(self.y_data[group_index])
+                
+                # 生成该分组的元数据
+                metadata_list.extend(
+                    {x_name: x, y_name: y, classify_name: group_name}
+                    for x, y in zip(group_x_data, group_y_data)
+                )
+        
+        return metadata_list
+    
+    def iter_metadata(self) -> Iterator[Dict[str, Any]]:
+        """
+        逐行生成与_parse_to_metadata相同的元数据，不构建完整的行字典列表，
+        用于流式写出大规模图表的data.values
+        
+        返回:
+            元数据行的迭代器，数据校验在调用时立即完成
+            
+        异常:
+            ValueError: 数据不完整或长度不一致
+        """
+        is_x_data_2d = self._check_metadata_source()
+        return self._generate_metadata(is_x_data_2d)
+    
+    def _generate_metadata(self, is_x_data_2d: bool) -> Iterator[Dict[str, Any]]:
+        """按分组顺序逐行生成元数据，数值列逐个元素读取"""
+        x_name = self.x_name
+        y_name = self.y_name
+        classify_name = self.classify_name
+        for group_index, group_name in enumerate(self.classify):
+            group_x_data = self.x_data[group_index] if is_x_data_2d else self.x_data
+            for x, y in zip(group_x_data, self.y_data[group_index]):
+                yield {x_name: x, y_name: y, classify_name: group_name}
+    
+    def _check_metadata_source(self) -> bool:
+        """
+        检查生成元数据所需的属性和数据
+        
+        返回:
+            x_data是否为二维数组
+            
+        异常:
+            ValueError: 数据不完整或长度不一致
+        """
         # 确保必要的属性存在
         if not self.x_name or not self.y_name or not self.classify_name:
             raise ValueError("生成元数据需要x_name、y_name和classify_name")
@@ -54,7 +126,7 @@ class BaseGroupNode(BaseChartNode, ABC):
             
         # 判断x_data是一维还是二维数组
         is_x_data_2d = False
-        if isinstance(self.x_data, list) and len(self.x_data) > 0 and isinstance(self.x_data[0], list):
+        if isinstance(self.x_data, list) and len(self.x_data) > 0 and isinstance(self.x_data[0], (list, FloatColumn)):
             is_x_data_2d = True
             # 验证二维x_data的有效性
             if len(self.x_data) != len(self.y_data):
@@ -63,90 +135,92 @@ class BaseGroupNode(BaseChartNode, ABC):
             for i in range(len(self.x_data)):
                 if len(self.x_data[i]) != len(self.y_data[i]):
                     raise ValueError(f"x_data[{i}]的长度必须与y_data[{i}]一致")
-        
-        # 生成元数据列表
-        metadata_list = []
-        
-        # 处理x_data为一维数组的情况
-        if not is_x_data_2d:
-            for group_index in range(len(self.classify)):
-                group_name = self.classify[group_index]
-                group_data = self.y_data[group_index]
-                
-                # 确保x_data长度足够
-                if len(self.x_data) < len(group_data):
-                    raise ValueError(f"x_data长度不足以匹配分组{group_name}的数据")
-                
-                # 生成该分组的元数据
-                for data_index in range(len(group_data)):
-                    metadata = {
-                        self.x_name: self.x_data[data_index],
-                        self.y_name: group_data[data_index],
-                        self.classify_name: group_name
-                    }
-                    metadata_list.append(metadata)
-        
-        # 处理x_data为二维数组的情况
         else:
-            for group_index in range(len(self.classify)):
-                group_name = self.classify[group_index]
-                group_x_data = self.x_data[group_index]
-                group_y_data = self.y_data[group_index]
-                
-                # 生成该分组的元数据
-                for data_index in range(len(group_y_data)):
-                    metadata = {
-                        self.x_name: group_x_data[data_index],
-                        self.y_name: group_y_data[data_index],
-                        self.classify_name: group_name
-                    }
-                    metadata_list.append(metadata)
+            # 确保x_data长度足够
+            for group_index, group_name in enumerate(self.classify):
+                if len(self.x_data) < len(self.y_data[group_index]):
+                    raise ValueError(f"x_data长度不足以匹配分组{group_name}的数据")
         
-        return metadata_list
+        return is_x_data_2d
         
+    @classmethod
+    def _get_spec_builder(cls) -> SpecBuilder:
+        """
+        获取由子类ORIGINAL_CHART_TEMPLATE编译的规范构建器，每个类只编译一次
+        """
+        builder = cls.__dict__.get("_spec_builder")
+        if builder is None:
+            # 检查子类是否定义了图表模板
+            if not hasattr(cls, 'ORIGINAL_CHART_TEMPLATE'):
+                # 如果子类没有定义模板，尝试从GroupLineChartNode获取默认模板
+                from .GroupLineChartNode import GroupLineChartNode
+                if hasattr(GroupLineChartNode, 'ORIGINAL_CHART_TEMPLATE'):
+                    template = GroupLineChartNode.ORIGINAL_CHART_TEMPLATE
+                else:
+                    raise NotImplementedError(f"{cls.__name__}未定义ORIGINAL_CHART_TEMPLATE，且无法找到默认模板")
+            else:
+                # 使用子类定义的模板
+                template = cls.ORIGINAL_CHART_TEMPLATE
+            builder = SpecBuilder(template)
+            cls._spec_builder = builder
+        return builder
+    
     def to_vegalite_chart(self) -> str:
         """
         将分组图表转换为VegaLite图表规范字符串
-        使用子类定义的ORIGINAL_CHART_TEMPLATE模板
-        填充title、x_name、y_name、classify_name以及metadata_list
+        由to_vegalite_dict生成规范字典后以2个空格缩进序列化
         
         返回:
             VegaLite图表规范的字符串
         """
-        # 检查子类是否定义了图表模板
-        if not hasattr(self.__class__, 'ORIGINAL_CHART_TEMPLATE'):
-            # 如果子类没有定义模板，尝试从GroupLineChartNode获取默认模板
-            from .GroupLineChartNode import GroupLineChartNode
-            if hasattr(GroupLineChartNode, 'ORIGINAL_CHART_TEMPLATE'):
-                template = GroupLineChartNode.ORIGINAL_CHART_TEMPLATE
-            else:
-                raise NotImplementedError(f"{self.__class__.__name__}未定义ORIGINAL_CHART_TEMPLATE，且无法找到默认模板")
-        else:
-            # 使用子类定义的模板
-            template = self.__class__.ORIGINAL_CHART_TEMPLATE
+        from ChartMark import json_backend
+        return json_backend.dumps(self.to_vegalite_dict(), indent=2)
+    
+    def to_vegalite_dict(self) -> Dict:
+        """
+        将分组图表转换为VegaLite图表规范字典
+        使用编译后的ORIGINAL_CHART_TEMPLATE骨架，title、x_name、y_name、classify_name作为字符串值填入，
+        metadata_list直接挂载到data.values上，不做字符串拼接和JSON解析
+        
+        返回:
+            VegaLite图表规范的字典
+        """
+        return self._build_spec(self._parse_to_metadata)
+    
+    def to_vegalite_skeleton(self) -> Dict:
+        """
+        生成data.values为空数组的VegaLite图表规范字典，与iter_metadata配合流式写出完整规范
+        
+        返回:
+            VegaLite图表规范的字典
+        """
+        return self._build_spec(list)
+    
+    def _build_spec(self, metadata_factory: Callable[[], List[Dict[str, Any]]]) -> Dict:
+        """用编译后的模板生成规范字典，metadata_factory生成data.values"""
+        builder = self.__class__._get_spec_builder()
         
         # 确保有必要的数据
         if not self.title or not self.x_name or not self.y_name or not self.classify_name:
             raise ValueError("生成图表需要title、x_name、y_name和classify_name")
             
-        # 生成元数据列表并转为JSON字符串
         try:
-            metadata_list = self._parse_to_metadata()
+            from ChartMark import timing
+            with timing.stage(timing.STAGE_METADATA, chart_type=self.type):
+                metadata_list = metadata_factory()
             
-            # 导入json处理元数据
-            import json
-            metadata_json = json.dumps(metadata_list)
-            
-            # 填充模板
-            chart_spec = template.format(
+            return builder.build(
                 title=self.title,
                 x_name=self.x_name,
                 y_name=self.y_name,
                 classify_name=self.classify_name,
-                metadata_list=metadata_json
+                metadata_list=metadata_list
             )
             
-            return chart_spec
-            
         except Exception as e:
-            raise ValueError(f"生成VegaLite图表失败: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"生成VegaLite图表失败: {str(e)}")
+
+
+def _nested_to_list(values: List[Any]) -> List[Any]:
+    """把一维或二维数据中的数值列转换为列表"""
+    return [column_to_list(item) for item in values] if values and isinstance(values[0], FloatColumn) else column_to_list(values)
@@ -1,5 +1,6 @@
 from typing import Dict, List
 from .BaseGroupNode import BaseGroupNode
+from ..FloatColumn import FloatColumn, to_float_column, zeros, pad_column, is_numeric_sequence, column_to_list
 
 
 class GroupBarChartNode(BaseGroupNode):
@@ -73,21 +74,21 @@ class GroupBarChartNode(BaseGroupNode):
             # 处理每个系列数据
             for series in y_data_raw:
                 if isinstance(series, list):
-                    # 将内层数组转换为浮点数
-                    numeric_series = [float(y) if isinstance(y, (int, float)) else 0.0 for y in series]
+                    # 将内层数组转换为数值列
+                    numeric_series = to_float_column(series)
                     
                     # 确保内层长度与x_data长度相同
                     if len(numeric_series) < len(self.x_data):
                         # 如果内层数组比x_data短，补充0.0
-                        numeric_series.extend([0.0] * (len(self.x_data) - len(numeric_series)))
+                        pad_column(numeric_series, len(self.x_data))
                     elif len(numeric_series) > len(self.x_data) and self.x_data:
                         # 如果内层数组比x_data长，截取符合长度的部分
                         numeric_series = numeric_series[:len(self.x_data)]
                     
                     self.y_data.append(numeric_series)
                 else:
-                    # 如果不是列表，添加一个与x_data等长的空数组（填充0.0）
-                    self.y_data.append([0.0] * len(self.x_data))
+                    # 如果不是列表，添加一个与x_data等长的数值列（填充0.0）
+                    self.y_data.append(zeros(len(self.x_data)))
     
     def to_dict(self) -> Dict:
         """
@@ -96,7 +97,7 @@ class GroupBarChartNode(BaseGroupNode):
         result = super().to_dict()
         result.update({
             "x_data": self.x_data,
-            "y_data": self.y_data
+            "y_data": [column_to_list(series) for series in self.y_data]
         })
         return result
     
@@ -116,7 +117,7 @@ class GroupBarChartNode(BaseGroupNode):
             return False
         
         # 检查y_data是否为非空二维数组
-        if not self.y_data or not all(isinstance(series, list) for series in self.y_data):
+        if not self.y_data or not all(isinstance(series, (list, FloatColumn)) for series in self.y_data):
             return False
         
         # 检查y_data外层长度是否与classify长度相同
@@ -128,7 +129,7 @@ class GroupBarChartNode(BaseGroupNode):
             return False
         
         # 检查y_data的元素是否全部是数值
-        if not all(all(isinstance(y, (int, float)) for y in series) for series in self.y_data):
+        if not all(is_numeric_sequence(series) for series in self.y_data):
             return False
         
         return True
@@ -155,9 +156,14 @@ class GroupBarChartNode(BaseGroupNode):
         if not all(len(series) == len(x_data) for series in y_data):
             return False
         
+        try:
+            y_float_data = [to_float_column(series, strict=True) for series in y_data]
+        except (ValueError, TypeError):
+            return False
+        
         # 设置数据
         self.x_data = x_data
-        self.y_data = y_data
+        self.y_data = y_float_data
         self.classify = classify
         
         return True
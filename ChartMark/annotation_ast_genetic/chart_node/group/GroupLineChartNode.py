@@ -1,6 +1,10 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
+from array import array
 from .BaseGroupNode import BaseGroupNode
-import re
+from ..FloatColumn import FloatColumn, to_float_column, zeros, pad_column, is_numeric_sequence, column_to_list
+from ..DateNormalizer import is_date_format, normalize_date, normalize_dates
+from ..Downsampler import RowPredicate, select_indices, parse_time_axis, time_axis
+from ..SummaryResolver import FullData
 from datetime import datetime
 
 
@@ -51,6 +55,8 @@ class GroupLineChartNode(BaseGroupNode):
     """
     def __init__(self, chart_obj: Dict = None):
         super().__init__(chart_obj)
+        # 降采样前的完整数据，由downsample设置，用于在服务端计算汇总注释
+        self.full_data: Optional[FullData] = None
         
         if chart_obj:
             self._parse_data_properties(chart_obj)
@@ -60,42 +66,20 @@ class GroupLineChartNode(BaseGroupNode):
     def _is_date_format(self, date_str: str) -> bool:
         """
         检查字符串是否为有效的日期格式
-        支持的格式: YYYY-MM-DD, YYYY/MM/DD
+        支持的格式: YYYY-MM-DD, YYYY/MM/DD以及ISO日期时间
         """
-        date_patterns = [
-            r'^\d{4}-\d{1,2}-\d{1,2}$',  # YYYY-MM-DD
-            r'^\d{4}/\d{1,2}/\d{1,2}$',  # YYYY/MM/DD
-        ]
-        return any(re.match(pattern, date_str) for pattern in date_patterns)
+        return is_date_format(date_str)
     
     def _format_date(self, date_str: str) -> str:
         """
-        格式化日期字符串为标准格式
+        格式化日期字符串为标准格式，见DateNormalizer.normalize_date
         """
-        try:
-            # 尝试解析日期
-            if '-' in date_str:
-                parts = date_str.split('-')
-                if len(parts) == 3:
-                    year, month, day = parts
-                    dt = datetime(int(year), int(month), int(day))
-                    return dt.strftime('%Y-%m-%d')
-            elif '/' in date_str:
-                parts = date_str.split('/')
-                if len(parts) == 3:
-                    year, month, day = parts
-                    dt = datetime(int(year), int(month), int(day))
-                    return dt.strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            pass
-        
-        # 如果无法解析为日期格式，返回原始字符串
-        return date_str
+        return normalize_date(date_str)
     
     def _parse_data_properties(self, chart_obj: Dict):
         """
         解析数据属性并确保数据格式正确
-        - x_data应为一维日期字符串数组
+        - x_data应为一维日期字符串数组，也可以是ISO日期时间或Unix时间戳（秒或毫秒）
         - y_data应为二维数值数组
         - y_data外层长度应与classify长度相同
         - y_data内层长度应与x_data长度相同
@@ -106,16 +90,8 @@ class GroupLineChartNode(BaseGroupNode):
         
         self.classify = chart_obj.get("classify", [])
         
-        # 将x_data转换为日期字符串列表
-        if isinstance(x_data_raw, list):
-            self.x_data = []
-            for x in x_data_raw:
-                x_str = str(x)
-                # 尝试格式化为日期格式
-                formatted_date = self._format_date(x_str)
-                self.x_data.append(formatted_date)
-        else:
-            self.x_data = []
+        # 将x_data整列转换为日期字符串列表，支持日期字符串、ISO日期时间和Unix时间戳
+        self.x_data = normalize_dates(x_data_raw) if isinstance(x_data_raw, list) else []
         
         # 解析y_data为二维数值数组
         if isinstance(y_data_raw, list):
@@ -135,21 +111,21 @@ class GroupLineChartNode(BaseGroupNode):
             # 处理每个系列数据
             for series in y_data_raw:
                 if isinstance(series, list):
-                    # 将内层数组转换为浮点数
-                    numeric_series = [float(y) if isinstance(y, (int, float)) else 0.0 for y in series]
+                    # 将内层数组转换为数值列
+                    numeric_series = to_float_column(series)
                     
                     # 确保内层长度与x_data长度相同
                     if len(numeric_series) < len(self.x_data):
                         # 如果内层数组比x_data短，补充0.0
-                        numeric_series.extend([0.0] * (len(self.x_data) - len(numeric_series)))
+                        pad_column(numeric_series, len(self.x_data))
                     elif len(numeric_series) > len(self.x_data) and self.x_data:
                         # 如果内层数组比x_data长，截取符合长度的部分
                         numeric_series = numeric_series[:len(self.x_data)]
                     
                     self.y_data.append(numeric_series)
                 else:
-                    # 如果不是列表，添加一个与x_data等长的空数组（填充0.0）
-                    self.y_data.append([0.0] * len(self.x_data))
+                    # 如果不是列表，添加一个与x_data等长的数值列（填充0.0）
+                    self.y_data.append(zeros(len(self.x_data)))
     
     def to_dict(self) -> Dict:
         """
@@ -158,7 +134,7 @@ class GroupLineChartNode(BaseGroupNode):
         result = super().to_dict()
         result.update({
             "x_data": self.x_data,
-            "y_data": self.y_data
+            "y_data": [column_to_list(series) for series in self.y_data]
         })
         return result
     
@@ -183,7 +159,7 @@ class GroupLineChartNode(BaseGroupNode):
             return False
         
         # 检查y_data是否为非空二维数组
-        if not self.y_data or not all(isinstance(series, list) for series in self.y_data):
+        if not self.y_data or not all(isinstance(series, (list, FloatColumn)) for series in self.y_data):
             return False
         
         # 检查y_data外层长度是否与classify长度相同
@@ -195,7 +171,7 @@ class GroupLineChartNode(BaseGroupNode):
             return False
         
         # 检查y_data的元素是否全部是数值
-        if not all(all(isinstance(y, (int, float)) for y in series) for series in self.y_data):
+        if not all(is_numeric_sequence(series) for series in self.y_data):
             return False
         
         return True
@@ -226,9 +202,97 @@ class GroupLineChartNode(BaseGroupNode):
         if not all(len(series) == len(x_data) for series in y_data):
             return False
         
+        try:
+            y_float_data = [to_float_column(series, strict=True) for series in y_data]
+        except (ValueError, TypeError):
+            return False
+        
         # 设置数据
-        self.x_data = [self._format_date(x) for x in x_data]
-        self.y_data = y_data
+        self.x_data = normalize_dates(x_data)
+        self.y_data = y_float_data
         self.classify = classify
         
         return True
+    
+    def downsample(self, threshold: int, method: str = "lttb", keep_row: Optional[RowPredicate] = None) -> int:
+        """
+        把每个分组的数据缩减到约threshold个点，在生成规范之前调用
+        各分组共用x_data，因此保留的是各分组选出的点的并集，分组越多保留的点越多
+        
+        参数:
+            threshold: 每个分组的目标点数，x_data长度不超过该值时不做处理
+            method: 降采样算法，"lttb"或"minmax"，见Downsampler.DOWNSAMPLE_METHODS
+            keep_row: 行判定函数，参数为{"temporal": 时间戳, "quantity": y值, "group": 分组名称}，
+                判定为True的点所在的x总会保留（如被注释选中的点）
+                
+        返回:
+            降采样后的x_data长度；有数据被丢弃时，丢弃前的完整数据保存在full_data中
+            
+        异常:
+            ValueError: threshold不是正数或method不受支持
+        """
+        length = len(self.x_data)
+        timestamps = parse_time_axis(self.x_data)
+        xs = time_axis(self.x_data, timestamps)
+        
+        selected = set()
+        for series in self.y_data:
+            if len(series) == length:
+                selected.update(select_indices(xs, series, threshold, method))
+        if not selected:
+            return length
+        if keep_row and len(selected) < length:
+            for group, series in zip(self.classify, self.y_data):
+                selected.update(
+                    index for index, (x, y) in enumerate(zip(xs, series))
+                    if index not in selected and keep_row({"temporal": x, "quantity": y, "group": group})
+                )
+        if len(selected) < length:
+            self.full_data = self._full_data(timestamps, selected)
+            indices = sorted(selected)
+            self.x_data = [self.x_data[index] for index in indices]
+            self.y_data = [
+                array('d', (series[index] for index in indices)) if len(series) == length else series
+                for series in self.y_data
+            ]
+        return len(self.x_data)
+    
+    def _full_data(self, timestamps: Optional[List[float]], selected: Set[int]) -> FullData:
+        """
+        按data.values的行顺序（各分组依次排列）拼接降采样前的完整数据
+        
+        参数:
+            timestamps: x_data的时间戳，有无法解析的日期时为None
+            selected: 降采样保留的x_data下标
+        """
+        length = len(self.x_data)
+        all_x = []
+        all_y = array('d')
+        all_groups = []
+        all_timestamps = []
+        kept = set()
+        # offset为当前分组的第一行在完整数据中的下标
+        offset = 0
+        for group, series in zip(self.classify, self.y_data):
+            count = min(length, len(series))
+            all_x.extend(self.x_data[:count])
+            all_y.extend(series[:count])
+            all_groups.extend([group] * count)
+            if timestamps is not None:
+                all_timestamps.extend(timestamps[:count])
+            if len(series) == length:
+                kept.update(offset + index for index in selected)
+            else:
+                # 长度与x_data不同的分组不做降采样，所有行都保留
+                kept.update(range(offset, offset + count))
+            offset += count
+        
+        numeric = {self.y_name: all_y}
+        if timestamps is not None:
+            numeric[self.x_name] = all_timestamps
+        return FullData(
+            columns={self.x_name: all_x, self.y_name: all_y, self.classify_name: all_groups},
+            numeric=numeric,
+            kept=kept,
+            temporal=frozenset({self.x_name})
+        )
@@ -1,5 +1,10 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+from array import array
 from .BaseGroupNode import BaseGroupNode
+from ..FloatColumn import FloatColumn, to_float_column, zeros, pad_column, is_numeric_sequence
+from ..DensityBinner import DensityGrid, grid_cells, extreme_indices
+from ..SummaryResolver import FullData
+from ..Downsampler import RowPredicate
 
 
 class GroupScatterChartNode(BaseGroupNode):
@@ -79,24 +84,19 @@ class GroupScatterChartNode(BaseGroupNode):
                 isinstance(item, (int, float)) for item in x_data_raw
             ):
                 # 如果是一维数值数组，转换为单一系列的二维数组
-                numeric_series = [float(x) for x in x_data_raw]
-                self.x_data = [numeric_series]
+                self.x_data = [to_float_column(x_data_raw)]
             else:
                 # 处理二维数组情况
                 for series in x_data_raw:
                     if isinstance(series, list):
-                        # 将内层数组转换为浮点数
-                        numeric_series = [
-                            float(x) if isinstance(x, (int, float)) else 0.0
-                            for x in series
-                        ]
-                        self.x_data.append(numeric_series)
+                        # 将内层数组转换为数值列
+                        self.x_data.append(to_float_column(series))
                     elif isinstance(series, (int, float)):
-                        # 如果元素是数值，添加为长度为1的数组
-                        self.x_data.append([float(series)])
+                        # 如果元素是数值，添加为长度为1的数值列
+                        self.x_data.append(to_float_column([series]))
                     else:
-                        # 其他情况添加空数组
-                        self.x_data.append([])
+                        # 其他情况添加空数值列
+                        self.x_data.append(zeros(0))
 
         # 解析y_data为二维数值数组
         if isinstance(y_data_raw, list):
@@ -107,24 +107,19 @@ class GroupScatterChartNode(BaseGroupNode):
                 isinstance(item, (int, float)) for item in y_data_raw
             ):
                 # 如果是一维数值数组，转换为单一系列的二维数组
-                numeric_series = [float(y) for y in y_data_raw]
-                self.y_data = [numeric_series]
+                self.y_data = [to_float_column(y_data_raw)]
             else:
                 # 处理二维数组情况
                 for series in y_data_raw:
                     if isinstance(series, list):
-                        # 将内层数组转换为浮点数
-                        numeric_series = [
-                            float(y) if isinstance(y, (int, float)) else 0.0
-                            for y in series
-                        ]
-                        self.y_data.append(numeric_series)
+                        # 将内层数组转换为数值列
+                        self.y_data.append(to_float_column(series))
                     elif isinstance(series, (int, float)):
-                        # 如果元素是数值，添加为长度为1的数组
-                        self.y_data.append([float(series)])
+                        # 如果元素是数值，添加为长度为1的数值列
+                        self.y_data.append(to_float_column([series]))
                     else:
-                        # 其他情况添加空数组
-                        self.y_data.append([])
+                        # 其他情况添加空数值列
+                        self.y_data.append(zeros(0))
 
         # 确保x_data和y_data外层长度与classify长度一致
         expected_outer_length = (
@@ -133,9 +128,9 @@ class GroupScatterChartNode(BaseGroupNode):
 
         # 处理x_data长度
         if len(self.x_data) < expected_outer_length:
-            # 如果x_data比预期短，用空数组补足
+            # 如果x_data比预期短，用空数值列补足
             self.x_data.extend(
-                [[] for _ in range(expected_outer_length - len(self.x_data))]
+                [zeros(0) for _ in range(expected_outer_length - len(self.x_data))]
             )
         elif len(self.x_data) > expected_outer_length and expected_outer_length > 0:
             # 如果x_data比预期长，截取
@@ -143,9 +138,9 @@ class GroupScatterChartNode(BaseGroupNode):
 
         # 处理y_data长度
         if len(self.y_data) < expected_outer_length:
-            # 如果y_data比预期短，用空数组补足
+            # 如果y_data比预期短，用空数值列补足
             self.y_data.extend(
-                [[] for _ in range(expected_outer_length - len(self.y_data))]
+                [zeros(0) for _ in range(expected_outer_length - len(self.y_data))]
             )
         elif len(self.y_data) > expected_outer_length and expected_outer_length > 0:
             # 如果y_data比预期长，截取
@@ -154,22 +149,16 @@ class GroupScatterChartNode(BaseGroupNode):
         # 确保每对x_data和y_data内层数组长度一致
         for i in range(len(self.x_data)):
             x_series = self.x_data[i]
-            y_series = self.y_data[i] if i < len(self.y_data) else []
+            y_series = self.y_data[i] if i < len(self.y_data) else zeros(0)
 
             # 取较大的长度作为统一长度
             target_length = max(len(x_series), len(y_series))
 
-            # 调整x_series长度
-            if len(x_series) < target_length:
-                x_series.extend([0.0] * (target_length - len(x_series)))
-            elif len(x_series) > target_length and target_length > 0:
-                x_series = x_series[:target_length]
+            # 调整x_series长度（target_length不小于两者长度，只需补足）
+            pad_column(x_series, target_length)
 
-            # 调整y_series长度
-            if len(y_series) < target_length:
-                y_series.extend([0.0] * (target_length - len(y_series)))
-            elif len(y_series) > target_length and target_length > 0:
-                y_series = y_series[:target_length]
+            # 调整y_series长度（target_length不小于两者长度，只需补足）
+            pad_column(y_series, target_length)
 
             # 更新调整后的数据
             self.x_data[i] = x_series
@@ -189,8 +178,8 @@ class GroupScatterChartNode(BaseGroupNode):
         if not self.x_data or not self.y_data:
             return False
 
-        if not all(isinstance(series, list) for series in self.x_data) or not all(
-            isinstance(series, list) for series in self.y_data
+        if not all(isinstance(series, (list, FloatColumn)) for series in self.x_data) or not all(
+            isinstance(series, (list, FloatColumn)) for series in self.y_data
         ):
             return False
 
@@ -207,14 +196,10 @@ class GroupScatterChartNode(BaseGroupNode):
             return False
 
         # 检查x_data和y_data的元素是否全部是数值
-        if not all(
-            all(isinstance(x, (int, float)) for x in series) for series in self.x_data
-        ):
+        if not all(is_numeric_sequence(series) for series in self.x_data):
             return False
 
-        if not all(
-            all(isinstance(y, (int, float)) for y in series) for series in self.y_data
-        ):
+        if not all(is_numeric_sequence(series) for series in self.y_data):
             return False
 
         return True
@@ -246,10 +231,10 @@ class GroupScatterChartNode(BaseGroupNode):
 
         # 检查是否全部是数值
         try:
-            # 转换x_data为二维浮点数数组
-            x_float_data = [[float(x) for x in series] for series in x_data]
-            # 转换y_data为二维浮点数数组
-            y_float_data = [[float(y) for y in series] for series in y_data]
+            # 转换x_data为数值列
+            x_float_data = [to_float_column(series, strict=True) for series in x_data]
+            # 转换y_data为数值列
+            y_float_data = [to_float_column(series, strict=True) for series in y_data]
 
             # 设置数据
             self.x_data = x_float_data
@@ -260,3 +245,62 @@ class GroupScatterChartNode(BaseGroupNode):
         except (ValueError, TypeError):
             return False
 
+    def bin_density(self, bins: int, keep_row: Optional[RowPredicate] = None) -> Optional[DensityGrid]:
+        """
+        把所有分组的点一起划分到bins x bins的网格中统计点数，各分组的数据只保留需要精确显示的点，
+        在生成规范之前调用；总点数不超过格子数时不做处理
+
+        参数:
+            bins: 每个轴上的格子数
+            keep_row: 行判定函数，参数为{"x_quantity": x值, "y_quantity": y值, "group": 分组名称}，
+                判定为True的点（如被注释选中的点）保留在data.values中；每个分组的x、y极值点总会保留
+
+        返回:
+            分箱结果，其中的full为分箱前所有分组拼接后的完整数据，包括分组字段；未分箱时返回None
+
+        异常:
+            ValueError: bins不是正数
+        """
+        if bins <= 0:
+            raise ValueError("分箱的格子数必须是正数")
+        if not self.validate():
+            return None
+
+        all_x = array('d')
+        all_y = array('d')
+        all_groups = []
+        for x_series, y_series, group_name in zip(self.x_data, self.y_data, self.classify):
+            all_x.extend(x_series)
+            all_y.extend(y_series)
+            all_groups.extend([group_name] * len(x_series))
+        if len(all_x) <= bins * bins:
+            return None
+
+        grid = DensityGrid(
+            x_name=self.x_name,
+            y_name=self.y_name,
+            cells=grid_cells(all_x, all_y, bins),
+            point_count=len(all_x)
+        )
+        grid.full = FullData(
+            columns={self.x_name: all_x, self.y_name: all_y, self.classify_name: all_groups},
+            numeric={self.x_name: all_x, self.y_name: all_y}
+        )
+        # 完整数据按分组依次拼接，offset为当前分组的第一个点在完整数据中的下标
+        offset = 0
+        for group_index, group_name in enumerate(self.classify):
+            x_series = self.x_data[group_index]
+            y_series = self.y_data[group_index]
+            kept = set(extreme_indices(x_series, y_series))
+            if keep_row:
+                kept.update(
+                    index for index, (x, y) in enumerate(zip(x_series, y_series))
+                    if keep_row({"x_quantity": x, "y_quantity": y, "group": group_name})
+                )
+            indices = sorted(kept)
+            self.x_data[group_index] = array('d', (x_series[index] for index in indices))
+            self.y_data[group_index] = array('d', (y_series[index] for index in indices))
+            grid.kept_count += len(indices)
+            grid.full.kept.update(offset + index for index in indices)
+            offset += len(x_series)
+        return grid
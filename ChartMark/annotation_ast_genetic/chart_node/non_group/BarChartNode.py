@@ -1,5 +1,6 @@
 from typing import Dict, List, Any
 from .BaseNonGroupNode import BaseNonGroupNode
+from ..FloatColumn import to_float_column, zeros, pad_column, is_numeric_sequence
 
 
 class BarChartNode(BaseNonGroupNode):
@@ -51,11 +52,8 @@ class BarChartNode(BaseNonGroupNode):
         # 将x_data转换为字符串列表
         self.x_data = [str(x) for x in x_data_raw] if isinstance(x_data_raw, list) else []
         
-        # 将y_data转换为浮点数列表
-        if isinstance(y_data_raw, list):
-            self.y_data = [float(y) if isinstance(y, (int, float)) else 0.0 for y in y_data_raw]
-        else:
-            self.y_data = []
+        # 将y_data批量转换为浮点数列
+        self.y_data = to_float_column(y_data_raw) if isinstance(y_data_raw, list) else zeros(0)
         
         # 确保x_data和y_data长度一致
         target_length = max(len(self.x_data), len(self.y_data))
@@ -68,13 +66,8 @@ class BarChartNode(BaseNonGroupNode):
             # 截取x_data
             self.x_data = self.x_data[:target_length]
         
-        # 调整y_data长度
-        if len(self.y_data) < target_length:
-            # 用0.0补充y_data
-            self.y_data.extend([0.0] * (target_length - len(self.y_data)))
-        elif len(self.y_data) > target_length and target_length > 0:
-            # 截取y_data
-            self.y_data = self.y_data[:target_length]  
+        # 调整y_data长度，用0.0补充
+        pad_column(self.y_data, target_length)  
     
     def validate(self) -> bool:
         """
@@ -98,7 +91,7 @@ class BarChartNode(BaseNonGroupNode):
             return False
         
         # 检查y_data的元素是否全部是数值
-        if not all(isinstance(y, (int, float)) for y in self.y_data):
+        if not is_numeric_sequence(self.y_data):
             return False
         
         return True
@@ -127,7 +120,7 @@ class BarChartNode(BaseNonGroupNode):
             # 转换x_data为字符串数组
             x_str_data = [str(x) for x in x_data]
             # 转换y_data为浮点数数组
-            y_float_data = [float(y) for y in y_data]
+            y_float_data = to_float_column(y_data, strict=True)
             
             # 设置数据
             self.x_data = x_str_data
@@ -1,12 +1,15 @@
-from typing import Dict, List, Any, Optional, ClassVar, Tuple, Union, Callable, Type, Protocol, cast, Set, TypeVar, Generic, AbstractSet, Mapping, Sequence, MutableMapping, MutableSequence, Iterable
+from typing import Dict, List, Any, Optional, ClassVar, Tuple, Union, Callable, Type, Protocol, cast, Set, TypeVar, Generic, AbstractSet, Mapping, Sequence, MutableMapping, MutableSequence, Iterable, Iterator
 from abc import ABC, abstractmethod
 from ..BaseChartNode import BaseChartNode
+from ..FloatColumn import FloatColumn, column_to_list
+from ..SpecBuilder import SpecBuilder
 
 class BaseNonGroupNode(BaseChartNode, ABC):
     """
     非分组图表节点基类，继承基础图表节点
     利用父类的x_name和y_name属性，并添加x_data和y_data属性
     要求子类必须实现_process_data方法来设置x_data和y_data
+    数值轴的数据以array('d')数值列（见FloatColumn）保存，get_x_data/get_y_data和to_dict返回列表
     """
     def __init__(self, chart_obj: Dict = None):
         """
@@ -18,9 +21,9 @@ class BaseNonGroupNode(BaseChartNode, ABC):
         # 先调用父类初始化方法，处理基本属性（包括x_name和y_name）
         super().__init__(chart_obj)
         
-        # 初始化数据属性
-        self.x_data: List[Any] = []
-        self.y_data: List[Any] = []
+        # 初始化数据属性，数值轴为FloatColumn，类别和日期轴为字符串列表
+        self.x_data: Union[List[Any], FloatColumn] = []
+        self.y_data: Union[List[Any], FloatColumn] = []
         
     
     def get_x_data(self) -> List[Any]:
@@ -30,7 +33,7 @@ class BaseNonGroupNode(BaseChartNode, ABC):
         返回:
             X轴数据列表
         """
-        return self.x_data
+        return column_to_list(self.x_data)
     
     def get_y_data(self) -> List[Any]:
         """
@@ -39,7 +42,7 @@ class BaseNonGroupNode(BaseChartNode, ABC):
         返回:
             Y轴数据列表
         """
-        return self.y_data
+        return column_to_list(self.y_data)
         
     def _parse_to_metadata(self) -> List[Dict[str, Any]]:
         """
@@ -50,6 +53,34 @@ class BaseNonGroupNode(BaseChartNode, ABC):
         返回:
             包含x_name和y_name作为键的字典列表
         """
+        self._check_metadata_source()
+        
+        # 生成元数据列表，数值列先批量转换为列表，避免逐个下标访问时装箱
+        x_name = self.x_name
+        y_name = self.y_name
+        return [
+            {x_name: x, y_name: y}
+            for x, y in zip(column_to_list(self.x_data), column_to_list(self.y_data))
+        ]
+    
+    def iter_metadata(self) -> Iterator[Dict[str, Any]]:
+        """
+        逐行生成与_parse_to_metadata相同的元数据，不构建完整的行字典列表，
+        用于流式写出大规模图表的data.values
+        
+        返回:
+            元数据行的迭代器，数据校验在调用时立即完成
+            
+        异常:
+            ValueError: 数据不完整或长度不一致
+        """
+        self._check_metadata_source()
+        x_name = self.x_name
+        y_name = self.y_name
+        return ({x_name: x, y_name: y} for x, y in zip(self.x_data, self.y_data))
+    
+    def _check_metadata_source(self) -> None:
+        """检查生成元数据所需的属性和数据，不满足时抛出ValueError"""
         # 确保x_name和y_name存在
         if not self.x_name or not self.y_name:
             raise ValueError("x_name和y_name必须存在才能生成元数据")
@@ -57,17 +88,6 @@ class BaseNonGroupNode(BaseChartNode, ABC):
         # 确保x_data和y_data非空且长度一致
         if not self.x_data or not self.y_data or len(self.x_data) != len(self.y_data):
             raise ValueError("x_data和y_data必须非空且长度一致")
-            
-        # 生成元数据列表
-        metadata_list = []
-        for i in range(len(self.x_data)):
-            metadata = {
-                self.x_name: self.x_data[i],
-                self.y_name: self.y_data[i]
-            }
-            metadata_list.append(metadata)
-            
-        return metadata_list
 
     def to_dict(self) -> Dict:
         """
@@ -78,47 +98,74 @@ class BaseNonGroupNode(BaseChartNode, ABC):
             "type": self.type,
             "x_name": self.x_name,
             "y_name": self.y_name,
-            "x_data": self.x_data,
-            "y_data": self.y_data
+            "x_data": column_to_list(self.x_data),
+            "y_data": column_to_list(self.y_data)
         }
         
+    @classmethod
+    def _get_spec_builder(cls) -> SpecBuilder:
+        """
+        获取由子类ORIGINAL_CHART_TEMPLATE编译的规范构建器，每个类只编译一次
+        """
+        builder = cls.__dict__.get("_spec_builder")
+        if builder is None:
+            # 检查子类是否定义了图表模板
+            if not hasattr(cls, 'ORIGINAL_CHART_TEMPLATE'):
+                raise NotImplementedError(f"{cls.__name__}未定义ORIGINAL_CHART_TEMPLATE")
+            builder = SpecBuilder(cls.ORIGINAL_CHART_TEMPLATE)
+            cls._spec_builder = builder
+        return builder
+    
     def to_vegalite_chart(self) -> str:
         """
         将图表转换为VegaLite图表规范字符串
-        使用子类定义的ORIGINAL_CHART_TEMPLATE模板
-        填充title、x_name、y_name以及metadata_list
+        由to_vegalite_dict生成规范字典后以2个空格缩进序列化
         
         返回:
             VegaLite图表规范的字符串
         """
-        # 检查子类是否定义了图表模板
-        if not hasattr(self.__class__, 'ORIGINAL_CHART_TEMPLATE'):
-            raise NotImplementedError(f"{self.__class__.__name__}未定义ORIGINAL_CHART_TEMPLATE")
-            
-        # 获取模板
-        template = self.__class__.ORIGINAL_CHART_TEMPLATE
+        from ChartMark import json_backend
+        return json_backend.dumps(self.to_vegalite_dict(), indent=2)
+    
+    def to_vegalite_dict(self) -> Dict:
+        """
+        将图表转换为VegaLite图表规范字典
+        使用编译后的ORIGINAL_CHART_TEMPLATE骨架，title、x_name、y_name作为字符串值填入，
+        metadata_list直接挂载到data.values上，不做字符串拼接和JSON解析
+        
+        返回:
+            VegaLite图表规范的字典
+        """
+        return self._build_spec(self._parse_to_metadata)
+    
+    def to_vegalite_skeleton(self) -> Dict:
+        """
+        生成data.values为空数组的VegaLite图表规范字典，与iter_metadata配合流式写出完整规范
+        
+        返回:
+            VegaLite图表规范的字典
+        """
+        return self._build_spec(list)
+    
+    def _build_spec(self, metadata_factory: Callable[[], List[Dict[str, Any]]]) -> Dict:
+        """用编译后的模板生成规范字典，metadata_factory生成data.values"""
+        builder = self.__class__._get_spec_builder()
         
         # 确保有必要的数据
         if not self.title or not self.x_name or not self.y_name:
             raise ValueError("生成图表需要title、x_name和y_name")
             
-        # 生成元数据列表并转为JSON字符串
         try:
-            metadata_list = self._parse_to_metadata()
-            
-            # 导入json处理元数据
-            import json
-            metadata_json = json.dumps(metadata_list)
+            from ChartMark import timing
+            with timing.stage(timing.STAGE_METADATA, chart_type=self.type):
+                metadata_list = metadata_factory()
             
-            # 填充模板
-            chart_spec = template.format(
+            return builder.build(
                 title=self.title,
                 x_name=self.x_name,
                 y_name=self.y_name,
-                metadata_list=metadata_json
+                metadata_list=metadata_list
             )
             
-            return chart_spec
-            
         except Exception as e:
-            raise ValueError(f"生成VegaLite图表失败: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"生成VegaLite图表失败: {str(e)}")
@@ -1,6 +1,10 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+from array import array
 from .BaseNonGroupNode import BaseNonGroupNode
-import re
+from ..FloatColumn import to_float_column, zeros, pad_column, is_numeric_sequence
+from ..DateNormalizer import is_date_format, normalize_date, normalize_dates
+from ..Downsampler import RowPredicate, select_indices, parse_time_axis, time_axis
+from ..SummaryResolver import FullData
 from datetime import datetime
 
 
@@ -51,6 +55,8 @@ class LineChartNode(BaseNonGroupNode):
     """
     def __init__(self, chart_obj: Dict = None):
         super().__init__(chart_obj)
+        # 降采样前的完整数据，由downsample设置，用于在服务端计算汇总注释
+        self.full_data: Optional[FullData] = None
         
         if chart_obj:
             self._parse_data_properties(chart_obj)
@@ -60,42 +66,20 @@ class LineChartNode(BaseNonGroupNode):
     def _is_date_format(self, date_str: str) -> bool:
         """
         检查字符串是否为有效的日期格式
-        支持的格式: YYYY-MM-DD, YYYY/MM/DD
+        支持的格式: YYYY-MM-DD, YYYY/MM/DD以及ISO日期时间
         """
-        date_patterns = [
-            r'^\d{4}-\d{1,2}-\d{1,2}$',  # YYYY-MM-DD
-            r'^\d{4}/\d{1,2}/\d{1,2}$',  # YYYY/MM/DD
-        ]
-        return any(re.match(pattern, date_str) for pattern in date_patterns)
+        return is_date_format(date_str)
     
     def _format_date(self, date_str: str) -> str:
         """
-        格式化日期字符串为标准格式
+        格式化日期字符串为标准格式，见DateNormalizer.normalize_date
         """
-        try:
-            # 尝试解析日期
-            if '-' in date_str:
-                parts = date_str.split('-')
-                if len(parts) == 3:
-                    year, month, day = parts
-                    dt = datetime(int(year), int(month), int(day))
-                    return dt.strftime('%Y-%m-%d')
-            elif '/' in date_str:
-                parts = date_str.split('/')
-                if len(parts) == 3:
-                    year, month, day = parts
-                    dt = datetime(int(year), int(month), int(day))
-                    return dt.strftime('%Y-%m-%d')
-        except (ValueError, TypeError):
-            pass
-        
-        # 如果无法解析为日期格式，返回原始字符串
-        return date_str
+        return normalize_date(date_str)
     
     def _parse_data_properties(self, chart_obj: Dict):
         """
         解析数据属性并确保数据格式正确
-        - x_data应为一维日期字符串数组
+        - x_data应为一维日期字符串数组，也可以是ISO日期时间或Unix时间戳（秒或毫秒）
         - y_data应为一维数值数组
         - 两个数组长度应相等
         """
@@ -103,22 +87,11 @@ class LineChartNode(BaseNonGroupNode):
         x_data_raw = chart_obj.get("x_data", [])
         y_data_raw = chart_obj.get("y_data", [])
         
-        # 将x_data转换为日期字符串列表
-        if isinstance(x_data_raw, list):
-            self.x_data = []
-            for x in x_data_raw:
-                x_str = str(x)
-                # 尝试格式化为日期格式
-                formatted_date = self._format_date(x_str)
-                self.x_data.append(formatted_date)
-        else:
-            self.x_data = []
+        # 将x_data整列转换为日期字符串列表，支持日期字符串、ISO日期时间和Unix时间戳
+        self.x_data = normalize_dates(x_data_raw) if isinstance(x_data_raw, list) else []
         
-        # 将y_data转换为浮点数列表
-        if isinstance(y_data_raw, list):
-            self.y_data = [float(y) if isinstance(y, (int, float)) else 0.0 for y in y_data_raw]
-        else:
-            self.y_data = []
+        # 将y_data批量转换为浮点数列
+        self.y_data = to_float_column(y_data_raw) if isinstance(y_data_raw, list) else zeros(0)
         
         # 确保x_data和y_data长度一致
         target_length = max(len(self.x_data), len(self.y_data))
@@ -146,13 +119,8 @@ class LineChartNode(BaseNonGroupNode):
             # 截取x_data
             self.x_data = self.x_data[:target_length]
         
-        # 调整y_data长度
-        if len(self.y_data) < target_length:
-            # 用0.0补充y_data
-            self.y_data.extend([0.0] * (target_length - len(self.y_data)))
-        elif len(self.y_data) > target_length and target_length > 0:
-            # 截取y_data
-            self.y_data = self.y_data[:target_length]
+        # 调整y_data长度，用0.0补充
+        pad_column(self.y_data, target_length)
     
     def validate(self) -> bool:
         """
@@ -177,7 +145,7 @@ class LineChartNode(BaseNonGroupNode):
             return False
         
         # 检查y_data的元素是否全部是数值
-        if not all(isinstance(y, (int, float)) for y in self.y_data):
+        if not is_numeric_sequence(self.y_data):
             return False
         
         return True
@@ -208,9 +176,9 @@ class LineChartNode(BaseNonGroupNode):
         # 检查是否全部是预期类型
         try:
             # 转换x_data为日期格式字符串数组
-            x_date_data = [self._format_date(x) for x in x_data]
+            x_date_data = normalize_dates(x_data)
             # 转换y_data为浮点数数组
-            y_float_data = [float(y) for y in y_data]
+            y_float_data = to_float_column(y_data, strict=True)
             
             # 设置数据
             self.x_data = x_date_data
@@ -219,3 +187,43 @@ class LineChartNode(BaseNonGroupNode):
             return True
         except (ValueError, TypeError):
             return False
+    
+    def downsample(self, threshold: int, method: str = "lttb", keep_row: Optional[RowPredicate] = None) -> int:
+        """
+        把数据缩减到约threshold个点，在生成规范之前调用
+        
+        参数:
+            threshold: 目标点数，数据点数不超过该值时不做处理
+            method: 降采样算法，"lttb"或"minmax"，见Downsampler.DOWNSAMPLE_METHODS
+            keep_row: 行判定函数，参数为{"temporal": 时间戳, "quantity": y值}，
+                判定为True的行总会保留（如被注释选中的行），因此结果可能多于threshold个点
+                
+        返回:
+            降采样后的数据点数；有数据被丢弃时，丢弃前的完整数据保存在full_data中
+            
+        异常:
+            ValueError: threshold不是正数或method不受支持
+        """
+        timestamps = parse_time_axis(self.x_data)
+        xs = time_axis(self.x_data, timestamps)
+        selected = set(select_indices(xs, self.y_data, threshold, method))
+        if keep_row and len(selected) < len(self.y_data):
+            selected.update(
+                index for index, (x, y) in enumerate(zip(xs, self.y_data))
+                if index not in selected and keep_row({"temporal": x, "quantity": y})
+            )
+        if len(selected) < len(self.y_data):
+            numeric = {self.y_name: self.y_data}
+            if timestamps is not None:
+                numeric[self.x_name] = timestamps
+            self.full_data = FullData(
+                columns={self.x_name: self.x_data, self.y_name: self.y_data},
+                numeric=numeric,
+                kept=selected,
+                temporal=frozenset({self.x_name})
+            )
+            indices = sorted(selected)
+            self.x_data = [self.x_data[index] for index in indices]
+            self.y_data = array('d', (self.y_data[index] for index in indices))
+        return len(self.y_data)
+
@@ -1,5 +1,6 @@
 from typing import Dict, List
 from .BaseNonGroupNode import BaseNonGroupNode
+from ..FloatColumn import to_float_column, zeros, pad_column, is_numeric_sequence
 
 
 class PieChartNode(BaseNonGroupNode):
@@ -56,11 +57,8 @@ class PieChartNode(BaseNonGroupNode):
         # 将x_data转换为字符串列表
         self.x_data = [str(x) for x in x_data_raw] if isinstance(x_data_raw, list) else []
         
-        # 将y_data转换为浮点数列表
-        if isinstance(y_data_raw, list):
-            self.y_data = [float(y) if isinstance(y, (int, float)) else 0.0 for y in y_data_raw]
-        else:
-            self.y_data = []
+        # 将y_data批量转换为浮点数列
+        self.y_data = to_float_column(y_data_raw) if isinstance(y_data_raw, list) else zeros(0)
         
         # 确保x_data和y_data长度一致
         target_length = max(len(self.x_data), len(self.y_data))
@@ -73,13 +71,8 @@ class PieChartNode(BaseNonGroupNode):
             # 截取x_data
             self.x_data = self.x_data[:target_length]
         
-        # 调整y_data长度
-        if len(self.y_data) < target_length:
-            # 用0.0补充y_data
-            self.y_data.extend([0.0] * (target_length - len(self.y_data)))
-        elif len(self.y_data) > target_length and target_length > 0:
-            # 截取y_data
-            self.y_data = self.y_data[:target_length]
+        # 调整y_data长度，用0.0补充
+        pad_column(self.y_data, target_length)
     
     def validate(self) -> bool:
         """
@@ -103,7 +96,7 @@ class PieChartNode(BaseNonGroupNode):
             return False
         
         # 检查y_data的元素是否全部是数值且为正数
-        if not all(isinstance(y, (int, float)) and y >= 0 for y in self.y_data):
+        if not is_numeric_sequence(self.y_data) or min(self.y_data) < 0:
             return False
         
         return True
@@ -132,12 +125,9 @@ class PieChartNode(BaseNonGroupNode):
             # 转换x_data为字符串数组
             x_str_data = [str(x) for x in x_data]
             # 转换y_data为浮点数数组并检查是否为正数
-            y_float_data = []
-            for y in y_data:
-                y_float = float(y)
-                if y_float < 0:
-                    return False
-                y_float_data.append(y_float)
+            y_float_data = to_float_column(y_data, strict=True)
+            if min(y_float_data) < 0:
+                return False
             
             # 设置数据
             self.x_data = x_str_data
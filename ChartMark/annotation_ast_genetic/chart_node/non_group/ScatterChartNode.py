@@ -1,5 +1,10 @@
-from typing import Dict, List
+from typing import Dict, List, Optional
+from array import array
 from .BaseNonGroupNode import BaseNonGroupNode
+from ..FloatColumn import to_float_column, zeros, pad_column, is_numeric_sequence
+from ..DensityBinner import DensityGrid, grid_cells, extreme_indices
+from ..SummaryResolver import FullData
+from ..Downsampler import RowPredicate
 
 
 class ScatterChartNode(BaseNonGroupNode):
@@ -62,36 +67,20 @@ class ScatterChartNode(BaseNonGroupNode):
         x_data_raw = chart_obj.get("x_data", [])
         y_data_raw = chart_obj.get("y_data", [])
         
-        # 将x_data转换为浮点数列表
-        if isinstance(x_data_raw, list):
-            self.x_data = [float(x) if isinstance(x, (int, float)) else 0.0 for x in x_data_raw]
-        else:
-            self.x_data = []
+        # 将x_data批量转换为浮点数列
+        self.x_data = to_float_column(x_data_raw) if isinstance(x_data_raw, list) else zeros(0)
         
-        # 将y_data转换为浮点数列表
-        if isinstance(y_data_raw, list):
-            self.y_data = [float(y) if isinstance(y, (int, float)) else 0.0 for y in y_data_raw]
-        else:
-            self.y_data = []
+        # 将y_data批量转换为浮点数列
+        self.y_data = to_float_column(y_data_raw) if isinstance(y_data_raw, list) else zeros(0)
         
         # 确保x_data和y_data长度一致
         target_length = max(len(self.x_data), len(self.y_data))
         
-        # 调整x_data长度
-        if len(self.x_data) < target_length:
-            # 用0.0补充x_data
-            self.x_data.extend([0.0] * (target_length - len(self.x_data)))
-        elif len(self.x_data) > target_length and target_length > 0:
-            # 截取x_data
-            self.x_data = self.x_data[:target_length]
+        # 调整x_data长度，用0.0补充
+        pad_column(self.x_data, target_length)
         
-        # 调整y_data长度
-        if len(self.y_data) < target_length:
-            # 用0.0补充y_data
-            self.y_data.extend([0.0] * (target_length - len(self.y_data)))
-        elif len(self.y_data) > target_length and target_length > 0:
-            # 截取y_data
-            self.y_data = self.y_data[:target_length]
+        # 调整y_data长度，用0.0补充
+        pad_column(self.y_data, target_length)
     
     def validate(self) -> bool:
         """
@@ -111,11 +100,11 @@ class ScatterChartNode(BaseNonGroupNode):
             return False
         
         # 检查x_data的元素是否全部是数值
-        if not all(isinstance(x, (int, float)) for x in self.x_data):
+        if not is_numeric_sequence(self.x_data):
             return False
         
         # 检查y_data的元素是否全部是数值
-        if not all(isinstance(y, (int, float)) for y in self.y_data):
+        if not is_numeric_sequence(self.y_data):
             return False
         
         return True
@@ -142,9 +131,9 @@ class ScatterChartNode(BaseNonGroupNode):
         # 检查是否全部是预期类型
         try:
             # 转换x_data为浮点数数组
-            x_float_data = [float(x) for x in x_data]
+            x_float_data = to_float_column(x_data, strict=True)
             # 转换y_data为浮点数数组
-            y_float_data = [float(y) for y in y_data]
+            y_float_data = to_float_column(y_data, strict=True)
             
             # 设置数据
             self.x_data = x_float_data
@@ -153,3 +142,44 @@ class ScatterChartNode(BaseNonGroupNode):
             return True
         except (ValueError, TypeError):
             return False
+    
+    def bin_density(self, bins: int, keep_row: Optional[RowPredicate] = None) -> Optional[DensityGrid]:
+        """
+        把点划分到bins x bins的网格中统计点数，数据只保留需要精确显示的点，在生成规范之前调用
+        点数不超过格子数时不做处理
+        
+        参数:
+            bins: 每个轴上的格子数
+            keep_row: 行判定函数，参数为{"x_quantity": x值, "y_quantity": y值}，
+                判定为True的点（如被注释选中的点）保留在data.values中；x、y的极值点总会保留
+                
+        返回:
+            分箱结果，其中的full为分箱前的完整数据；未分箱时返回None
+            
+        异常:
+            ValueError: bins不是正数
+        """
+        if bins <= 0:
+            raise ValueError("分箱的格子数必须是正数")
+        if len(self.x_data) <= bins * bins or len(self.x_data) != len(self.y_data):
+            return None
+        
+        columns = {self.x_name: self.x_data, self.y_name: self.y_data}
+        grid = DensityGrid(
+            x_name=self.x_name,
+            y_name=self.y_name,
+            cells=grid_cells(self.x_data, self.y_data, bins),
+            point_count=len(self.x_data)
+        )
+        kept = set(extreme_indices(self.x_data, self.y_data))
+        if keep_row:
+            kept.update(
+                index for index, (x, y) in enumerate(zip(self.x_data, self.y_data))
+                if keep_row({"x_quantity": x, "y_quantity": y})
+            )
+        indices = sorted(kept)
+        self.x_data = array('d', (self.x_data[index] for index in indices))
+        self.y_data = array('d', (self.y_data[index] for index in indices))
+        grid.kept_count = len(indices)
+        grid.full = FullData(columns=columns, numeric=columns, kept=kept)
+        return grid
@@ -1,6 +1,7 @@
 from typing import Dict, Optional, Literal
 from ChartMark.annotation_ast_genetic.ast_base import BaseNode
 from .filter_node.FilterNode import ChartType
+from .filter_node.LogicalExpression import RowEvaluator
 
 TargetType = Literal["data_items", "coordinate", "chart_element", "annotation"]
 
@@ -40,6 +41,22 @@ class BaseTargetNode(BaseNode):
         """将节点转换为字典格式，由子类实现"""
         return {"type": self.type}
     
+    def match_row(self, row: Dict) -> Optional[bool]:
+        """
+        判断一行数据是否被该目标选中，用于降采样等服务端数据缩减时保留注释涉及的行
+        
+        参数:
+            row: 轴类型到值的字典，见LogicalExpression.RowValues
+            
+        返回:
+            True表示选中，False表示未选中，None表示无法确定；默认目标不选中具体的数据行
+        """
+        return self.row_evaluator()(row)
+    
+    def row_evaluator(self) -> RowEvaluator:
+        """返回与match_row等价的求值函数，对大量数据行求值时避免逐行重复解析目标，由子类实现"""
+        return lambda row: False
+    
     # @classmethod
     # def create(cls, target_obj: Dict, chart_type: Optional[ChartType] = None) -> 'TargetNode':
     #     """
@@ -1,6 +1,7 @@
-from typing import Dict, Optional, Literal
+from typing import Dict, Optional, Literal, Any, Callable
 from .BaseTargetNode import BaseTargetNode, TargetType
 from .filter_node.FilterNode import ChartType
+from .filter_node.LogicalExpression import TEMPORAL_TOLERANCE, RowEvaluator, interval_evaluator, compile_all
 from dataclasses import dataclass
 
 # ===== 坐标 (coordinate) 结构 =====
@@ -29,6 +30,15 @@ class CoordinateTarget:
 
 
 
+# 各图表类型笛卡尔坐标x、y对应的轴类型
+COORDINATE_AXES = {
+    "line": ("temporal", "quantity"),
+    "group_line": ("temporal", "quantity"),
+    "scatter": ("x_quantity", "y_quantity"),
+    "group_scatter": ("x_quantity", "y_quantity"),
+}
+
+
 class CoordinateTargetNode(BaseTargetNode):
     """坐标目标节点"""
     TARGET_TYPE: TargetType = "coordinate"
@@ -58,6 +68,36 @@ class CoordinateTargetNode(BaseTargetNode):
                 # 非饼图必须提供笛卡尔坐标
                 raise ValueError(f"{self.chart_type or '未知'}图表目标必须提供xyCoordinate")
     
+    def row_evaluator(self) -> RowEvaluator:
+        """
+        返回判断一行数据是否位于坐标范围(x, x1)和/或(y, y1)内的求值函数，两者都有时需同时满足
+        只有单个坐标值（如参考线）时不选中任何行；时间轴上的坐标值可以是DateTime对象、日期字符串或毫秒时间戳
+        """
+        if not self.xyCoordinate or self.chart_type not in COORDINATE_AXES:
+            return lambda row: False
+        
+        evaluators = []
+        for axis, (start_key, end_key) in zip(COORDINATE_AXES[self.chart_type], (("x", "x1"), ("y", "y1"))):
+            if start_key not in self.xyCoordinate or end_key not in self.xyCoordinate:
+                continue
+            if axis == "temporal":
+                from ChartMark.annotation_ast_genetic.chart_node.DateNormalizer import temporal_to_seconds
+                convert: Callable[[Any], Optional[float]] = temporal_to_seconds
+                tolerance = TEMPORAL_TOLERANCE
+            else:
+                convert = lambda bound: bound if isinstance(bound, (int, float)) else None
+                tolerance = 0.0
+            start = convert(self.xyCoordinate[start_key])
+            end = convert(self.xyCoordinate[end_key])
+            if start is None or end is None:
+                evaluators.append(interval_evaluator(axis, tolerance=tolerance, unknown=True))
+            else:
+                evaluators.append(interval_evaluator(axis, min(start, end), max(start, end), tolerance=tolerance))
+        
+        if not evaluators:
+            return lambda row: False
+        return compile_all(evaluators)
+    
     def to_dict(self) -> Dict:
         """将节点转换为字典格式"""
         result = super().to_dict()
@@ -1,6 +1,7 @@
 from typing import Dict, Optional, Literal
 from ChartMark.annotation_ast_genetic.target_node.BaseTargetNode import BaseTargetNode, TargetType
 from ChartMark.annotation_ast_genetic.target_node.filter_node.FilterNode import ChartType, FilterNode, FilterCondition
+from ChartMark.annotation_ast_genetic.target_node.filter_node.LogicalExpression import RowEvaluator
 from dataclasses import dataclass, field
 from ChartMark.vegalite_ast.ChartNode import ChartFieldInfo
 
@@ -41,6 +42,15 @@ class DataItemsTargetNode(BaseTargetNode):
             return self.filter_node.to_vegalite_filter(chart_field_info)
         return {}
     
+    def row_evaluator(self) -> RowEvaluator:
+        """
+        返回判断一行数据是否满足过滤条件的求值函数
+        没有过滤条件的目标表示全部数据（如整体的汇总），不视为选中具体的行
+        """
+        if not self.filter_node:
+            return lambda row: False
+        return self.filter_node.compile()
+    
     def to_dict(self) -> Dict:
         """将节点转换为字典格式"""
         result = super().to_dict()
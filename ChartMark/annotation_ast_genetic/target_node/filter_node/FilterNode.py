@@ -1,6 +1,6 @@
 from typing import Dict, Optional, List
 from ChartMark.annotation_ast_genetic.ast_base import BaseNode
-from .LogicalExpression import LogicalExpression, ChartType, CategoryFilter, QuantityFilter, GroupFilter, TemporalFilter, FilterItem
+from .LogicalExpression import LogicalExpression, RowEvaluator, ChartType, CategoryFilter, QuantityFilter, GroupFilter, TemporalFilter, FilterItem
 from dataclasses import dataclass, field
 from ChartMark.vegalite_ast.ChartNode import ChartFieldInfo
 
@@ -119,6 +119,21 @@ class FilterNode(BaseNode):
         return self.logic_expr.to_vegalite_filter(chart_field_info)
     
     
+    def evaluate(self, row: Dict) -> Optional[bool]:
+        """对一行数据求值，见LogicalExpression.evaluate，没有过滤条件时返回True"""
+        return self.compile()(row)
+    
+    def axis_types(self) -> set:
+        """返回过滤条件引用的轴类型"""
+        return self.logic_expr.axis_types() if self.logic_expr else set()
+    
+    def compile(self) -> RowEvaluator:
+        """编译为求值函数，见LogicalExpression.compile"""
+        if not self.logic_expr:
+            return lambda row: True
+        
+        return self.logic_expr.compile()
+    
     def validate(self) -> bool:
         """验证过滤条件的有效性"""
         if not self.logic_expr:
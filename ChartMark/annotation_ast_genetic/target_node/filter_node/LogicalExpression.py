@@ -1,4 +1,5 @@
-from typing import Dict, List, Literal, Optional, Union, Any
+import math
+from typing import Dict, List, Literal, Optional, Union, Any, Callable
 from dataclasses import dataclass, field
 from ChartMark.vegalite_ast.ChartNode import ChartFieldInfo
 
@@ -11,6 +12,18 @@ ChartType = Literal["line", "bar", "scatter", "pie", "group_bar", "group_line",
 # ===== 逻辑运算符 =====
 LogicOperator = Literal["and", "or", "not"]
 
+# ===== 行值 =====
+# evaluate使用的一行数据：轴类型到值的字典，temporal为Unix时间戳（秒），
+# 如{"temporal": 1577836800.0, "quantity": 12.5, "group": "A"}
+RowValues = Dict[str, Any]
+
+# 一行数据的求值函数，返回值与LogicalExpression.evaluate相同
+RowEvaluator = Callable[[RowValues], Optional[bool]]
+
+# 时间比较的容差（秒）：注释中的DateTime按本地时间解释，数据中的日期按UTC解释，
+# 相差不超过一天的比较结果视为无法确定
+TEMPORAL_TOLERANCE = 86400.0
+
 @dataclass
 class CategoryFilter:
     """分类轴过滤条件"""
@@ -315,6 +328,52 @@ class LogicalExpression:
         # 否则返回带有操作符的表达式
         return {self.operator: operands_expr}
     
+    def evaluate(self, row: RowValues) -> Optional[bool]:
+        """
+        在Python中对一行数据求值，与to_vegalite_filter生成的VegaLite过滤条件语义一致，
+        用于在服务端判断哪些数据行会被注释选中
+        
+        参数:
+            row: 轴类型到值的字典，见RowValues
+            
+        返回:
+            True表示选中，False表示未选中，None表示无法确定（缺少对应的轴、时间值无法解析或处于容差内）
+        """
+        return self.compile()(row)
+    
+    def axis_types(self) -> set:
+        """返回表达式中所有过滤条件项引用的轴类型"""
+        axis_types = set()
+        for operand in self.operands:
+            if isinstance(operand, LogicalExpression):
+                axis_types |= operand.axis_types()
+            else:
+                axis_types.add(operand.axisType)
+        return axis_types
+    
+    def compile(self) -> RowEvaluator:
+        """
+        把表达式编译为求值函数，边界值（如DateTime对象）只转换一次，结果缓存在实例上，
+        对大量数据行求值时应使用该函数而不是逐行调用evaluate
+        
+        返回:
+            参数为一行数据、返回值与evaluate相同的函数
+        """
+        compiled = self.__dict__.get("_compiled")
+        if compiled is None:
+            evaluators = [
+                operand.compile() if isinstance(operand, LogicalExpression) else _compile_filter_item(operand)
+                for operand in self.operands
+            ]
+            if self.operator == "or":
+                compiled = compile_any(evaluators)
+            else:
+                compiled = compile_all(evaluators)
+                if self.operator == "not":
+                    compiled = compile_not(compiled)
+            self._compiled = compiled
+        return compiled
+    
     def _get_field_name_for_axis_type(self, axis_type: AxisType, chart_field_info: ChartFieldInfo) -> Optional[str]:
         """
         根据轴类型获取对应的字段名
@@ -348,3 +407,122 @@ class LogicalExpression:
                 return chart_field_info.y_quantity_name
         
         return None
+
+
+
+def compile_all(evaluators: List[RowEvaluator]) -> RowEvaluator:
+    """三值逻辑的与：有False则为False，全部为True则为True，否则无法确定"""
+    if len(evaluators) == 1:
+        return evaluators[0]
+    
+    def evaluate(row: RowValues) -> Optional[bool]:
+        result = True
+        for evaluator in evaluators:
+            value = evaluator(row)
+            if value is False:
+                return False
+            if value is None:
+                result = None
+        return result
+    return evaluate
+
+
+def compile_any(evaluators: List[RowEvaluator]) -> RowEvaluator:
+    """三值逻辑的或：有True则为True，全部为False则为False，否则无法确定"""
+    if len(evaluators) == 1:
+        return evaluators[0]
+    
+    def evaluate(row: RowValues) -> Optional[bool]:
+        result = False
+        for evaluator in evaluators:
+            value = evaluator(row)
+            if value is True:
+                return True
+            if value is None:
+                result = None
+        return result
+    return evaluate
+
+
+def compile_not(evaluator: RowEvaluator) -> RowEvaluator:
+    """三值逻辑的非：无法确定时仍为无法确定"""
+    def evaluate(row: RowValues) -> Optional[bool]:
+        value = evaluator(row)
+        return None if value is None else not value
+    return evaluate
+
+
+def interval_evaluator(axis: str, low: float = -math.inf, high: float = math.inf,
+                       low_strict: bool = False, high_strict: bool = False,
+                       tolerance: float = 0.0, unknown: bool = False) -> RowEvaluator:
+    """
+    生成判断一行数据在某个轴上是否落在区间内的求值函数
+    
+    参数:
+        axis: 轴类型，即行字典的键
+        low, high: 区间的下界和上界
+        low_strict, high_strict: 是否为开区间（gt、lt）
+        tolerance: 容差，值与边界的差不超过容差时无法确定
+        unknown: 是否还有无法转换的边界，为True时区间内的值也无法确定
+        
+    返回:
+        求值函数，缺少对应的轴时返回None
+    """
+    def evaluate(row: RowValues) -> Optional[bool]:
+        value = row.get(axis)
+        if value is None:
+            return None
+        if value < low - tolerance or value > high + tolerance:
+            return False
+        if tolerance == 0:
+            if (low_strict and value == low) or (high_strict and value == high):
+                return False
+        elif value <= low + tolerance or value >= high - tolerance:
+            return None
+        return None if unknown else True
+    return evaluate
+
+
+def _compile_filter_item(item: FilterItem) -> RowEvaluator:
+    """把单个过滤条件项编译为求值函数，各条件合并为一个区间"""
+    axis = item.axisType
+    if isinstance(item, (CategoryFilter, GroupFilter)):
+        choices = item.oneOf
+        
+        def evaluate(row: RowValues) -> Optional[bool]:
+            value = row.get(axis)
+            return None if value is None else value in choices
+        return evaluate
+    
+    if isinstance(item, TemporalFilter):
+        from ChartMark.annotation_ast_genetic.chart_node.DateNormalizer import temporal_to_seconds
+        convert = temporal_to_seconds
+        tolerance = TEMPORAL_TOLERANCE
+    else:
+        convert = lambda bound: bound if isinstance(bound, (int, float)) else None
+        tolerance = 0.0
+    
+    lower = [(item.gt, True), (item.gte, False), (item.equal, False)]
+    upper = [(item.lt, True), (item.lte, False), (item.equal, False)]
+    if item.range is not None:
+        lower.append((item.range[0], False))
+        upper.append((item.range[1], False))
+    
+    low, low_strict, high, high_strict, unknown = -math.inf, False, math.inf, False, False
+    for bound, strict in lower:
+        if bound is None:
+            continue
+        value = convert(bound)
+        if value is None:
+            unknown = True
+        elif value > low or (value == low and strict):
+            low, low_strict = value, strict
+    for bound, strict in upper:
+        if bound is None:
+            continue
+        value = convert(bound)
+        if value is None:
+            unknown = True
+        elif value < high or (value == high and strict):
+            high, high_strict = value, strict
+    return interval_evaluator(axis, low, high, low_strict, high_strict, tolerance, unknown)
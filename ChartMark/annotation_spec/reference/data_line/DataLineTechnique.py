@@ -7,6 +7,7 @@ from ChartMark.vegalite_ast.EncodingNode import Encoding
 from ChartMark.vegalite_ast.LayerItemNode import LayerItem
 from ChartMark.annotation_ast_genetic.chart_node.BaseChartNode import ChartType
 from ChartMark.vegalite_ast.TransformNode import Transform
+from ChartMark import diagnostics
 
 class DataLineTechnique(BaseTechnique):
     """
@@ -188,8 +189,7 @@ class DataLineTechnique(BaseTechnique):
             "x": original_vegalite_node.get_x_or_y_axis_info_obj("x"),
             "y": original_vegalite_node.get_x_or_y_axis_info_obj("y"),
         }
-        print("---------------1-----------------")
-        print(encoding_init_x_y)
+        diagnostics.debug("数据线初始encoding: %s", encoding_init_x_y)
         encoding = Encoding.from_dict(encoding_init_x_y)
         if rule_type == "y":
             encoding.set_value("x2", 0)
@@ -1,4 +1,5 @@
 from ChartMark.annotation_ast_genetic.annotation_node.BaseAnnotationNode import BaseAnnotationNode
+from ChartMark import diagnostics
 from ChartMark.annotation_ast_genetic.method_node.EncodingMethodNode import EncodingMethodNode
 from ChartMark.annotation_ast_genetic.data_node.SimpleDataNode import SimpleDataNode
 from ChartMark.annotation_ast_genetic.technique_node.BaseTechnique import BaseTechnique
@@ -154,14 +155,15 @@ class BaseTrend(BaseAnnotationNode):
         for technique in self.techniques:
             try:
                 # 调用技术实例的parse_to_vegalite方法
-                vegalite_dict = technique.parse_to_vegalite(current_chart, chart_type)
+                vegalite_dict = self._apply_technique(technique, current_chart, chart_type)
                 
                 # 使用处理后的字典创建新的Chart实例作为下一个技术的输入
-                current_chart = Chart(vegalite_dict)
+                current_chart = self._build_chart(vegalite_dict)
             except Exception as e:
                 # 记录错误但继续处理其他技术
-                print(f"应用技术 {technique.name} 时出错: {str(e)}")
+                self._report_technique_error(technique, e)
         
         # 返回最终处理结果的字典表示
-        print(current_chart.to_dict())
-        return current_chart.to_dict()
+        result = current_chart.to_dict()
+        diagnostics.debug("趋势注释处理结果: %s", result)
+        return result
@@ -0,0 +1,207 @@
+import asyncio
+import contextvars
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Dict, Any, Optional, List, Union, Iterable, AsyncIterable, Literal
+
+from ChartMark.api import batch
+from ChartMark.api.service import ChartMark
+
+# 执行器类型: 线程池或进程池
+ExecutorKind = Literal["thread", "process"]
+
+
+def _render_in_worker(service_options: Dict[str, Any], method_name: str, data: Dict[str, Any]) -> Any:
+    """
+    在工作进程中调用ChartMark的渲染方法
+    工作进程没有经过初始化（例如使用外部传入的进程池）时，按service_options创建ChartMark实例
+    """
+    if batch._worker_service is None:
+        batch._init_worker(service_options)
+    return getattr(batch._worker_service, method_name)(data)
+
+
+class AsyncChartMark:
+    """
+    ChartMark的asyncio封装，渲染计算在线程池或进程池中执行，不会阻塞事件循环
+
+    同时在执行器中运行的渲染数不超过max_in_flight，达到上限时新的调用会等待，
+    render_many也会暂停读取输入，从而对上游形成背压
+
+    使用示例:
+    ```python
+    async with AsyncChartMark(executor="process", max_workers=4) as chart_mark:
+        vegalite_spec = await chart_mark.render_annotations(chart_data)
+        vegalite_specs = await chart_mark.render_many(chart_data_list)
+    ```
+    """
+
+    def __init__(self, service: Optional[ChartMark] = None,
+                 executor: Union[ExecutorKind, Executor] = "thread",
+                 max_workers: Optional[int] = None, max_in_flight: Optional[int] = None):
+        """
+        初始化异步图表服务
+
+        参数:
+            service: 被封装的ChartMark实例，为None时使用默认配置创建。
+                使用进程池时，工作进程按service.get_service_options()创建各自的实例
+            executor: "thread"、"process"或一个已有的Executor实例。
+                线程池适合渲染量不大、只需要不阻塞事件循环的场景；进程池可以利用多核并行渲染。
+                传入的Executor实例由调用方负责关闭
+            max_workers: 自建执行器的工作线程/进程数，为None时使用CPU核数
+            max_in_flight: 同时提交到执行器的最大渲染数，为None时为工作数的2倍
+
+        异常:
+            ValueError: 参数无效
+        """
+        self.service = service if service is not None else ChartMark()
+
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 1:
+            raise ValueError("max_workers必须大于等于1")
+
+        if max_in_flight is None:
+            max_in_flight = max_workers * 2
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight必须大于等于1")
+
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+
+        if isinstance(executor, Executor):
+            self.executor = executor
+            self._owns_executor = False
+        elif executor == "thread":
+            self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="chartmark")
+            self._owns_executor = True
+        elif executor == "process":
+            self.executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=batch._init_worker,
+                initargs=(self.service.get_service_options(),)
+            )
+            self._owns_executor = True
+        else:
+            raise ValueError(f"不支持的执行器类型: {executor}")
+
+        self._use_processes = isinstance(self.executor, ProcessPoolExecutor)
+        # 信号量在首次使用时创建，绑定到当时运行的事件循环
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """获取当前事件循环的在途渲染信号量"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _run_in_executor(self, method_name: str, data: Dict[str, Any]) -> Any:
+        """在执行器中执行渲染方法"""
+        loop = asyncio.get_running_loop()
+        if self._use_processes:
+            return await loop.run_in_executor(
+                self.executor, _render_in_worker, self.service.get_service_options(), method_name, data
+            )
+        # 在调用方上下文的副本中执行，使诊断收集器等基于contextvars的状态在工作线程中同样生效
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self.executor, context.run, getattr(self.service, method_name), data)
+
+    async def _render(self, method_name: str, data: Dict[str, Any]) -> Any:
+        """等待在途渲染数低于上限后执行渲染"""
+        async with self._get_semaphore():
+            return await self._run_in_executor(method_name, data)
+
+    async def render_original_chart(self, data: Dict[str, Any]) -> str:
+        """
+        异步渲染原始图表，参数和返回值同ChartMark.render_original_chart
+        """
+        return await self._render("render_original_chart", data)
+
+    async def render_annotations(self, data: Dict[str, Any]) -> str:
+        """
+        异步渲染带注释的图表，参数和返回值同ChartMark.render_annotations
+        """
+        return await self._render("render_annotations", data)
+
+    async def render_annotations_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        异步渲染带注释的图表并返回字典，参数和返回值同ChartMark.render_annotations_dict
+        """
+        return await self._render("render_annotations_dict", data)
+
+    async def render_many(self, specs: Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]],
+                          with_annotations: bool = True, as_dict: bool = False,
+                          return_exceptions: bool = False) -> List[Any]:
+        """
+        并发渲染多个ChartMark规范，结果顺序与输入顺序一致
+        在途渲染数达到max_in_flight时暂停读取输入
+
+        参数:
+            specs: ChartMark规范的同步或异步可迭代对象
+            with_annotations: 是否处理注释
+            as_dict: 是否返回字典而不是JSON字符串
+            return_exceptions: 为True时失败的规范以异常对象的形式出现在结果中，
+                为False时第一个异常会直接抛出（语义同asyncio.gather）
+
+        返回:
+            渲染结果列表
+        """
+        if with_annotations:
+            method_name = "render_annotations_dict" if as_dict else "render_annotations"
+        else:
+            method_name = "render_original_chart_dict" if as_dict else "render_original_chart"
+
+        semaphore = self._get_semaphore()
+        loop = asyncio.get_running_loop()
+        tasks = []
+
+        async def submit(data: Dict[str, Any]) -> None:
+            await semaphore.acquire()
+            task = loop.create_task(self._run_in_executor(method_name, data))
+            # 任务完成、失败或被取消时都会释放信号量
+            task.add_done_callback(lambda _: semaphore.release())
+            tasks.append(task)
+
+        try:
+            if hasattr(specs, "__aiter__"):
+                async for data in specs:
+                    await submit(data)
+            else:
+                for data in specs:
+                    await submit(data)
+        except BaseException:
+            # 读取输入出错或被取消时，取消已提交但尚未完成的渲染
+            for task in tasks:
+                task.cancel()
+            raise
+
+        return await asyncio.gather(*tasks, return_exceptions=return_exceptions)
+
+    def close(self, wait: bool = True) -> None:
+        """
+        关闭自建的执行器，外部传入的执行器不会被关闭
+
+        参数:
+            wait: 是否等待正在执行的渲染完成
+        """
+        if self._owns_executor:
+            self.executor.shutdown(wait=wait)
+
+    async def aclose(self, wait: bool = True) -> None:
+        """
+        在默认线程池中关闭自建的执行器，等待渲染完成时不会阻塞事件循环
+
+        参数:
+            wait: 是否等待正在执行的渲染完成
+        """
+        if self._owns_executor:
+            await asyncio.to_thread(self.close, wait)
+
+    async def __aenter__(self) -> "AsyncChartMark":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
@@ -0,0 +1,294 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Tuple, Literal
+
+from ChartMark.version import __version__
+from ChartMark.api.memory import SpecMemoryProfile, profile_memory
+from ChartMark.diagnostics import collect_diagnostics
+
+# 批处理任务: (文件名, 输入路径, 输出路径, 是否处理注释)
+BatchTask = Tuple[str, str, str, bool]
+
+# 单个文件的处理状态
+BatchStatus = Literal["success", "failed"]
+
+
+@dataclass
+class BatchFileResult:
+    """
+    批处理中单个文件的处理结果
+    """
+    filename: str
+    input_path: str
+    output_path: str
+    status: BatchStatus
+    error: Optional[str] = None
+    elapsed: float = 0.0  # 处理耗时（秒）
+    memory: Optional[SpecMemoryProfile] = None  # 启用profile_memory时的内存测量结果
+    warnings: List[Dict[str, Any]] = field(default_factory=list)  # 渲染中的诊断信息，见ChartMark.diagnostics
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "success"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "input_path": self.input_path,
+            "output_path": self.output_path,
+            "status": self.status,
+            "error": self.error,
+            "elapsed": self.elapsed,
+            "memory": self.memory.to_dict() if self.memory is not None else None,
+            "warnings": self.warnings
+        }
+
+
+def collect_batch_tasks(input_dir: str, output_dir: str, with_annotations: bool = False) -> List[BatchTask]:
+    """
+    收集目录中所有JSON文件的批处理任务，按文件名排序以保证结果顺序确定
+
+    参数:
+        input_dir: 输入目录路径
+        output_dir: 输出目录路径
+        with_annotations: 是否处理注释
+
+    返回:
+        批处理任务列表
+    """
+    tasks = []
+    for filename in sorted(os.listdir(input_dir)):
+        if filename.endswith('.json'):
+            input_path = os.path.join(input_dir, filename)
+            output_path = os.path.join(output_dir, filename.replace('.json', '.vl.json'))
+            tasks.append((filename, input_path, output_path, with_annotations))
+    return tasks
+
+
+def process_batch_task(service, task: BatchTask) -> BatchFileResult:
+    """
+    使用给定的ChartMark实例处理单个批处理任务，异常会记录在结果中而不会抛出
+
+    参数:
+        service: ChartMark实例
+        task: 批处理任务
+
+    返回:
+        处理结果
+    """
+    filename, input_path, output_path, with_annotations = task
+    start = time.perf_counter()
+    # 诊断信息收集到结果中，不写入标准输出
+    with collect_diagnostics() as collector:
+        try:
+            memory = None
+            if getattr(service, "profile_memory", False):
+                memory = profile_memory(filename, lambda: service.process_file(
+                    input_path, output_path, with_annotations=with_annotations))
+            else:
+                service.process_file(input_path, output_path, with_annotations=with_annotations)
+            return BatchFileResult(filename, input_path, output_path, "success",
+                                   elapsed=time.perf_counter() - start, memory=memory,
+                                   warnings=collector.to_list())
+        except Exception as e:
+            return BatchFileResult(filename, input_path, output_path, "failed", error=str(e),
+                                   elapsed=time.perf_counter() - start, warnings=collector.to_list())
+
+
+# 每个工作进程持有一个ChartMark实例，由_init_worker创建
+_worker_service = None
+
+
+def _init_worker(service_options: Dict[str, Any]) -> None:
+    """工作进程初始化，创建进程内的ChartMark实例"""
+    global _worker_service
+    from ChartMark.api.service import ChartMark
+    _worker_service = ChartMark(**service_options)
+
+
+def _process_batch_task_in_worker(task: BatchTask) -> BatchFileResult:
+    """在工作进程中处理单个批处理任务"""
+    return process_batch_task(_worker_service, task)
+
+
+def run_batch_tasks(service, tasks: List[BatchTask], workers: Optional[int] = None, chunksize: int = 1) -> List[BatchFileResult]:
+    """
+    执行批处理任务，workers大于1时使用进程池并行处理
+    结果顺序与tasks顺序一致
+
+    参数:
+        service: ChartMark实例，串行处理时直接使用，并行处理时用于获取工作进程的配置
+        tasks: 批处理任务列表
+        workers: 工作进程数，为None时使用CPU核数
+        chunksize: 每次分发给工作进程的任务数
+
+    返回:
+        处理结果列表
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError("workers必须大于等于1")
+    if chunksize < 1:
+        raise ValueError("chunksize必须大于等于1")
+
+    # 单进程或任务很少时不启动进程池
+    if workers == 1 or len(tasks) <= 1:
+        results = [process_batch_task(service, task) for task in tasks]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(tasks)),
+            initializer=_init_worker,
+            initargs=(service.get_service_options(),)
+        ) as executor:
+            # executor.map按提交顺序返回结果
+            results = list(executor.map(_process_batch_task_in_worker, tasks, chunksize=chunksize))
+
+    # 工作进程中的内存测量结果随BatchFileResult返回，在主进程中汇总
+    memory_report = getattr(service, "memory_report", None)
+    if memory_report is not None:
+        for result in results:
+            if result.memory is not None:
+                memory_report.add(result.memory)
+    return results
+
+
+# ===== 增量构建 =====
+
+# 增量构建清单的默认文件名，保存在输出目录中
+DEFAULT_MANIFEST_NAME = ".chartmark_manifest.json"
+
+
+@dataclass
+class IncrementalBatchResult:
+    """
+    增量批处理结果
+    """
+    results: List[BatchFileResult] = field(default_factory=list)  # 本次重新渲染的文件
+    skipped: List[str] = field(default_factory=list)  # 输出已是最新而跳过的文件名
+    stale: List[str] = field(default_factory=list)  # 输入已被删除的过期输出路径
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "results": [result.to_dict() for result in self.results],
+            "skipped": self.skipped,
+            "stale": self.stale
+        }
+
+
+def hash_file(file_path: str) -> str:
+    """计算文件内容的sha256"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Any]:
+    """
+    读取增量构建清单，文件不存在或格式错误时返回空清单
+    """
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if isinstance(manifest, dict) and isinstance(manifest.get("files"), dict):
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {}
+
+
+def save_manifest(manifest_path: str, manifest: Dict[str, Any]) -> None:
+    """
+    原子地写入增量构建清单，避免中断时留下损坏的清单
+    """
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def run_incremental_batch(service, input_dir: str, output_dir: str, with_annotations: bool = False,
+                          workers: Optional[int] = 1, chunksize: int = 1,
+                          manifest_name: str = DEFAULT_MANIFEST_NAME,
+                          remove_stale: bool = False) -> IncrementalBatchResult:
+    """
+    增量批处理：根据输出目录中的清单（输入内容哈希、ChartMark版本和渲染选项）
+    只重新渲染新增或内容发生变化的文件
+
+    参数:
+        service: ChartMark实例
+        input_dir: 输入目录路径
+        output_dir: 输出目录路径
+        with_annotations: 是否处理注释
+        workers: 工作进程数，含义同run_batch_tasks
+        chunksize: 每次分发给工作进程的任务数
+        manifest_name: 清单文件名
+        remove_stale: 是否删除输入已不存在的过期输出
+
+    返回:
+        IncrementalBatchResult
+    """
+    manifest_path = os.path.join(output_dir, manifest_name)
+    # 只有影响输出内容的选项参与比较，切换缓存等配置时不应使已有输出失效
+    options = dict(service.get_output_options(), with_annotations=with_annotations)
+
+    previous = load_manifest(manifest_path)
+    # 版本或渲染选项变化时，之前的所有输出都视为无效
+    if previous.get("version") != __version__ or previous.get("options") != options:
+        previous_files = {}
+    else:
+        previous_files = previous["files"]
+
+    result = IncrementalBatchResult()
+    current_files: Dict[str, Dict[str, str]] = {}
+    pending: List[BatchTask] = []
+    pending_hashes: Dict[str, str] = {}
+
+    for task in collect_batch_tasks(input_dir, output_dir, with_annotations=with_annotations):
+        filename, input_path, output_path, _ = task
+        content_hash = hash_file(input_path)
+        entry = previous_files.get(filename)
+        if entry and entry.get("hash") == content_hash and os.path.exists(output_path):
+            result.skipped.append(filename)
+            current_files[filename] = entry
+        else:
+            pending.append(task)
+            pending_hashes[filename] = content_hash
+
+    result.results = run_batch_tasks(service, pending, workers=workers, chunksize=chunksize)
+
+    # 只记录成功的文件，失败的文件下次会重新尝试
+    for file_result in result.results:
+        if file_result.ok:
+            current_files[file_result.filename] = {
+                "hash": pending_hashes[file_result.filename],
+                "output": os.path.basename(file_result.output_path)
+            }
+
+    # 清单中存在但输入已被删除的文件，其输出视为过期
+    for filename, entry in (previous.get("files") or {}).items():
+        if filename in current_files or filename in pending_hashes:
+            continue
+        output_path = os.path.join(output_dir, entry.get("output", ""))
+        if entry.get("output") and os.path.exists(output_path):
+            result.stale.append(output_path)
+            if remove_stale:
+                os.remove(output_path)
+            else:
+                # 保留清单记录，使过期输出在后续运行中仍会被报告
+                current_files[filename] = entry
+
+    save_manifest(manifest_path, {
+        "version": __version__,
+        "options": options,
+        "files": current_files
+    })
+
+    return result
@@ -0,0 +1,382 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Hashable, Callable
+
+from ChartMark.version import __version__
+
+
+def canonical_spec_hash(obj: Any) -> str:
+    """
+    计算规范对象的规范化哈希：键排序、紧凑分隔符的JSON序列化后取sha256
+    键顺序和空白不同但内容相同的规范得到相同的哈希
+
+    参数:
+        obj: 可JSON序列化的对象
+
+    返回:
+        十六进制哈希字符串
+
+    异常:
+        TypeError: 对象无法JSON序列化
+    """
+    canonical = json.dumps(obj, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class LRURenderCache:
+    """
+    进程内的LRU渲染缓存，带容量上限和命中/未命中计数，线程安全
+    """
+    def __init__(self, maxsize: int = 256):
+        if not isinstance(maxsize, int) or maxsize <= 0:
+            raise ValueError("maxsize必须是正整数")
+
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        获取缓存值，命中时将其移到最近使用的位置
+
+        返回:
+            缓存值，未命中时返回None
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        写入缓存值，超出容量时淘汰最久未使用的条目
+        """
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> Dict[str, int]:
+        """
+        获取缓存统计信息
+
+        返回:
+            包含hits、misses、size和maxsize的字典
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize
+            }
+
+
+class SQLiteRenderCache:
+    """
+    持久化的磁盘渲染缓存，使用SQLite存储编译后的VegaLite规范
+    
+    - 键中包含ChartMark版本号，升级后旧条目自然失效
+    - 总字节数超出max_bytes时按最近访问时间淘汰（LRU）
+    - 使用WAL模式和busy_timeout，多个工作进程可以安全地共享同一个缓存文件
+    - 命中时的访问时间先记录在内存中，攒够access_flush_size条或超过access_flush_interval秒后批量写回，
+      读多写少时不会每次命中都产生一次写事务；淘汰顺序因此可能滞后于最近一批命中
+    - 总字节数保存在元数据表中，随写入和淘汰增量更新，写入时不需要对整张表求和
+    """
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024, timeout: float = 30.0,
+                 access_flush_size: int = 64, access_flush_interval: float = 5.0):
+        if not isinstance(max_bytes, int) or max_bytes <= 0:
+            raise ValueError("max_bytes必须是正整数")
+        if not isinstance(access_flush_size, int) or access_flush_size <= 0:
+            raise ValueError("access_flush_size必须是正整数")
+        if access_flush_interval < 0:
+            raise ValueError("access_flush_interval不能为负数")
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.access_flush_size = access_flush_size
+        self.access_flush_interval = access_flush_interval
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 尚未写回的访问时间，键为数据库中的键
+        self._pending_access: Dict[str, float] = {}
+        self._last_flush = time.monotonic()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        # 只有启用磁盘缓存时才需要sqlite3，避免在导入时加载
+        import sqlite3
+        self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self._conn.execute(f"PRAGMA busy_timeout = {int(timeout * 1000)}")
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS render_cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS render_cache_last_access ON render_cache (last_access)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS render_cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+        )
+        # 没有元数据的旧缓存文件只在打开时求和一次
+        self._conn.execute(
+            "INSERT OR IGNORE INTO render_cache_meta (name, value) "
+            "SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM render_cache"
+        )
+
+    @staticmethod
+    def _to_db_key(key: Hashable) -> str:
+        """将缓存键转换为带版本号的字符串键"""
+        parts = key if isinstance(key, tuple) else (key,)
+        return ":".join([__version__] + [str(part) for part in parts])
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """
+        获取缓存值并记录其访问时间，访问时间批量写回
+
+        返回:
+            缓存的规范字符串，未命中时返回None
+        """
+        db_key = self._to_db_key(key)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM render_cache WHERE key = ?", (db_key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._pending_access[db_key] = time.time()
+            if (len(self._pending_access) >= self.access_flush_size
+                    or time.monotonic() - self._last_flush >= self.access_flush_interval):
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._flush_access()
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+            return row[0]
+
+    def put(self, key: Hashable, value: str) -> None:
+        """
+        写入缓存值，超出字节预算时淘汰最久未访问的条目
+        单个值超过预算时不写入
+        """
+        if not isinstance(value, str):
+            raise ValueError("磁盘缓存只能存储字符串")
+
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        db_key = self._to_db_key(key)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 淘汰前先写回访问时间，避免淘汰刚被命中的条目
+                self._flush_access()
+                old = self._conn.execute("SELECT size FROM render_cache WHERE key = ?", (db_key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO render_cache (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                    (db_key, value, size, time.time())
+                )
+                self._add_total(size - (old[0] if old else 0))
+                self._evict()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _flush_access(self) -> None:
+        """在当前事务中写回内存中记录的访问时间，已被淘汰的条目不受影响"""
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE render_cache SET last_access = ? WHERE key = ?",
+                [(last_access, db_key) for db_key, last_access in self._pending_access.items()]
+            )
+            self._pending_access.clear()
+        self._last_flush = time.monotonic()
+
+    def _total_bytes(self) -> int:
+        """读取元数据表中记录的总字节数"""
+        return self._conn.execute("SELECT value FROM render_cache_meta WHERE name = 'total_bytes'").fetchone()[0]
+
+    def _add_total(self, delta: int) -> None:
+        """在当前事务中调整元数据表中的总字节数"""
+        if delta:
+            self._conn.execute(
+                "UPDATE render_cache_meta SET value = value + ? WHERE name = 'total_bytes'", (delta,)
+            )
+
+    def _evict(self) -> None:
+        """在当前事务中淘汰最久未访问的条目，直到总字节数不超过预算"""
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+
+        # 按访问时间顺序逐行读取，达到预算即停止，不会一次加载全部条目
+        cursor = self._conn.execute("SELECT key, size FROM render_cache ORDER BY last_access ASC")
+        evict_keys = []
+        freed = 0
+        for db_key, size in cursor:
+            if total - freed <= self.max_bytes:
+                break
+            evict_keys.append((db_key,))
+            freed += size
+        cursor.close()
+        self._conn.executemany("DELETE FROM render_cache WHERE key = ?", evict_keys)
+        self._add_total(-freed)
+
+    def flush(self) -> None:
+        """立即写回内存中记录的访问时间"""
+        with self._lock:
+            if not self._pending_access:
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._flush_access()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def clear(self) -> None:
+        """清空缓存并重置计数"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM render_cache")
+                self._conn.execute("UPDATE render_cache_meta SET value = 0 WHERE name = 'total_bytes'")
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._pending_access.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self) -> None:
+        """写回访问时间并关闭数据库连接"""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM render_cache").fetchone()[0]
+
+    def info(self) -> Dict[str, int]:
+        """
+        获取缓存统计信息，hits和misses只统计当前进程
+
+        返回:
+            包含hits、misses、size、bytes和max_bytes的字典
+        """
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM render_cache").fetchone()[0]
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": size,
+                "bytes": self._total_bytes(),
+                "max_bytes": self.max_bytes
+            }
+
+
+class _InFlightCall:
+    """正在进行中的一次计算，等待者通过event等待其完成"""
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    请求合并（single-flight）：键相同的并发调用只执行一次计算，
+    其他调用等待并共享同一个结果或异常，线程安全
+
+    只合并同时进行中的调用，计算完成后立即移除，不起缓存作用
+    """
+    def __init__(self):
+        self.executions = 0  # 实际执行的计算次数
+        self.shared = 0  # 共享了其他调用结果的次数
+        self._calls: Dict[Hashable, _InFlightCall] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        执行fn，若已有相同key的计算在进行中则等待其结果
+
+        参数:
+            key: 合并键
+            fn: 无参数的计算函数
+
+        返回:
+            fn的返回值（可能来自其他线程的调用）
+
+        异常:
+            fn抛出的异常会传递给所有等待者
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                is_leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                self.executions += 1
+                is_leader = True
+
+        if not is_leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+        return call.result
+
+    def info(self) -> Dict[str, int]:
+        """
+        获取合并统计信息
+
+        返回:
+            包含executions、shared和in_flight的字典
+        """
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "shared": self.shared,
+                "in_flight": len(self._calls)
+            }
@@ -0,0 +1,163 @@
+import os
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Any, Optional, List, Callable
+
+from ChartMark import json_backend, timing
+
+# 内存归因的类别：计时阶段 -> 类别名称
+MEMORY_CATEGORIES = {
+    timing.STAGE_LOAD_JSON: "input_json",        # 输入JSON解析后的对象
+    timing.STAGE_CHART_NODE: "chart_node",       # 图表节点构造（_parse_data_properties）
+    timing.STAGE_METADATA: "metadata_rows",      # _parse_to_metadata生成的行字典
+    timing.STAGE_CHART_PARSE: "chart_tree",      # vegalite_ast的Chart/LayerItem树
+    timing.STAGE_SERIALIZE: "output_string"      # 序列化后的输出字符串
+}
+
+
+@dataclass
+class SpecMemoryProfile:
+    """
+    单个规范渲染的内存测量结果，单位为字节，均相对渲染开始前的tracemalloc当前值
+    """
+    name: str
+    peak_bytes: int = 0  # 渲染过程中的分配峰值
+    result_bytes: int = 0  # 渲染结束、返回值仍被持有时新增的内存
+    retained_bytes: int = 0  # 返回值释放后仍未回收的内存（渲染缓存或泄漏）
+    # 各类别阶段内分配且在阶段结束时仍存活的字节数之和，同一类别多次出现时累加
+    allocations: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class _AllocationSink(timing.TimingSink):
+    """按MEMORY_CATEGORIES汇总各阶段memory_delta的计时接收端"""
+    measure_memory = True
+
+    def __init__(self):
+        self.allocations: Dict[str, int] = {}
+
+    def record(self, stage: str, elapsed: float, attrs: Dict[str, Any]) -> None:
+        category = MEMORY_CATEGORIES.get(stage)
+        delta = attrs.get("memory_delta")
+        if category is None or delta is None:
+            return
+        self.allocations[category] = self.allocations.get(category, 0) + max(delta, 0)
+
+
+def profile_memory(name: str, work: Callable[[], Any]) -> SpecMemoryProfile:
+    """
+    在tracemalloc下执行一次渲染，测量峰值内存、结果内存和残留内存，并按阶段归因
+
+    通过ChartMark.timing的阶段钩子归因，执行期间临时替换全局计时接收端（原有接收端仍会收到计时），
+    因此不应在多个线程中同时调用。tracemalloc会使渲染明显变慢，只适合排查内存问题
+
+    参数:
+        name: 规范的名称，如文件名或行号
+        work: 无参数的渲染函数，返回值会在测量结果内存后释放
+
+    返回:
+        SpecMemoryProfile
+
+    异常:
+        work抛出的异常会原样抛出
+    """
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    profile = SpecMemoryProfile(name=name)
+    sink = _AllocationSink()
+    previous = timing.get_timing_sink()
+    try:
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        with timing.use_timing_sink(sink if previous is None else timing.MultiSink([previous, sink])):
+            result = work()
+        current, peak = tracemalloc.get_traced_memory()
+        del result
+        profile.peak_bytes = peak - baseline
+        profile.result_bytes = current - baseline
+        profile.retained_bytes = tracemalloc.get_traced_memory()[0] - baseline
+        profile.allocations = sink.allocations
+        return profile
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+@dataclass
+class MemoryReport:
+    """
+    一次批处理或流式处理的内存汇总，只保留峰值最高的top_n个规范的明细，
+    内存占用与规范个数无关
+    """
+    top_n: int = 20
+    count: int = 0
+    peak_max: int = 0
+    peak_total: int = 0
+    retained_total: int = 0
+    allocation_totals: Dict[str, int] = field(default_factory=dict)
+    allocation_max: Dict[str, int] = field(default_factory=dict)
+    top: List[SpecMemoryProfile] = field(default_factory=list)  # 按peak_bytes降序
+
+    def add(self, profile: SpecMemoryProfile) -> None:
+        """加入一个规范的测量结果"""
+        self.count += 1
+        self.peak_max = max(self.peak_max, profile.peak_bytes)
+        self.peak_total += profile.peak_bytes
+        self.retained_total += profile.retained_bytes
+        for category, value in profile.allocations.items():
+            self.allocation_totals[category] = self.allocation_totals.get(category, 0) + value
+            self.allocation_max[category] = max(self.allocation_max.get(category, 0), value)
+        if len(self.top) < self.top_n or profile.peak_bytes > self.top[-1].peak_bytes:
+            self.top.append(profile)
+            self.top.sort(key=lambda item: item.peak_bytes, reverse=True)
+            del self.top[self.top_n:]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "peak_max": self.peak_max,
+            "peak_mean": self.peak_total / self.count if self.count else 0,
+            "retained_total": self.retained_total,
+            "allocation_totals": self.allocation_totals,
+            "allocation_max": self.allocation_max,
+            "top": [profile.to_dict() for profile in self.top]
+        }
+
+    def save(self, path: str) -> None:
+        """保存为JSON文件"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json_backend.dumps(self.to_dict(), indent=2))
+
+    def format_summary(self, limit: int = 10) -> str:
+        """
+        生成可读的汇总文本
+
+        参数:
+            limit: 列出的峰值最高的规范个数
+
+        返回:
+            多行文本
+        """
+        lines = [
+            f"规范数: {self.count}，峰值最大 {_format_bytes(self.peak_max)}，"
+            f"峰值平均 {_format_bytes(self.peak_total // self.count if self.count else 0)}，"
+            f"残留合计 {_format_bytes(self.retained_total)}"
+        ]
+        for category in MEMORY_CATEGORIES.values():
+            if category in self.allocation_totals:
+                lines.append(f"  {category:<14} 合计 {_format_bytes(self.allocation_totals[category]):>10}"
+                             f"  单个最大 {_format_bytes(self.allocation_max[category]):>10}")
+        for profile in self.top[:limit]:
+            detail = ", ".join(f"{category} {_format_bytes(value)}" for category, value in profile.allocations.items())
+            lines.append(f"  {_format_bytes(profile.peak_bytes):>10}  {profile.name}  ({detail})")
+        return "\n".join(lines)
+
+
+def _format_bytes(value: int) -> str:
+    if abs(value) >= 1024 * 1024:
+        return f"{value / 1024 / 1024:.1f}MB"
+    return f"{value / 1024:.1f}KB"
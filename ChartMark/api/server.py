@@ -0,0 +1,422 @@
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Dict, Any, Optional, List, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from ChartMark.version import __version__
+from ChartMark import json_backend
+from ChartMark.api import batch
+from ChartMark.api.service import ChartMark
+
+# 请求体的默认大小上限（字节）
+DEFAULT_MAX_BODY_BYTES = 10 * 1024 * 1024
+
+# 空闲的keep-alive连接在多少秒后关闭
+DEFAULT_KEEP_ALIVE_TIMEOUT = 30.0
+
+# 单条渲染结果: (是否成功, 紧凑JSON格式的VegaLite规范或错误信息)
+RenderOutcome = Tuple[bool, str]
+
+
+def _render_compact(service: ChartMark, with_annotations: bool, data: Any) -> str:
+    """
+    渲染单个ChartMark规范，service需启用compact_output
+    经过render_annotations/render_original_chart，因此会使用service的渲染缓存和请求合并
+    """
+    if not isinstance(data, dict):
+        raise ValueError("ChartMark规范必须是JSON对象")
+    if with_annotations:
+        return service.render_annotations(data)
+    return service.render_original_chart(data)
+
+
+def _render_compact_in_worker(service_options: Dict[str, Any], with_annotations: bool, data: Any) -> str:
+    """在工作进程中渲染单个规范，序列化也在工作进程中完成"""
+    if batch._worker_service is None:
+        batch._init_worker(service_options)
+    return _render_compact(batch._worker_service, with_annotations, data)
+
+
+def _warm_up_worker(service_options: Dict[str, Any]) -> int:
+    """预热任务：确保工作进程已启动并创建了ChartMark实例"""
+    if batch._worker_service is None:
+        batch._init_worker(service_options)
+    return os.getpid()
+
+
+class ChartMarkServer(ThreadingHTTPServer):
+    """
+    ChartMark渲染服务器，只依赖标准库
+
+    每个连接由一个线程处理（支持HTTP/1.1 keep-alive），渲染计算交给预先启动的进程池，
+    workers为0时直接在连接线程中渲染
+
+    渲染缓存和请求合并由主进程中的service负责：命中缓存的请求不会提交到进程池，
+    启用coalesce时并发的相同请求只提交一次，工作进程不再各自缓存
+
+    接口:
+        GET  /health                  服务状态
+        POST /render/original         渲染原始图表，请求体为一个ChartMark规范
+        POST /render/annotations      渲染带注释的图表，请求体为一个ChartMark规范
+        POST /render/batch            批量渲染，请求体为ChartMark规范数组，结果为[{"ok": ..., "spec"/"error": ...}]
+        POST /render/jsonl            批量渲染，请求体每行一个ChartMark规范，结果每行一个VegaLite规范或{"line": ..., "error": ...}
+    批量接口通过查询参数annotations=0只渲染原始图表，默认处理注释
+    """
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, server_address: Tuple[str, int], service: Optional[ChartMark] = None,
+                 workers: Optional[int] = None, max_body_bytes: int = DEFAULT_MAX_BODY_BYTES,
+                 keep_alive_timeout: float = DEFAULT_KEEP_ALIVE_TIMEOUT, quiet: bool = True):
+        """
+        初始化渲染服务器并预热工作进程
+
+        参数:
+            server_address: (host, port)
+            service: ChartMark实例，必须启用compact_output，为None时创建启用compact_output的默认实例。
+                工作进程按其配置（去掉缓存和请求合并）创建各自的实例
+            workers: 工作进程数，为None时使用CPU核数，为0时在连接线程中直接渲染
+            max_body_bytes: 请求体大小上限，超出时返回413
+            keep_alive_timeout: 空闲keep-alive连接的超时时间（秒）
+            quiet: 是否关闭每个请求的访问日志
+
+        异常:
+            ValueError: 参数无效
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 0:
+            raise ValueError("workers必须大于等于0")
+        if max_body_bytes <= 0:
+            raise ValueError("max_body_bytes必须是正整数")
+        if service is not None and not service.compact_output:
+            raise ValueError("服务器使用的ChartMark实例必须启用compact_output")
+
+        self.service = service if service is not None else ChartMark(compact_output=True)
+        self.workers = workers
+        self.max_body_bytes = max_body_bytes
+        self.keep_alive_timeout = keep_alive_timeout
+        self.quiet = quiet
+        self.pool: Optional[ProcessPoolExecutor] = None
+        # 缓存和请求合并在主进程中完成，工作进程只负责渲染
+        self.worker_options = dict(
+            self.service.get_service_options(), cache_size=0, disk_cache_path=None, coalesce=False
+        )
+
+        super().__init__(server_address, ChartMarkRequestHandler)
+
+        if workers > 0:
+            self.pool = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=batch._init_worker,
+                initargs=(self.worker_options,)
+            )
+            # 同时提交与进程数相同的预热任务，使所有工作进程在接收请求前启动完毕
+            warm_up = [self.pool.submit(_warm_up_worker, self.worker_options) for _ in range(workers)]
+            for future in warm_up:
+                future.result()
+
+    def render(self, with_annotations: bool, data: Any) -> str:
+        """
+        渲染单个ChartMark规范
+
+        返回:
+            紧凑JSON格式的VegaLite规范
+
+        异常:
+            ValueError: 渲染失败
+        """
+        if self.pool is None:
+            return _render_compact(self.service, with_annotations, data)
+        if not isinstance(data, dict):
+            raise ValueError("ChartMark规范必须是JSON对象")
+        return self.service._render_with_cache(
+            self.service._render_cache_key(data, with_annotations),
+            lambda: self.pool.submit(_render_compact_in_worker, self.worker_options, with_annotations, data).result()
+        )
+
+    def render_many(self, with_annotations: bool, specs: List[Any]) -> List[RenderOutcome]:
+        """
+        渲染多个ChartMark规范，使用进程池时并行渲染，结果顺序与输入一致
+        使用进程池时，命中缓存的规范不提交到进程池，同一批中缓存键相同的规范只渲染一次
+
+        返回:
+            每个规范的(是否成功, 规范或错误信息)列表
+        """
+        if self.pool is None:
+            outcomes = []
+            for data in specs:
+                try:
+                    outcomes.append((True, _render_compact(self.service, with_annotations, data)))
+                except Exception as e:
+                    outcomes.append((False, str(e)))
+            return outcomes
+
+        # 每个规范对应一个缓存命中的字符串、一个Future或一个错误信息
+        pending: List[Any] = []
+        submitted: Dict[tuple, Future] = {}
+        for data in specs:
+            if not isinstance(data, dict):
+                pending.append(ValueError("ChartMark规范必须是JSON对象"))
+                continue
+            cache_key = self.service._render_cache_key(data, with_annotations)
+            cached_spec = self.service._cache_get(cache_key) if cache_key is not None else None
+            if cached_spec is not None:
+                pending.append(cached_spec)
+            elif cache_key is not None and cache_key in submitted:
+                pending.append(submitted[cache_key])
+            else:
+                future = self.pool.submit(_render_compact_in_worker, self.worker_options, with_annotations, data)
+                if cache_key is not None:
+                    submitted[cache_key] = future
+                    future.add_done_callback(self._store_result(cache_key))
+                pending.append(future)
+
+        outcomes = []
+        for item in pending:
+            try:
+                if isinstance(item, Exception):
+                    raise item
+                outcomes.append((True, item.result() if isinstance(item, Future) else item))
+            except Exception as e:
+                outcomes.append((False, str(e)))
+        return outcomes
+
+    def _store_result(self, cache_key: tuple) -> Callable[[Future], None]:
+        """生成把工作进程的渲染结果写入缓存的回调，渲染失败时不写入"""
+        def store(future: Future) -> None:
+            if not future.cancelled() and future.exception() is None:
+                self.service._cache_put(cache_key, future.result())
+        return store
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+
+
+class ChartMarkRequestHandler(BaseHTTPRequestHandler):
+    """
+    ChartMark渲染服务器的请求处理器
+    """
+    protocol_version = "HTTP/1.1"
+    server_version = f"ChartMark/{__version__}"
+    # 响应头和响应体分两次写出，关闭Nagle算法避免与客户端的延迟确认叠加产生约40ms的延迟
+    disable_nagle_algorithm = True
+    server: ChartMarkServer
+
+    def setup(self) -> None:
+        # 空闲连接超过keep_alive_timeout后由handle_one_request中的超时处理关闭
+        self.timeout = self.server.keep_alive_timeout
+        super().setup()
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send_body(self, status: int, body: str, content_type: str = "application/json") -> None:
+        """发送响应，始终带Content-Length以便连接复用"""
+        payload = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_error_json(self, status: int, message: str) -> None:
+        self._send_body(status, json.dumps({"error": message}, ensure_ascii=False))
+
+    def _read_body(self) -> Optional[bytes]:
+        """
+        读取请求体，长度缺失或超出上限时直接发送错误响应
+
+        返回:
+            请求体字节串，出错时返回None
+        """
+        length_header = self.headers.get("Content-Length")
+        if length_header is None:
+            self._send_error_json(411, "缺少Content-Length")
+            self.close_connection = True
+            return None
+        try:
+            length = int(length_header)
+        except ValueError:
+            self._send_error_json(400, "Content-Length无效")
+            self.close_connection = True
+            return None
+        if length < 0:
+            self._send_error_json(400, "Content-Length无效")
+            self.close_connection = True
+            return None
+        if length > self.server.max_body_bytes:
+            # 未读取的请求体会破坏连接上的后续请求，因此关闭连接
+            self._send_error_json(413, f"请求体超过大小上限 {self.server.max_body_bytes} 字节")
+            self.close_connection = True
+            return None
+        return self.rfile.read(length)
+
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/health":
+            self._send_body(200, json.dumps({
+                "status": "ok",
+                "version": __version__,
+                "workers": self.server.workers,
+                "cache": self.server.service.cache_info()
+            }))
+        else:
+            self._send_error_json(404, f"未知路径: {path}")
+
+    def do_POST(self) -> None:
+        url = urlsplit(self.path)
+        routes = {
+            "/render/original": self._handle_render_original,
+            "/render/annotations": self._handle_render_annotations,
+            "/render/batch": self._handle_render_batch,
+            "/render/jsonl": self._handle_render_jsonl,
+        }
+        # 先读取请求体，未知路径的请求体也不能留在连接上，否则会破坏同一连接上的后续请求
+        body = self._read_body()
+        if body is None:
+            return
+
+        handler = routes.get(url.path)
+        if handler is None:
+            self._send_error_json(404, f"未知路径: {url.path}")
+            return
+
+        query = parse_qs(url.query)
+        with_annotations = query.get("annotations", ["1"])[-1] not in ("0", "false")
+        handler(body, with_annotations)
+
+    def _parse_json_body(self, body: bytes) -> Tuple[bool, Any]:
+        try:
+            return True, json_backend.loads(body)
+        except ValueError as e:
+            self._send_error_json(400, f"JSON格式错误: {str(e)}")
+            return False, None
+
+    def _handle_single(self, body: bytes, with_annotations: bool) -> None:
+        ok, data = self._parse_json_body(body)
+        if not ok:
+            return
+        try:
+            self._send_body(200, self.server.render(with_annotations, data))
+        except Exception as e:
+            self._send_error_json(422, str(e))
+
+    def _handle_render_original(self, body: bytes, with_annotations: bool) -> None:
+        self._handle_single(body, False)
+
+    def _handle_render_annotations(self, body: bytes, with_annotations: bool) -> None:
+        self._handle_single(body, True)
+
+    def _handle_render_batch(self, body: bytes, with_annotations: bool) -> None:
+        ok, specs = self._parse_json_body(body)
+        if not ok:
+            return
+        if not isinstance(specs, list):
+            self._send_error_json(400, "请求体必须是ChartMark规范数组")
+            return
+
+        # 渲染结果已是JSON字符串，直接拼接，避免再次解析和序列化
+        items = []
+        for success, value in self.server.render_many(with_annotations, specs):
+            if success:
+                items.append('{"ok":true,"spec":' + value + '}')
+            else:
+                items.append('{"ok":false,"error":' + json.dumps(value, ensure_ascii=False) + '}')
+        self._send_body(200, "[" + ",".join(items) + "]")
+
+    def _handle_render_jsonl(self, body: bytes, with_annotations: bool) -> None:
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            self._send_error_json(400, "请求体必须是UTF-8编码")
+            return
+
+        line_numbers: List[int] = []
+        specs: List[Any] = []
+        errors: Dict[int, str] = {}
+        for line_no, line in enumerate(text.splitlines(), start=1):
+            line = line.strip()
+            if not line:
+                continue
+            line_numbers.append(line_no)
+            try:
+                specs.append(json_backend.loads(line))
+            except ValueError as e:
+                specs.append(None)
+                errors[line_no] = f"JSON格式错误: {str(e)}"
+
+        valid = [(line_no, data) for line_no, data in zip(line_numbers, specs) if line_no not in errors]
+        outcomes = dict(zip(
+            [line_no for line_no, _ in valid],
+            self.server.render_many(with_annotations, [data for _, data in valid])
+        ))
+
+        lines = []
+        for line_no in line_numbers:
+            success, value = outcomes.get(line_no, (False, errors.get(line_no, "")))
+            if success:
+                lines.append(value)
+            else:
+                lines.append(json.dumps({"line": line_no, "error": value}, ensure_ascii=False))
+        self._send_body(200, "".join(line + "\n" for line in lines), content_type="application/x-ndjson")
+
+
+def create_server(host: str = "127.0.0.1", port: int = 8000, **kwargs: Any) -> ChartMarkServer:
+    """
+    创建渲染服务器，其他参数同ChartMarkServer
+
+    返回:
+        已绑定端口、工作进程已预热的ChartMarkServer实例
+    """
+    return ChartMarkServer((host, port), **kwargs)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口: python -m ChartMark.api.server"""
+    parser = argparse.ArgumentParser(description="ChartMark渲染服务器")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument("--workers", type=int, default=None, help="工作进程数，默认为CPU核数，0表示不使用进程池")
+    parser.add_argument("--max-body-bytes", type=int, default=DEFAULT_MAX_BODY_BYTES, help="请求体大小上限")
+    parser.add_argument("--keep-alive-timeout", type=float, default=DEFAULT_KEEP_ALIVE_TIMEOUT,
+                        help="空闲keep-alive连接的超时时间（秒）")
+    parser.add_argument("--cache-size", type=int, default=0, help="进程内LRU渲染缓存的容量，0表示不启用")
+    parser.add_argument("--disk-cache", default=None, help="持久化SQLite渲染缓存的文件路径")
+    parser.add_argument("--coalesce", action="store_true", help="合并并发的相同渲染请求")
+    parser.add_argument("--verbose", action="store_true", help="输出访问日志")
+    args = parser.parse_args(argv)
+
+    service = ChartMark(
+        cache_size=args.cache_size,
+        disk_cache_path=args.disk_cache,
+        coalesce=args.coalesce,
+        compact_output=True
+    )
+    server = create_server(
+        args.host, args.port,
+        service=service,
+        workers=args.workers,
+        max_body_bytes=args.max_body_bytes,
+        keep_alive_timeout=args.keep_alive_timeout,
+        quiet=not args.verbose
+    )
+    print(f"ChartMark {__version__} 渲染服务器已启动: http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
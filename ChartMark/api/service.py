@@ -1,12 +1,30 @@
 import json
 import os
-from typing import Dict, Any, Optional, List, Type
+import sys
+from typing import Dict, Any, Optional, List, Type, Union, TextIO, Callable, Tuple
 
 # 导入图表路由
 from ChartMark.router.chart_router import get_chart_class, get_supported_chart_types
 # 导入Chart类和注释路由
 from ChartMark.vegalite_ast.ChartNode import Chart
 from ChartMark.router.annotation_router import get_annotation_class
+from ChartMark.api.batch import (
+    BatchFileResult,
+    IncrementalBatchResult,
+    DEFAULT_MANIFEST_NAME,
+    collect_batch_tasks,
+    run_batch_tasks,
+    run_incremental_batch
+)
+from ChartMark.api.stream import JsonlStreamResult, render_jsonl_stream
+from ChartMark.api.memory import MemoryReport
+from ChartMark.api.spec_writer import DEFAULT_CHUNK_SIZE, write_spec_streaming
+from ChartMark import json_backend, timing, diagnostics
+from ChartMark.diagnostics import RenderResult, collect_diagnostics
+from ChartMark.api.cache import LRURenderCache, SQLiteRenderCache, SingleFlight, canonical_spec_hash
+from ChartMark.annotation_ast_genetic.chart_node.Downsampler import DOWNSAMPLE_METHODS, annotation_row_filter
+from ChartMark.annotation_ast_genetic.chart_node.DensityBinner import DensityGrid, apply_density_grid
+from ChartMark.annotation_ast_genetic.chart_node.SummaryResolver import FullData, resolve_summaries
 
 class ChartMark:
     """
@@ -28,9 +46,225 @@ class ChartMark:
     ```
     """
     
-    def __init__(self):
-        """初始化图表服务"""
-        pass
+    def __init__(self, compose_in_place: bool = False, cache_size: int = 0,
+                 disk_cache_path: Optional[str] = None, disk_cache_max_bytes: int = 256 * 1024 * 1024,
+                 coalesce: bool = False, compact_output: bool = False,
+                 profile_memory: bool = False, downsample: Optional[int] = None,
+                 downsample_method: str = "lttb", density_bins: Optional[int] = None):
+        """
+        初始化图表服务
+        
+        参数:
+            compose_in_place: 是否启用合成模式。启用后render_annotations在所有注释和技术之间
+                共享同一个Chart实例并原地修改，只在最后序列化一次，
+                而不是在每个注释/技术之后通过to_dict重建Chart
+            cache_size: 进程内LRU渲染缓存的容量，为0时不启用缓存。
+                render_original_chart以chart字段的规范化哈希为键，
+                render_annotations以完整规范的规范化哈希为键
+            disk_cache_path: 持久化SQLite渲染缓存的文件路径，为None时不启用。
+                多个进程可以共享同一个缓存文件，键中包含ChartMark版本号
+            disk_cache_max_bytes: 磁盘缓存的字节预算，超出时按LRU淘汰
+            coalesce: 是否合并并发的相同渲染请求（single-flight）。启用后规范化哈希相同的
+                render_original_chart/render_annotations并发调用只计算一次，所有调用共享结果。
+                只在同一进程内的线程之间生效
+            compact_output: 是否输出紧凑JSON。启用后render_original_chart、render_annotations
+                和save_vegalite_spec不再使用2空格缩进，输出体积更小、序列化更快。
+                JSON的编解码使用json_backend选择的后端（orjson/ujson/simdjson/标准库）
+            profile_memory: 是否在批处理和流式处理中用tracemalloc测量每个规范的峰值内存和残留内存，
+                并按图表节点、元数据行、Chart树和输出字符串归因，汇总到memory_report。
+                并行批处理时在各工作进程中测量，结果随BatchFileResult返回后汇总。会使渲染明显变慢
+            downsample: 折线图（line、group_line的每个分组）降采样的目标点数，为None时不降采样。
+                注释中data_items过滤条件选中的行和coordinate范围内的行总会保留，
+                全局最小值和最大值所在的点也会保留。aggregate、joinaggregate汇总和线性回归趋势线
+                由resolve_summaries在服务端按降采样前的完整序列计算，无法计算的汇总注释记录为summary_unresolved诊断
+            downsample_method: 降采样算法，"lttb"（Largest-Triangle-Three-Buckets）或"minmax"（分桶保留极值）
+            density_bins: 散点图（scatter、group_scatter）二维分箱每个轴上的格子数，为None时不分箱。
+                点数超过density_bins的平方时，点数以rect密度图层显示，data.values只保留注释目标选中的点
+                和极值点；不带过滤条件的汇总注释在服务端按完整数据计算
+        
+        异常:
+            ValueError: downsample或density_bins不是正整数，或downsample_method不受支持
+        """
+        if downsample is not None and (not isinstance(downsample, int) or downsample <= 0):
+            raise ValueError("downsample必须是正整数")
+        if downsample_method not in DOWNSAMPLE_METHODS:
+            raise ValueError(f"不支持的降采样算法: {downsample_method}，可选值为{', '.join(DOWNSAMPLE_METHODS)}")
+        if density_bins is not None and (not isinstance(density_bins, int) or density_bins <= 0):
+            raise ValueError("density_bins必须是正整数")
+
+        self.compose_in_place = compose_in_place
+        self.cache_size = cache_size
+        self.render_cache: Optional[LRURenderCache] = LRURenderCache(cache_size) if cache_size else None
+        self.disk_cache_path = disk_cache_path
+        self.disk_cache_max_bytes = disk_cache_max_bytes
+        self.disk_cache: Optional[SQLiteRenderCache] = (
+            SQLiteRenderCache(disk_cache_path, max_bytes=disk_cache_max_bytes) if disk_cache_path else None
+        )
+        self.coalesce = coalesce
+        self.single_flight: Optional[SingleFlight] = SingleFlight() if coalesce else None
+        self.compact_output = compact_output
+        self.output_indent: Optional[int] = None if compact_output else 2
+        self.profile_memory = profile_memory
+        self.memory_report: Optional[MemoryReport] = MemoryReport() if profile_memory else None
+        self.downsample = downsample
+        self.downsample_method = downsample_method
+        self.density_bins = density_bins
+    
+    def get_service_options(self) -> Dict[str, Any]:
+        """
+        获取创建当前实例所用的配置，用于在工作进程中创建等价的ChartMark实例
+        
+        返回:
+            可直接传给ChartMark构造函数的参数字典
+        """
+        return {
+            "compose_in_place": self.compose_in_place,
+            "cache_size": self.cache_size,
+            "disk_cache_path": self.disk_cache_path,
+            "disk_cache_max_bytes": self.disk_cache_max_bytes,
+            "coalesce": self.coalesce,
+            "compact_output": self.compact_output,
+            "profile_memory": self.profile_memory,
+            "downsample": self.downsample,
+            "downsample_method": self.downsample_method,
+            "density_bins": self.density_bins
+        }
+    
+    def get_output_options(self) -> Dict[str, Any]:
+        """
+        获取影响渲染输出内容的配置，用于增量构建清单等以输出为准的键
+        缓存、合成模式、请求合并和内存测量只影响渲染方式，不改变输出，不包含在内
+        
+        返回:
+            配置字典，json_backend为当前使用的JSON后端名称
+        """
+        return {
+            "compact_output": self.compact_output,
+            "downsample": self.downsample,
+            "downsample_method": self.downsample_method,
+            "density_bins": self.density_bins,
+            "json_backend": json_backend.get_json_backend().name
+        }
+    
+    def _get_cache_key(self, kind: str, obj: Any) -> Optional[tuple]:
+        """
+        生成渲染缓存的键
+        
+        参数:
+            kind: 渲染类型，区分原始图表和注释图表
+            obj: 参与哈希的规范对象
+            
+        返回:
+            缓存键，未启用缓存和请求合并或对象无法序列化时返回None
+        """
+        if self.render_cache is None and self.disk_cache is None and self.single_flight is None:
+            return None
+        if self.compact_output:
+            # 紧凑输出与缩进输出的字符串不同，磁盘缓存可能被不同配置的实例共享
+            kind = f"{kind}:compact"
+        if self.downsample:
+            kind = f"{kind}:downsample:{self.downsample}:{self.downsample_method}"
+        if self.density_bins:
+            kind = f"{kind}:density:{self.density_bins}"
+        # 不同JSON后端输出的浮点数和NaN写法不同，共享的磁盘缓存中不能混用
+        kind = f"{kind}:{json_backend.get_json_backend().name}"
+        try:
+            return (kind, canonical_spec_hash(obj))
+        except (TypeError, ValueError):
+            return None
+    
+    def _render_cache_key(self, data: Dict[str, Any], with_annotations: bool = True) -> Optional[tuple]:
+        """
+        生成render_annotations（with_annotations为True时）或render_original_chart使用的缓存键，
+        需在渲染前计算，因为渲染过程可能修改传入的规范
+        
+        参数:
+            data: ChartMark规范
+            with_annotations: 是否处理注释，没有annotations字段时按原始图表计算
+            
+        返回:
+            缓存键，规则同_get_cache_key
+        """
+        if with_annotations and data.get("annotations") is not None:
+            return self._get_cache_key("annotations", data)
+        # 降采样和分箱保留的行取决于注释，此时以完整规范为键
+        cache_obj = data if self.downsample or self.density_bins else data.get("chart")
+        return self._get_cache_key("original_chart", cache_obj)
+    
+    def _cache_get(self, cache_key: tuple) -> Optional[str]:
+        """
+        依次查询内存缓存和磁盘缓存，磁盘命中时回填内存缓存
+        """
+        if self.render_cache is not None:
+            cached_spec = self.render_cache.get(cache_key)
+            if cached_spec is not None:
+                return cached_spec
+        if self.disk_cache is not None:
+            cached_spec = self.disk_cache.get(cache_key)
+            if cached_spec is not None:
+                if self.render_cache is not None:
+                    self.render_cache.put(cache_key, cached_spec)
+                return cached_spec
+        return None
+    
+    def _render_with_cache(self, cache_key: Optional[tuple], render: Callable[[], str]) -> str:
+        """
+        先查询渲染缓存，未命中时执行render并写入缓存
+        启用请求合并时，相同键的并发未命中只执行一次render
+        
+        参数:
+            cache_key: 缓存键，为None时直接执行render
+            render: 无参数的渲染函数，返回VegaLite规范字符串
+            
+        返回:
+            VegaLite规范字符串
+        """
+        if cache_key is None:
+            return render()
+        
+        cached_spec = self._cache_get(cache_key)
+        if cached_spec is not None:
+            return cached_spec
+        
+        def render_and_store() -> str:
+            vegalite_spec = render()
+            self._cache_put(cache_key, vegalite_spec)
+            return vegalite_spec
+        
+        if self.single_flight is None:
+            return render_and_store()
+        return self.single_flight.do(cache_key, render_and_store)
+    
+    def _cache_put(self, cache_key: tuple, vegalite_spec: str) -> None:
+        """将渲染结果写入所有已启用的缓存"""
+        if self.render_cache is not None:
+            self.render_cache.put(cache_key, vegalite_spec)
+        if self.disk_cache is not None:
+            self.disk_cache.put(cache_key, vegalite_spec)
+    
+    def cache_info(self) -> Optional[Dict[str, Any]]:
+        """
+        获取渲染缓存的统计信息
+        
+        返回:
+            只启用内存缓存时为包含hits、misses、size和maxsize的字典；
+            启用磁盘缓存或请求合并时为{"memory": ..., "disk": ..., "single_flight": ...}，
+            未启用的部分对应None；都未启用时返回None
+        """
+        if self.disk_cache is None and self.single_flight is None:
+            return self.render_cache.info() if self.render_cache is not None else None
+        return {
+            "memory": self.render_cache.info() if self.render_cache is not None else None,
+            "disk": self.disk_cache.info() if self.disk_cache is not None else None,
+            "single_flight": self.single_flight.info() if self.single_flight is not None else None
+        }
+    
+    def clear_cache(self) -> None:
+        """清空渲染缓存（包括磁盘缓存）"""
+        if self.render_cache is not None:
+            self.render_cache.clear()
+        if self.disk_cache is not None:
+            self.disk_cache.clear()
     
     def load_json(self, file_path: str) -> Dict[str, Any]:
         """
@@ -50,8 +284,9 @@ class ChartMark:
             raise FileNotFoundError(f"文件不存在: {file_path}")
             
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            # 以字节读取，orjson等后端可以直接解析UTF-8字节
+            with open(file_path, 'rb') as f, timing.stage(timing.STAGE_LOAD_JSON, path=file_path):
+                data = json_backend.load(f)
                 return data
         except json.JSONDecodeError as e:
             raise json.JSONDecodeError(f"JSON格式错误: {str(e)}", e.doc, e.pos)
@@ -157,6 +392,43 @@ class ChartMark:
             print(f"显示图表时出错: {str(e)}")
             print("图表规范:", vegalite_spec[:200] + "..." if len(vegalite_spec) > 200 else vegalite_spec)
     
+    def _downsample_chart(self, chart_instance: Any, chart_type: str, data: Dict[str, Any]) -> Optional[FullData]:
+        """
+        启用降采样时缩减图表节点的数据，不支持降采样的图表类型不做处理
+        
+        参数:
+            chart_instance: 图表节点实例
+            chart_type: 图表类型
+            data: 完整的ChartMark规范，其中annotations的目标选中的行会被保留
+            
+        返回:
+            降采样前的完整数据，需要在应用注释后由resolve_summaries计算汇总；没有数据被丢弃时返回None
+        """
+        if not self.downsample or not hasattr(chart_instance, "downsample"):
+            return None
+        with timing.stage(timing.STAGE_DOWNSAMPLE, chart_type=chart_type, method=self.downsample_method):
+            keep_row = annotation_row_filter(data.get("annotations"), chart_type)
+            chart_instance.downsample(self.downsample, self.downsample_method, keep_row)
+        return chart_instance.full_data
+    
+    def _bin_chart(self, chart_instance: Any, chart_type: str, data: Dict[str, Any]) -> Optional[DensityGrid]:
+        """
+        启用二维分箱时把散点图节点的点数统计到网格中，不支持分箱的图表类型不做处理
+        
+        参数:
+            chart_instance: 图表节点实例
+            chart_type: 图表类型
+            data: 完整的ChartMark规范，其中annotations的目标选中的点会保留在data.values中
+            
+        返回:
+            分箱结果，需要在生成规范后由apply_density_grid加入规范；未分箱时返回None
+        """
+        if not self.density_bins or not hasattr(chart_instance, "bin_density"):
+            return None
+        with timing.stage(timing.STAGE_BINNING, chart_type=chart_type, bins=self.density_bins):
+            keep_row = annotation_row_filter(data.get("annotations"), chart_type)
+            return chart_instance.bin_density(self.density_bins, keep_row)
+    
     def render_original_chart(self, data: Dict[str, Any]) -> str:
         """
         渲染原始图表，生成VegaLite图表规范
@@ -180,17 +452,93 @@ class ChartMark:
         if not chart_type or not isinstance(chart_type, str):
             raise ValueError("chart中缺少有效的type字段")
         
+        def render() -> str:
+            try:
+                # 从路由获取对应的图表类
+                chart_class = get_chart_class(chart_type)
+                
+                # 实例化图表对象
+                with timing.stage(timing.STAGE_CHART_NODE, chart_type=chart_type):
+                    chart_instance = chart_class(chart_data)
+                self._downsample_chart(chart_instance, chart_type, data)
+                density_grid = self._bin_chart(chart_instance, chart_type, data)
+                
+                if self.compact_output or density_grid is not None:
+                    # 紧凑输出直接以紧凑格式序列化规范字典，分箱时先在规范字典中加入密度图层
+                    with timing.stage(timing.STAGE_TEMPLATE_FILL, chart_type=chart_type):
+                        vegalite_dict = apply_density_grid(chart_instance.to_vegalite_dict(), density_grid)
+                    return self.serialize_vegalite_spec(vegalite_dict, indent=self.output_indent)
+                
+                # 调用to_vegalite_chart生成图表规范
+                with timing.stage(timing.STAGE_TEMPLATE_FILL, chart_type=chart_type):
+                    return chart_instance.to_vegalite_chart()
+                
+            except ValueError as e:
+                # 处理图表类型不支持的错误
+                raise ValueError(f"图表类型错误: {str(e)}")
+            except Exception as e:
+                # 处理其他渲染错误
+                raise ValueError(f"渲染图表失败: {str(e)}")
+        
+        # 查询渲染缓存
+        return self._render_with_cache(self._render_cache_key(data, with_annotations=False), render)
+    
+    def render_original_chart_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        渲染原始图表，直接生成VegaLite图表规范字典
+        与render_original_chart不同，数据不会先序列化为JSON字符串再解析回来
+        
+        参数:
+            data: 包含图表数据的字典
+            
+        返回:
+            VegaLite图表规范字典
+            
+        异常:
+            ValueError: 图表数据无效或不支持的图表类型
+        """
+        vegalite_dict, density_grid, _ = self._render_original_chart_parts(data)
+        return apply_density_grid(vegalite_dict, density_grid)
+    
+    def _render_original_chart_parts(
+        self, data: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[DensityGrid], Optional[FullData]]:
+        """
+        生成原始图表的规范字典、二维分箱结果和降采样前的完整数据，密度图层和汇总由调用方在应用注释之后处理，
+        使注释技术操作的第0个图层仍然是数据点图层
+        
+        参数:
+            data: 包含图表数据的字典
+            
+        返回:
+            (VegaLite图表规范字典, 分箱结果, 降采样前的完整数据)，未分箱或未降采样时对应的结果为None
+            
+        异常:
+            ValueError: 图表数据无效或不支持的图表类型
+        """
+        # 提取chart字段
+        chart_data = data.get("chart")
+        if not chart_data or not isinstance(chart_data, dict):
+            raise ValueError("数据中缺少有效的chart字段")
+        
+        # 获取图表类型
+        chart_type = chart_data.get("type")
+        if not chart_type or not isinstance(chart_type, str):
+            raise ValueError("chart中缺少有效的type字段")
+        
         try:
             # 从路由获取对应的图表类
             chart_class = get_chart_class(chart_type)
             
             # 实例化图表对象
-            chart_instance = chart_class(chart_data)
+            with timing.stage(timing.STAGE_CHART_NODE, chart_type=chart_type):
+                chart_instance = chart_class(chart_data)
+            full_data = self._downsample_chart(chart_instance, chart_type, data)
+            density_grid = self._bin_chart(chart_instance, chart_type, data)
             
-            # 调用to_vegalite_chart生成图表规范
-            vegalite_spec = chart_instance.to_vegalite_chart()
-            
-            return vegalite_spec
+            # 调用to_vegalite_dict生成图表规范字典
+            with timing.stage(timing.STAGE_TEMPLATE_FILL, chart_type=chart_type):
+                return chart_instance.to_vegalite_dict(), density_grid, full_data
             
         except ValueError as e:
             # 处理图表类型不支持的错误
@@ -199,12 +547,12 @@ class ChartMark:
             # 处理其他渲染错误
             raise ValueError(f"渲染图表失败: {str(e)}")
     
-    def render_annotations(self, data: Dict[str, Any]) -> str:
+    def render_annotations_dict(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        处理基于原始图表的注释添加，实现注释的叠加渲染
+        处理基于原始图表的注释添加，实现注释的叠加渲染，全程使用字典，不做JSON字符串往返
         
         处理流程：
-        1. 调用render_original_chart获取原始VegaLite规范
+        1. 调用render_original_chart_dict获取原始VegaLite规范字典
         2. 实例化为Chart对象
         3. 读取data中的annotations字段，获取注释字典列表
         4. 遍历注释列表，根据注释类型进行处理
@@ -214,7 +562,7 @@ class ChartMark:
             data: 包含图表和注释数据的字典
             
         返回:
-            应用了注释的VegaLite图表规范字符串
+            应用了注释的VegaLite图表规范字典
             
         异常:
             ValueError: 数据无效或处理过程中的错误
@@ -223,7 +571,7 @@ class ChartMark:
         annotations_data = data.get("annotations")
         if annotations_data is None:
             # 如果没有annotations字段，直接返回原始图表
-            return self.render_original_chart(data)
+            return self.render_original_chart_dict(data)
         
         if not isinstance(annotations_data, list):
             raise ValueError("annotations字段必须是数组类型")
@@ -238,30 +586,34 @@ class ChartMark:
             raise ValueError("chart中缺少有效的type字段")
         
         try:
-            # 获取原始VegaLite规范
-            vegalite_spec = self.render_original_chart(data)
-            
-            # 解析VegaLite规范为JSON
-            vegalite_dict = json.loads(vegalite_spec)
+            # 获取原始VegaLite规范字典，降采样时的汇总和分箱时的密度图层在所有注释应用之后处理
+            vegalite_dict, density_grid, full_data = self._render_original_chart_parts(data)
             
             # 创建Chart实例
-            current_chart = Chart(vegalite_dict)
+            with timing.stage(timing.STAGE_CHART_PARSE, chart_type=chart_type):
+                current_chart = Chart(vegalite_dict)
             
             # 遍历annotations列表
-            for annotation in annotations_data:
+            for index, annotation in enumerate(annotations_data):
                 if not isinstance(annotation, dict):
-                    print(f"警告：跳过非字典类型的注释: {annotation}")
+                    diagnostics.warning(diagnostics.CODE_ANNOTATION_SKIPPED,
+                                        f"警告：跳过非字典类型的注释: {annotation}", annotation_index=index)
                     continue
                 
                 # 获取注释的method和type
+                annotation_id = annotation.get("id") if isinstance(annotation.get("id"), str) else None
                 method = annotation.get("method", {})
                 if not isinstance(method, dict):
-                    print(f"警告：跳过缺少有效method字段的注释: {annotation}")
+                    diagnostics.warning(diagnostics.CODE_ANNOTATION_SKIPPED,
+                                        f"警告：跳过缺少有效method字段的注释: {annotation}",
+                                        annotation_index=index, annotation_id=annotation_id)
                     continue
                 
                 annotation_type = method.get("type")
                 if not annotation_type or not isinstance(annotation_type, str):
-                    print(f"警告：跳过缺少有效类型的注释: {annotation}")
+                    diagnostics.warning(diagnostics.CODE_ANNOTATION_SKIPPED,
+                                        f"警告：跳过缺少有效类型的注释: {annotation}",
+                                        annotation_index=index, annotation_id=annotation_id)
                     continue
                 
                 try:
@@ -271,28 +623,108 @@ class ChartMark:
                     # 实例化注释对象
                     annotation_instance = annotation_class(annotation)
                     
+                    if self.compose_in_place:
+                        # 合成模式：直接在当前Chart实例上原地应用所有技术
+                        with timing.stage(timing.STAGE_ANNOTATION, annotation=annotation_type, chart_type=chart_type):
+                            annotation_instance.compose_techniques_in_place(current_chart, chart_type)
+                        continue
+                    
                     # 调用parse_techniques_to_vegalite方法应用注释
-                    new_vegalite_dict = annotation_instance.parse_techniques_to_vegalite(current_chart, chart_type)
+                    with timing.stage(timing.STAGE_ANNOTATION, annotation=annotation_type, chart_type=chart_type):
+                        new_vegalite_dict = annotation_instance.parse_techniques_to_vegalite(current_chart, chart_type)
                     
                     # 使用新的vegalite_dict创建新的Chart实例，用于下一个注释处理
-                    current_chart = Chart(new_vegalite_dict)
+                    with timing.stage(timing.STAGE_CHART_PARSE, chart_type=chart_type):
+                        current_chart = Chart(new_vegalite_dict)
                 except Exception as e:
-                    print(f"应用注释 {annotation_type} 时出错: {str(e)}")
+                    diagnostics.warning(diagnostics.CODE_ANNOTATION_FAILED, f"应用注释 {annotation_type} 时出错: {str(e)}",
+                                        annotation_index=index, annotation_id=annotation_id,
+                                        annotation_type=annotation_type, error=str(e))
             
-            # 返回最终处理结果的JSON字符串
-            return json.dumps(current_chart.to_dict(), indent=2)
+            # 返回最终处理结果的字典，降采样时按完整数据计算汇总注释
+            result = current_chart.to_dict()
+            if full_data is not None:
+                resolve_summaries(result, full_data)
+            return apply_density_grid(result, density_grid)
             
         except Exception as e:
             raise ValueError(f"渲染注释失败: {str(e)}")
     
-    def save_vegalite_spec(self, spec: str, output_path: str) -> None:
+    def render_annotations(self, data: Dict[str, Any]) -> str:
+        """
+        处理基于原始图表的注释添加，实现注释的叠加渲染
+        
+        参数:
+            data: 包含图表和注释数据的字典
+            
+        返回:
+            应用了注释的VegaLite图表规范字符串
+            
+        异常:
+            ValueError: 数据无效或处理过程中的错误
+        """
+        if data.get("annotations") is None:
+            # 如果没有annotations字段，直接返回原始图表
+            return self.render_original_chart(data)
+        
+        # 查询渲染缓存，需在渲染前计算哈希，因为渲染过程可能修改传入的规范
+        cache_key = self._render_cache_key(data)
+        return self._render_with_cache(
+            cache_key,
+            lambda: self.serialize_vegalite_spec(self.render_annotations_dict(data), indent=self.output_indent)
+        )
+    
+    def render_with_diagnostics(self, data: Dict[str, Any], with_annotations: bool = True) -> RenderResult:
+        """
+        渲染图表并返回结构化的诊断信息，而不是把警告写入日志
+        
+        跳过的注释、失败的注释和失败的技术都会记录在结果的diagnostics中，
+        包含注释下标、注释id、注释类型、技术名称和异常信息。
+        渲染缓存命中时不会重新渲染，因此也没有诊断信息
+        
+        参数:
+            data: 包含图表和注释数据的字典
+            with_annotations: 是否处理注释，默认为True
+            
+        返回:
+            RenderResult，spec为VegaLite规范字符串，diagnostics为诊断信息列表
+            
+        异常:
+            ValueError: 数据无效或处理过程中的错误
+        """
+        with collect_diagnostics() as collector:
+            if with_annotations:
+                vegalite_spec = self.render_annotations(data)
+            else:
+                vegalite_spec = self.render_original_chart(data)
+        return RenderResult(spec=vegalite_spec, diagnostics=collector.diagnostics)
+    
+    def serialize_vegalite_spec(self, spec: Dict[str, Any], indent: Optional[int] = 2) -> str:
+        """
+        将VegaLite规范字典序列化为JSON字符串
+        
+        参数:
+            spec: VegaLite规范字典
+            indent: 缩进空格数，为None时输出紧凑格式
+            
+        返回:
+            VegaLite规范字符串
+        """
+        with timing.stage(timing.STAGE_SERIALIZE, indent=indent):
+            return json_backend.dumps(spec, indent=indent)
+    
+    def save_vegalite_spec(self, spec: Union[str, Dict[str, Any]], output_path: str) -> None:
         """
         保存VegaLite规范到文件
         
         参数:
-            spec: VegaLite规范字符串
+            spec: VegaLite规范字符串或字典，字典会先通过serialize_vegalite_spec序列化，
+                compact_output启用时输出紧凑格式
             output_path: 输出文件路径
         """
+        if isinstance(spec, dict):
+            spec = self.serialize_vegalite_spec(spec, indent=self.output_indent)
+        
         try:
             # 确保输出目录存在
             os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
@@ -302,6 +734,63 @@ class ChartMark:
         except Exception as e:
             raise IOError(f"保存VegaLite规范失败: {str(e)}")
     
+    def write_original_chart(self, data: Dict[str, Any], output: Union[str, TextIO],
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        渲染原始图表并流式写出VegaLite规范
+        data.values由图表节点的数值列逐块生成并写出，不构建完整的行字典列表，
+        峰值内存与列数据成正比，适合数百万行的折线图和散点图；不使用渲染缓存
+        
+        参数:
+            data: 包含图表数据的字典
+            output: 输出文件路径，或文本输出流（如socket.makefile("w", encoding="utf-8")）
+            chunk_size: 每次序列化的行数
+            
+        返回:
+            写出的data.values行数
+            
+        异常:
+            ValueError: 图表数据无效或不支持的图表类型
+            IOError: 写出文件失败
+        """
+        # 提取chart字段
+        chart_data = data.get("chart")
+        if not chart_data or not isinstance(chart_data, dict):
+            raise ValueError("数据中缺少有效的chart字段")
+        
+        # 获取图表类型
+        chart_type = chart_data.get("type")
+        if not chart_type or not isinstance(chart_type, str):
+            raise ValueError("chart中缺少有效的type字段")
+        
+        try:
+            chart_class = get_chart_class(chart_type)
+            with timing.stage(timing.STAGE_CHART_NODE, chart_type=chart_type):
+                chart_instance = chart_class(chart_data)
+            self._downsample_chart(chart_instance, chart_type, data)
+            density_grid = self._bin_chart(chart_instance, chart_type, data)
+            with timing.stage(timing.STAGE_TEMPLATE_FILL, chart_type=chart_type):
+                skeleton = apply_density_grid(chart_instance.to_vegalite_skeleton(), density_grid)
+                rows = chart_instance.iter_metadata()
+        except ValueError as e:
+            raise ValueError(f"图表类型错误: {str(e)}")
+        except Exception as e:
+            raise ValueError(f"渲染图表失败: {str(e)}")
+        
+        if not isinstance(output, str):
+            with timing.stage(timing.STAGE_SERIALIZE, indent=self.output_indent, streaming=True):
+                return write_spec_streaming(skeleton, rows, output, indent=self.output_indent, chunk_size=chunk_size)
+        
+        try:
+            # 确保输出目录存在
+            os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+            
+            with open(output, 'w', encoding='utf-8') as f:
+                with timing.stage(timing.STAGE_SERIALIZE, indent=self.output_indent, streaming=True):
+                    return write_spec_streaming(skeleton, rows, f, indent=self.output_indent, chunk_size=chunk_size)
+        except OSError as e:
+            raise IOError(f"保存VegaLite规范失败: {str(e)}")
+    
     def process_file(self, input_path: str, output_path: Optional[str] = None, with_annotations: bool = False) -> str:
         """
         处理单个文件：加载JSON并渲染图表
@@ -339,7 +828,7 @@ class ChartMark:
             with_annotations: 是否处理注释，默认为False
             
         返回:
-            处理成功的文件列表
+            处理成功的文件列表；失败的文件记录为file_failed诊断
         """
         # 确保输出目录存在
         os.makedirs(output_dir, exist_ok=True)
@@ -356,10 +845,113 @@ class ChartMark:
                   self.process_file(input_path, output_path, with_annotations=with_annotations)
                   processed_files.append(filename)
                 except Exception as e:
-                    print(f"处理文件 {filename} 失败: {str(e)}")
+                    diagnostics.warning(diagnostics.CODE_FILE_FAILED, f"处理文件 {filename} 失败: {str(e)}",
+                                        error=str(e))
         
         return processed_files
     
+    def batch_process_parallel(self, input_dir: str, output_dir: str, with_annotations: bool = False,
+                               workers: Optional[int] = None, chunksize: int = 1) -> List[BatchFileResult]:
+        """
+        并行批量处理目录中的所有JSON文件
+        
+        文件按文件名排序后分发到进程池，返回结果的顺序与文件名顺序一致；
+        单个文件失败不会打印，而是记录在对应的结果中
+        
+        参数:
+            input_dir: 输入目录路径
+            output_dir: 输出目录路径
+            with_annotations: 是否处理注释，默认为False
+            workers: 工作进程数，为None时使用CPU核数，为1时在当前进程中串行处理
+            chunksize: 每次分发给工作进程的文件数，文件很多时适当调大可以减少进程间通信开销
+            
+        返回:
+            每个文件的处理结果列表（状态、错误信息、耗时）
+        """
+        # 确保输出目录存在
+        os.makedirs(output_dir, exist_ok=True)
+        
+        tasks = collect_batch_tasks(input_dir, output_dir, with_annotations=with_annotations)
+        
+        return run_batch_tasks(self, tasks, workers=workers, chunksize=chunksize)
+    
+    def batch_process_incremental(self, input_dir: str, output_dir: str, with_annotations: bool = False,
+                                  workers: Optional[int] = 1, chunksize: int = 1,
+                                  manifest_name: str = DEFAULT_MANIFEST_NAME,
+                                  remove_stale: bool = False) -> IncrementalBatchResult:
+        """
+        增量批量处理目录中的所有JSON文件
+        
+        输出目录中保存一份清单，记录每个输入文件的内容哈希、ChartMark版本和渲染选项，
+        只有新增或内容变化的文件会被重新渲染；版本或选项变化时全部重新渲染。
+        输入已被删除的文件对应的输出会作为过期输出报告
+        
+        参数:
+            input_dir: 输入目录路径
+            output_dir: 输出目录路径
+            with_annotations: 是否处理注释，默认为False
+            workers: 工作进程数，含义同batch_process_parallel，默认为1
+            chunksize: 每次分发给工作进程的文件数
+            manifest_name: 清单文件名，保存在输出目录中
+            remove_stale: 是否删除过期输出，默认只报告
+            
+        返回:
+            IncrementalBatchResult，包含重新渲染的结果、跳过的文件和过期输出
+        """
+        # 确保输出目录存在
+        os.makedirs(output_dir, exist_ok=True)
+        
+        return run_incremental_batch(self, input_dir, output_dir, with_annotations=with_annotations,
+                                     workers=workers, chunksize=chunksize,
+                                     manifest_name=manifest_name, remove_stale=remove_stale)
+    
+    def process_jsonl_stream(self, input_stream: TextIO, output_stream: TextIO,
+                             with_annotations: bool = False, flush: bool = False) -> JsonlStreamResult:
+        """
+        流式处理JSONL：每行读取一个ChartMark规范，渲染后立即写出一行VegaLite规范
+        内存占用与语料规模无关，只与单条规范的大小有关
+        
+        参数:
+            input_stream: 文本输入流，如sys.stdin或打开的文件
+            output_stream: 文本输出流，如sys.stdout或打开的文件
+            with_annotations: 是否处理注释，默认为False
+            flush: 是否每写出一行就flush一次
+            
+        返回:
+            处理统计结果，失败的行记录行号和错误信息
+        """
+        return render_jsonl_stream(self, input_stream, output_stream,
+                                   with_annotations=with_annotations, flush=flush)
+    
+    def process_jsonl_file(self, input_path: str, output_path: str,
+                           with_annotations: bool = False) -> JsonlStreamResult:
+        """
+        流式处理JSONL文件，路径为"-"时分别使用标准输入/标准输出
+        
+        参数:
+            input_path: 输入JSONL文件路径，"-"表示标准输入
+            output_path: 输出JSONL文件路径，"-"表示标准输出
+            with_annotations: 是否处理注释，默认为False
+            
+        返回:
+            处理统计结果
+        """
+        if input_path != "-" and not os.path.exists(input_path):
+            raise FileNotFoundError(f"文件不存在: {input_path}")
+        
+        input_stream = sys.stdin if input_path == "-" else open(input_path, 'r', encoding='utf-8')
+        try:
+            if output_path == "-":
+                return self.process_jsonl_stream(input_stream, sys.stdout, with_annotations=with_annotations)
+            
+            # 确保输出目录存在
+            os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+            with open(output_path, 'w', encoding='utf-8') as output_stream:
+                return self.process_jsonl_stream(input_stream, output_stream, with_annotations=with_annotations)
+        finally:
+            if input_stream is not sys.stdin:
+                input_stream.close()
+    
     def get_supported_chart_types(self) -> List[str]:
         """
         获取支持的图表类型列表
@@ -0,0 +1,60 @@
+import itertools
+import json
+from typing import Any, Dict, Iterable, Optional, TextIO
+
+from ChartMark import json_backend
+
+# 每次序列化并写出的行数，内存占用与该值成正比，与总行数无关
+DEFAULT_CHUNK_SIZE = 4096
+
+# 序列化骨架时占据data.values位置的标记
+_VALUES_MARKER = "@@chartmark:data_values@@"
+
+
+def write_spec_streaming(spec: Dict[str, Any], rows: Iterable[Dict[str, Any]], output: TextIO,
+                         indent: Optional[int] = 2, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """
+    流式写出VegaLite规范，data.values由rows逐块序列化，不需要先构建完整的行字典列表
+
+    规范中除data.values以外的部分按indent序列化；data.values中的行以紧凑格式写出，
+    解析结果与把rows作为data.values整体序列化相同
+
+    参数:
+        spec: VegaLite规范字典，必须包含data字典，其中的values会被忽略
+        rows: data.values的行，可以是只能遍历一次的迭代器
+        output: 文本输出流，如打开的文件或socket.makefile("w", encoding="utf-8")
+        indent: 规范骨架的缩进空格数，为None时输出紧凑格式
+        chunk_size: 每次序列化的行数
+
+    返回:
+        写出的行数
+
+    异常:
+        ValueError: spec中没有data字典或chunk_size不是正数
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size必须是正数")
+    data = spec.get("data")
+    if not isinstance(data, dict):
+        raise ValueError("规范中缺少data字段，无法写出data.values")
+
+    # 骨架只复制最外层和data两层字典，其余部分与spec共享
+    skeleton = dict(spec, data=dict(data, values=_VALUES_MARKER))
+    prefix, _, suffix = json_backend.dumps(skeleton, indent=indent).partition(json.dumps(_VALUES_MARKER))
+
+    output.write(prefix)
+    output.write("[")
+    count = 0
+    iterator = iter(rows)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            break
+        if count:
+            output.write(",")
+        # 去掉序列化结果两端的方括号，各块拼接成同一个数组
+        output.write(json_backend.dumps(chunk)[1:-1])
+        count += len(chunk)
+    output.write("]")
+    output.write(suffix)
+    return count
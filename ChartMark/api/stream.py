@@ -0,0 +1,114 @@
+import json
+from dataclasses import dataclass, field
+from typing import Dict, Any, Iterator, List, Tuple, TextIO
+
+from ChartMark import json_backend, timing
+from ChartMark.api.memory import profile_memory
+from ChartMark.diagnostics import DiagnosticsCollector, collect_diagnostics
+
+
+@dataclass
+class JsonlStreamResult:
+    """
+    JSONL流式处理的统计结果
+    只保留失败行的行号和错误信息，内存占用与成功处理的行数无关
+    """
+    processed: int = 0
+    failed: int = 0
+    errors: List[Tuple[int, str]] = field(default_factory=list)  # (行号, 错误信息)
+    # 诊断信息按Diagnostic.key聚合的次数，如{"technique_failed/highlight/bounding_box": 3}
+    warning_counts: Dict[str, int] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "errors": [{"line": line_no, "error": error} for line_no, error in self.errors],
+            "warning_counts": self.warning_counts
+        }
+
+
+def iter_jsonl_specs(input_stream: TextIO) -> Iterator[Tuple[int, Any]]:
+    """
+    逐行读取JSONL流，跳过空行
+
+    参数:
+        input_stream: 文本输入流
+
+    返回:
+        (行号, 解析后的对象或解析异常) 的迭代器，行号从1开始
+    """
+    for line_no, line in enumerate(input_stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            with timing.stage(timing.STAGE_LOAD_JSON, line=line_no):
+                data = json_backend.loads(line)
+        except json.JSONDecodeError as e:
+            yield line_no, e
+            continue
+        yield line_no, data
+
+
+def _write_line(output_stream: TextIO, vegalite_spec: str) -> str:
+    output_stream.write(vegalite_spec)
+    output_stream.write("\n")
+    return vegalite_spec
+
+
+def render_jsonl_stream(service, input_stream: TextIO, output_stream: TextIO,
+                        with_annotations: bool = False, flush: bool = False) -> JsonlStreamResult:
+    """
+    逐行渲染JSONL流中的ChartMark规范，并逐行写出紧凑格式的VegaLite规范
+    每次只在内存中保留一条规范；失败的行不会写出，而是记录在返回结果中。
+    service启用profile_memory时，每行的内存测量结果汇总到service.memory_report；
+    渲染中的诊断信息不写入日志，而是按类型聚合到结果的warning_counts
+
+    参数:
+        service: ChartMark实例
+        input_stream: 文本输入流，每行一个ChartMark规范
+        output_stream: 文本输出流，每行一个VegaLite规范
+        with_annotations: 是否处理注释
+        flush: 是否在每行写出后立即flush，便于下游管道实时读取
+
+    返回:
+        JsonlStreamResult统计结果
+    """
+    result = JsonlStreamResult()
+    # 所有行共享一个收集器，只保留聚合后的次数
+    collector = DiagnosticsCollector()
+
+    for line_no, data in iter_jsonl_specs(input_stream):
+        try:
+            if isinstance(data, Exception):
+                raise ValueError(f"JSON格式错误: {str(data)}")
+            if not isinstance(data, dict):
+                raise ValueError("每行必须是一个JSON对象")
+
+            def render() -> str:
+                if with_annotations:
+                    vegalite_dict = service.render_annotations_dict(data)
+                else:
+                    vegalite_dict = service.render_original_chart_dict(data)
+                return service.serialize_vegalite_spec(vegalite_dict, indent=None)
+
+            memory_report = getattr(service, "memory_report", None)
+            with collect_diagnostics(collector):
+                if memory_report is not None:
+                    # 写出放在测量内，使输出字符串计入结果内存后再释放
+                    memory_report.add(profile_memory(f"line {line_no}", lambda: _write_line(output_stream, render())))
+                else:
+                    _write_line(output_stream, render())
+            if flush:
+                output_stream.flush()
+            result.processed += 1
+        except Exception as e:
+            result.failed += 1
+            result.errors.append((line_no, str(e)))
+        finally:
+            for diagnostic in collector.diagnostics:
+                result.warning_counts[diagnostic.key] = result.warning_counts.get(diagnostic.key, 0) + 1
+            collector.diagnostics.clear()
+
+    return result
@@ -0,0 +1,29 @@
+from ChartMark.benchmark.runner import (
+    DEFAULT_SIZES,
+    BenchmarkResult,
+    BenchmarkReport,
+    BenchmarkComparison,
+    run_case,
+    run_benchmarks,
+    compare_reports
+)
+from ChartMark.benchmark.generator import WorkloadGenerator, list_techniques, build_annotation, write_jsonl
+from ChartMark.benchmark.workloads import CHART_TYPES, ANNOTATION_CASES, build_chart, get_case_names
+
+__all__ = [
+    'DEFAULT_SIZES',
+    'BenchmarkResult',
+    'BenchmarkReport',
+    'BenchmarkComparison',
+    'run_case',
+    'run_benchmarks',
+    'compare_reports',
+    'WorkloadGenerator',
+    'list_techniques',
+    'build_annotation',
+    'write_jsonl',
+    'CHART_TYPES',
+    'ANNOTATION_CASES',
+    'build_chart',
+    'get_case_names'
+]
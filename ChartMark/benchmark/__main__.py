@@ -0,0 +1,160 @@
+import argparse
+import sys
+from typing import List, Optional
+
+from ChartMark.benchmark.runner import (
+    DEFAULT_SIZES,
+    BenchmarkReport,
+    BenchmarkResult,
+    compare_reports,
+    run_benchmarks
+)
+from ChartMark.benchmark.generator import WorkloadGenerator, write_jsonl
+from ChartMark.benchmark.workloads import CHART_TYPES, get_case_names
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_REGRESSION = 2
+
+
+def _split(value: Optional[str]) -> Optional[List[str]]:
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _format_bytes(value: Optional[int]) -> str:
+    if value is None:
+        return "-"
+    if value >= 1024 * 1024:
+        return f"{value / 1024 / 1024:.1f}MB"
+    return f"{value / 1024:.1f}KB"
+
+
+def _print_result(result: BenchmarkResult) -> None:
+    if result.error is not None:
+        print(f"{result.chart_type:<14}{result.case:<38}{result.rows:>9}  错误: {result.error}", file=sys.stderr)
+        return
+    print(
+        f"{result.chart_type:<14}{result.case:<38}{result.rows:>9}"
+        f"  p50 {result.p50 * 1000:>10.3f}ms  p99 {result.p99 * 1000:>10.3f}ms"
+        f"  {result.rows_per_second:>12.0f} rows/s  peak {_format_bytes(result.peak_memory_bytes):>9}",
+        file=sys.stderr
+    )
+
+
+def _cmd_run(args: argparse.Namespace) -> int:
+    service_options = {"compose_in_place": args.compose_in_place, "compact_output": args.compact}
+    try:
+        sizes = [int(size) for size in _split(args.sizes)] if args.sizes else list(DEFAULT_SIZES)
+    except ValueError:
+        print(f"错误: 无效的数据量: {args.sizes}", file=sys.stderr)
+        return EXIT_FAILED
+    report = run_benchmarks(
+        chart_types=_split(args.charts), cases=_split(args.cases), sizes=sizes,
+        service_options=service_options, progress=None if args.quiet else _print_result,
+        min_time=args.min_time, min_iterations=args.min_iterations, max_iterations=args.max_iterations,
+        measure_memory=not args.no_memory
+    )
+    if args.output:
+        report.save(args.output)
+    return EXIT_FAILED if any(result.error for result in report.results) else EXIT_OK
+
+
+def _cmd_compare(args: argparse.Namespace) -> int:
+    comparisons = compare_reports(BenchmarkReport.load(args.baseline), BenchmarkReport.load(args.current))
+    regressions = [comparison for comparison in comparisons if comparison.ratio > 1 + args.threshold]
+    for comparison in comparisons[:args.limit]:
+        marker = "!" if comparison in regressions else " "
+        print(f"{marker} {comparison.key:<70} {comparison.baseline_p50 * 1000:>10.3f}ms"
+              f" -> {comparison.current_p50 * 1000:>10.3f}ms  x{comparison.ratio:.2f}")
+    print(f"{len(regressions)} 个用例变慢超过 {args.threshold:.0%}（共对比 {len(comparisons)} 个用例）")
+    return EXIT_REGRESSION if regressions else EXIT_OK
+
+
+def _cmd_generate(args: argparse.Namespace) -> int:
+    generator = WorkloadGenerator(
+        seed=args.seed, rows=args.rows, groups=args.groups, annotations=args.annotations,
+        filter_depth=args.filter_depth, filter_width=args.filter_width
+    )
+    specs = generator.specs(args.count, chart_types=_split(args.charts))
+    if args.output in (None, "-"):
+        write_jsonl(specs, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            write_jsonl(specs, f)
+    return EXIT_OK
+
+
+def _cmd_list(args: argparse.Namespace) -> int:
+    print("charts: " + ", ".join(CHART_TYPES))
+    print("cases:")
+    for case in get_case_names():
+        print(f"  {case}")
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="python -m ChartMark.benchmark", description="ChartMark渲染基准测试")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="运行基准测试")
+    run_parser.add_argument("--charts", default=None, help="逗号分隔的图表类型，默认全部")
+    run_parser.add_argument("--cases", default=None,
+                            help="逗号分隔的用例名称或任务前缀（如summary、reference/extra_line），默认全部")
+    run_parser.add_argument("--sizes", default=None,
+                            help=f"逗号分隔的数据量，默认{','.join(str(size) for size in DEFAULT_SIZES)}")
+    run_parser.add_argument("--min-time", type=float, default=1.0, help="每个用例的最短测量时间（秒）")
+    run_parser.add_argument("--min-iterations", type=int, default=3, help="每个用例的最少测量次数")
+    run_parser.add_argument("--max-iterations", type=int, default=1000, help="每个用例的最多测量次数")
+    run_parser.add_argument("--no-memory", action="store_true", help="不测量峰值内存")
+    run_parser.add_argument("--compose-in-place", action="store_true", help="启用合成模式渲染注释")
+    run_parser.add_argument("--compact", action="store_true", help="输出紧凑JSON")
+    run_parser.add_argument("-o", "--output", default=None, help="结果JSON文件路径")
+    run_parser.add_argument("-q", "--quiet", action="store_true", help="不输出每个用例的结果")
+    run_parser.set_defaults(handler=_cmd_run)
+
+    compare_parser = subparsers.add_parser("compare", help="对比两次运行的结果")
+    compare_parser.add_argument("baseline", help="基线结果JSON文件")
+    compare_parser.add_argument("current", help="当前结果JSON文件")
+    compare_parser.add_argument("--threshold", type=float, default=0.1, help="p50变慢超过该比例视为退化")
+    compare_parser.add_argument("--limit", type=int, default=20, help="输出的用例数")
+    compare_parser.set_defaults(handler=_cmd_compare)
+
+    generate_parser = subparsers.add_parser("generate", help="生成可复现的合成ChartMark规范（JSONL）")
+    generate_parser.add_argument("-n", "--count", type=int, default=100, help="规范个数")
+    generate_parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    generate_parser.add_argument("--charts", default=None, help="逗号分隔的图表类型，按顺序轮转，默认全部")
+    generate_parser.add_argument("--rows", type=int, default=100, help="每个图表的数据项总数")
+    generate_parser.add_argument("--groups", type=int, default=3, help="分组图表的分组数")
+    generate_parser.add_argument("--annotations", type=int, default=3, help="每个规范的注释数")
+    generate_parser.add_argument("--filter-depth", type=int, default=1, help="筛选条件and/or/not的嵌套深度")
+    generate_parser.add_argument("--filter-width", type=int, default=2, help="and/or的操作数个数")
+    generate_parser.add_argument("-o", "--output", default=None, help="输出JSONL文件，默认标准输出")
+    generate_parser.set_defaults(handler=_cmd_generate)
+
+    list_parser = subparsers.add_parser("list", help="列出图表类型和用例")
+    list_parser.set_defaults(handler=_cmd_list)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    基准测试命令行入口
+
+    返回:
+        退出码：0表示成功，1表示有用例执行失败，2表示对比发现性能退化
+    """
+    args = build_parser().parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, ValueError) as e:
+        print(f"错误: {str(e)}", file=sys.stderr)
+        return EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,506 @@
+import functools
+import random
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional, Iterator, Iterable, Tuple, Callable, TextIO
+
+from ChartMark import json_backend
+
+# 技术的标识: (注释类型, 子类型, 技术名称)，技术不按子类型分组的注释子类型为None
+TechniqueKey = Tuple[str, Optional[str], str]
+
+# 生成器覆盖的图表类型，与CHART_ROUTER中的内置类型一致
+CHART_TYPES: Tuple[str, ...] = ("bar", "scatter", "line", "pie", "group_bar", "group_line", "group_scatter")
+
+# 各图表类型的筛选条件可用的轴类型，与LogicalExpression._validate_axis_type_for_chart一致
+FILTER_AXIS_TYPES: Dict[str, Tuple[str, ...]] = {
+    "bar": ("category", "quantity"),
+    "pie": ("category", "quantity"),
+    "line": ("temporal", "quantity"),
+    "scatter": ("x_quantity", "y_quantity"),
+    "group_bar": ("category", "quantity", "group"),
+    "group_line": ("temporal", "quantity", "group"),
+    "group_scatter": ("x_quantity", "y_quantity", "group"),
+}
+
+# 数值数据的取值范围
+VALUE_MIN = 0.0
+VALUE_MAX = 100.0
+
+_START_DATE = date(2000, 1, 1)
+_MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+_COLORS = ("red", "blue", "green", "orange", "purple", "black", "gray")
+
+
+def list_techniques() -> List[TechniqueKey]:
+    """
+    列出注释路由中注册的全部技术（包含入口点注册的第三方技术）
+
+    返回:
+        (注释类型, 子类型, 技术名称)列表
+    """
+    from ChartMark.router.annotation_router import get_annotation_class, get_supported_annotation_types
+
+    techniques: List[TechniqueKey] = []
+    for annotation_type in get_supported_annotation_types():
+        technique_classes = getattr(get_annotation_class(annotation_type), "TECHNIQUE_CLASSES", {})
+        for key, value in technique_classes.items():
+            if isinstance(value, dict):
+                techniques.extend((annotation_type, key, name) for name in value)
+            else:
+                techniques.append((annotation_type, None, key))
+    return techniques
+
+
+def get_technique_class(technique: TechniqueKey) -> Optional[type]:
+    """获取技术对应的技术类，不存在时返回None"""
+    from ChartMark.router.annotation_router import get_annotation_class
+
+    annotation_type, subtype, name = technique
+    technique_classes = getattr(get_annotation_class(annotation_type), "TECHNIQUE_CLASSES", {})
+    if subtype is not None:
+        return technique_classes.get(subtype, {}).get(name)
+    return technique_classes.get(name)
+
+
+def supports_chart_type(technique: TechniqueKey, chart_type: str) -> bool:
+    """
+    技术是否支持指定的图表类型
+
+    内置技术按图表类型实现_<chart_type>_parse_to_vegalite方法，以此初步判断；
+    没有按图表类型拆分实现的技术视为支持全部图表类型。
+    实现了方法但实际无法渲染的组合（如饼图上的reference/shadow）由probe_technique排除
+    """
+    technique_class = get_technique_class(technique)
+    if technique_class is None:
+        return False
+    per_chart = [chart for chart in CHART_TYPES if hasattr(technique_class, f"_{chart}_parse_to_vegalite")]
+    if per_chart and chart_type not in per_chart:
+        return False
+    return not has_annotation_template(technique) or probe_technique(technique, chart_type)
+
+
+@functools.lru_cache(maxsize=None)
+def probe_technique(technique: TechniqueKey, chart_type: str) -> bool:
+    """
+    在小图表上试渲染一次使用该技术的注释，没有产生任何诊断信息时视为可用，结果按组合缓存
+
+    参数:
+        technique: (注释类型, 子类型, 技术名称)，需有构造模板
+        chart_type: 图表类型
+
+    返回:
+        技术在该图表类型上是否能正常渲染
+    """
+    from ChartMark.api.service import ChartMark
+
+    # 使用独立的生成器，不影响调用方生成器的随机序列
+    generator = WorkloadGenerator(seed=0, rows=12, groups=2)
+    chart = generator.chart(chart_type)
+    spec = {"chart": chart, "annotations": [generator.annotation(chart, technique)]}
+    try:
+        result = ChartMark().render_with_diagnostics(spec)
+    except ValueError:
+        return False
+    return not result.diagnostics
+
+
+def has_annotation_template(technique: TechniqueKey) -> bool:
+    """技术是否有build_annotation可用的构造模板"""
+    return (technique[0], technique[2]) in _TECHNIQUE_BUILDERS
+
+
+def build_annotation(technique: TechniqueKey, filter_obj: Optional[Dict[str, Any]] = None,
+                     coordinates: Optional[Dict[str, Any]] = None, color: str = "red",
+                     annotation_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    构造只包含一个技术的注释
+
+    参数:
+        technique: (注释类型, 子类型, 技术名称)
+        filter_obj: data_items目标的筛选条件，为None时不筛选
+        coordinates: coordinate目标的坐标，需包含技术要求的x/x1/y/y1
+        color: 标记颜色
+        annotation_id: 注释id，默认由注释类型和技术名称组成
+
+    返回:
+        注释字典
+
+    异常:
+        ValueError: 没有该技术的构造模板
+    """
+    annotation_type, subtype, name = technique
+    builder = _TECHNIQUE_BUILDERS.get((annotation_type, name))
+    if builder is None:
+        raise ValueError(f"没有技术 {annotation_type}/{name} 的构造模板")
+
+    data_items: Dict[str, Any] = {"type": "data_items"}
+    if filter_obj is not None:
+        data_items["filter"] = filter_obj
+    source, technique_dict, data = builder(subtype, data_items, coordinates or {}, color)
+    technique_dict = {"name": name, **technique_dict}
+
+    method: Dict[str, Any] = {"type": annotation_type}
+    if subtype is not None:
+        method["subType"] = subtype
+    return {
+        "id": annotation_id or f"{annotation_type}-{subtype or name}",
+        "method": method,
+        "data": data if data is not None else {"source": source},
+        "techniques": [technique_dict]
+    }
+
+
+def _highlight_opacity(subtype, data_items, coordinates, color):
+    return "internal", {"target": data_items, "marker": {"opacity": {"selected": 1, "other": 0.3}}}, None
+
+
+def _highlight_stroke(subtype, data_items, coordinates, color):
+    return "internal", {"target": data_items, "marker": {"stroke": {"width": 2, "color": color}}}, None
+
+
+def _encoding_label(subtype, data_items, coordinates, color):
+    return "internal", {"target": data_items, "marker": {"text": {"field": "y", "color": color}}}, None
+
+
+def _reference_grid_line(subtype, data_items, coordinates, color):
+    return "none", {"target": {"type": "chart_element", "yAxis": {"grid": True, "tickCount": 5}}}, None
+
+
+def _reference_data_line(subtype, data_items, coordinates, color):
+    return "internal", {"target": data_items, "marker": {"line": {"color": color, "size": 1}}}, None
+
+
+def _reference_label_line(subtype, data_items, coordinates, color):
+    target = {"type": "coordinate", "xyCoordinate": {"y": coordinates.get("y", 50)}}
+    return "external", {"target": target, "marker": {"line": {"color": color}, "text": {"field": "target"}}}, None
+
+
+def _reference_shadow(subtype, data_items, coordinates, color):
+    target = {"type": "coordinate", "xyCoordinate": {"y": coordinates.get("y", 25), "y1": coordinates.get("y1", 75)}}
+    return "external", {"target": target, "marker": {"rect": {"color": "gray", "opacity": 0.3}}}, None
+
+
+def _reference_bounding_box(subtype, data_items, coordinates, color):
+    xy = {axis: coordinates.get(axis, default) for axis, default in (("x", 10), ("x1", 40), ("y", 25), ("y1", 75))}
+    target = {"type": "coordinate", "xyCoordinate": xy}
+    return "external", {"target": target, "marker": {"rect": {"stroke": color, "strokeWidth": 2}}}, None
+
+
+def _summary(subtype, data_items, coordinates, color):
+    return "derived", {"target": {"type": "data_items"}, "marker": {
+        "line": {"color": color, "size": 2}, "text": {"field": subtype, "color": "black"}
+    }}, None
+
+
+def _summary_stroke(subtype, data_items, coordinates, color):
+    return "derived", {"target": {"type": "data_items"}, "marker": {
+        "stroke": {"width": 2, "color": color}, "text": {"field": subtype}
+    }}, None
+
+
+def _trend_linear_regression(subtype, data_items, coordinates, color):
+    return "derived", {"target": {"type": "data_items"}, "marker": {
+        "line": {"color": color}, "text": {"field": "trend"}
+    }}, None
+
+
+def _description_note(subtype, data_items, coordinates, color, stroke: bool = False):
+    data = {"source": "external", "value": {"type": "text", "content": "Note"}}
+    target = {"type": "chart_element"} if subtype == "global_note" else data_items
+    marker: Dict[str, Any] = {"text": {"field": "note"}}
+    if stroke:
+        marker["stroke"] = {"color": color}
+    else:
+        marker["rect"] = {"color": "lightgray"}
+    return "external", {"target": target, "data": dict(data, value=dict(data["value"])), "marker": marker}, data
+
+
+# (注释类型, 技术名称) -> 构造函数(subtype, data_items目标, 坐标, 颜色) -> (数据来源, 技术字典, 注释data)
+_TECHNIQUE_BUILDERS: Dict[Tuple[str, str], Callable] = {
+    ("highlight", "opacity"): _highlight_opacity,
+    ("highlight", "stroke"): _highlight_stroke,
+    ("encoding", "label"): _encoding_label,
+    ("reference", "grid_line"): _reference_grid_line,
+    ("reference", "data_line"): _reference_data_line,
+    ("reference", "label_line"): _reference_label_line,
+    ("reference", "shadow"): _reference_shadow,
+    ("reference", "bounding_box"): _reference_bounding_box,
+    ("summary", "label_line"): _summary,
+    ("summary", "stroke"): _summary_stroke,
+    ("trend", "linear_regression"): _trend_linear_regression,
+    ("description", "in_plot"): lambda *args: _description_note(*args, stroke=True),
+    ("description", "out_plot"): _description_note,
+}
+
+
+class WorkloadGenerator:
+    """
+    可复现的ChartMark规范生成器，用于压力测试和基准测试
+
+    相同的种子和参数生成完全相同的规范序列。数据量、分组数、每个规范的注释数
+    和筛选条件的嵌套深度/宽度都可以调整。specs按轮转的方式选择图表类型和技术，
+    生成足够多的规范时会覆盖每个图表类型支持的全部技术
+
+    使用示例:
+    ```python
+    generator = WorkloadGenerator(seed=42, rows=10000, annotations=5, filter_depth=3)
+    for spec in generator.specs(100):
+        chart_mark.render_annotations(spec)
+    ```
+    """
+
+    def __init__(self, seed: int = 0, rows: int = 100, groups: int = 3, annotations: int = 3,
+                 filter_depth: int = 1, filter_width: int = 2):
+        """
+        参数:
+            seed: 随机种子
+            rows: 每个图表的数据项总数，分组图表平均分配到各组
+            groups: 分组图表的分组数（classify的长度）
+            annotations: 每个规范的注释数
+            filter_depth: 筛选条件的逻辑运算嵌套深度，1表示只有顶层的and/or/not
+            filter_width: and/or运算的操作数个数
+
+        异常:
+            ValueError: 参数无效
+        """
+        if rows < 1:
+            raise ValueError("rows必须大于等于1")
+        if groups < 1:
+            raise ValueError("groups必须大于等于1")
+        if annotations < 0:
+            raise ValueError("annotations必须大于等于0")
+        if filter_depth < 1:
+            raise ValueError("filter_depth必须大于等于1")
+        if filter_width < 1:
+            raise ValueError("filter_width必须大于等于1")
+
+        self.seed = seed
+        self.rows = rows
+        self.groups = groups
+        self.annotations = annotations
+        self.filter_depth = filter_depth
+        self.filter_width = filter_width
+        self.rng = random.Random(seed)
+        self._technique_cursor: Dict[str, int] = {}
+        self._techniques: Optional[List[TechniqueKey]] = None
+
+    def _values(self, count: int) -> List[float]:
+        return [round(self.rng.uniform(VALUE_MIN, VALUE_MAX), 2) for _ in range(count)]
+
+    def _walk(self, count: int) -> List[float]:
+        """在取值范围内的随机游走，模拟时间序列"""
+        value = self.rng.uniform(VALUE_MIN, VALUE_MAX)
+        values = []
+        for _ in range(count):
+            value = min(VALUE_MAX, max(VALUE_MIN, value + self.rng.gauss(0, 3)))
+            values.append(round(value, 2))
+        return values
+
+    def chart(self, chart_type: str, rows: Optional[int] = None) -> Dict[str, Any]:
+        """
+        生成chart字段
+
+        参数:
+            chart_type: 图表类型
+            rows: 数据项总数，为None时使用生成器的rows
+
+        返回:
+            chart字典
+
+        异常:
+            ValueError: 不支持的图表类型
+        """
+        if chart_type not in CHART_TYPES:
+            raise ValueError(f"不支持的图表类型: {chart_type}")
+        rows = rows or self.rows
+        chart: Dict[str, Any] = {"title": f"Synthetic {chart_type} ({rows} rows)", "type": chart_type}
+
+        if chart_type.startswith("group_"):
+            per_group = max(1, rows // self.groups)
+            classify = [f"Group {i}" for i in range(self.groups)]
+            chart.update({"x_name": "X", "y_name": "Y", "classify_name": "Group", "classify": classify})
+            if chart_type == "group_scatter":
+                chart["x_data"] = [self._values(per_group) for _ in classify]
+                chart["y_data"] = [self._values(per_group) for _ in classify]
+            elif chart_type == "group_line":
+                chart["x_data"] = [(_START_DATE + timedelta(days=i)).isoformat() for i in range(per_group)]
+                chart["y_data"] = [self._walk(per_group) for _ in classify]
+            else:
+                chart["x_data"] = [f"Category {i}" for i in range(per_group)]
+                chart["y_data"] = [self._values(per_group) for _ in classify]
+            return chart
+
+        chart.update({"x_name": "X", "y_name": "Y"})
+        if chart_type == "scatter":
+            x_data = self._values(rows)
+            slope = self.rng.uniform(-1, 1)
+            chart["x_data"] = x_data
+            chart["y_data"] = [
+                round(min(VALUE_MAX, max(VALUE_MIN, 50 + slope * (x - 50) + self.rng.gauss(0, 10))), 2)
+                for x in x_data
+            ]
+        elif chart_type == "line":
+            chart["x_data"] = [(_START_DATE + timedelta(days=i)).isoformat() for i in range(rows)]
+            chart["y_data"] = self._walk(rows)
+        else:
+            chart["x_data"] = [f"Category {i}" for i in range(rows)]
+            chart["y_data"] = self._values(rows)
+        return chart
+
+    def _date_value(self, chart: Dict[str, Any]) -> Dict[str, Any]:
+        """在图表日期范围内随机取一天，返回ChartMark日期字典"""
+        x_data = chart["x_data"]
+        day = date.fromisoformat(x_data[self.rng.randrange(len(x_data))])
+        return {"year": day.year, "month": _MONTHS[day.month - 1], "date": day.day}
+
+    def _filter_item(self, chart: Dict[str, Any], axis_type: str) -> Dict[str, Any]:
+        """生成单个筛选条件项"""
+        if axis_type in ("category", "group"):
+            values = chart["classify"] if axis_type == "group" else chart["x_data"]
+            count = self.rng.randint(1, min(3, len(values)))
+            return {"axisType": axis_type, "oneOf": self.rng.sample(values, count)}
+
+        if axis_type == "temporal":
+            first, second = self._date_value(chart), self._date_value(chart)
+            if (first["year"], _MONTHS.index(first["month"]), first["date"]) > \
+                    (second["year"], _MONTHS.index(second["month"]), second["date"]):
+                first, second = second, first
+            if self.rng.random() < 0.5:
+                return {"axisType": axis_type, "range": [first, second]}
+            return {"axisType": axis_type, self.rng.choice(("gt", "gte", "lt", "lte")): first}
+
+        low, high = sorted(round(self.rng.uniform(VALUE_MIN, VALUE_MAX), 1) for _ in range(2))
+        if low == high:
+            high = low + 1
+        if self.rng.random() < 0.5:
+            return {"axisType": axis_type, "range": [low, high]}
+        return {"axisType": axis_type, self.rng.choice(("gt", "gte", "lt", "lte")): low}
+
+    def filter(self, chart: Dict[str, Any], depth: Optional[int] = None) -> Dict[str, Any]:
+        """
+        生成嵌套的and/or/not筛选条件
+
+        参数:
+            chart: 由chart()生成的chart字典
+            depth: 嵌套深度，为None时使用生成器的filter_depth
+
+        返回:
+            FilterNode可解析的筛选条件字典
+        """
+        depth = depth or self.filter_depth
+        axis_types = FILTER_AXIS_TYPES[chart["type"]]
+        operator = self.rng.choice(("and", "or", "not"))
+        count = 1 if operator == "not" else self.filter_width
+        operands = []
+        for _ in range(count):
+            if depth > 1:
+                operands.append(self.filter(chart, depth - 1))
+            else:
+                operands.append(self._filter_item(chart, self.rng.choice(axis_types)))
+        return {operator: operands}
+
+    def _coordinates(self, chart: Dict[str, Any]) -> Dict[str, Any]:
+        """为coordinate目标生成落在数据范围内的坐标"""
+        y, y1 = sorted(round(self.rng.uniform(VALUE_MIN, VALUE_MAX), 1) for _ in range(2))
+        coordinates: Dict[str, Any] = {"y": y, "y1": y1 if y1 > y else y + 1}
+        if chart["type"] in ("line", "group_line"):
+            first, second = sorted(self.rng.randrange(len(chart["x_data"])) for _ in range(2))
+            second = max(second, first + 1)
+            coordinates["x"] = self._date_from_index(first)
+            coordinates["x1"] = self._date_from_index(second)
+        else:
+            x, x1 = sorted(round(self.rng.uniform(VALUE_MIN, VALUE_MAX), 1) for _ in range(2))
+            coordinates["x"] = x
+            coordinates["x1"] = x1 if x1 > x else x + 1
+        return coordinates
+
+    @staticmethod
+    def _date_from_index(index: int) -> Dict[str, Any]:
+        day = _START_DATE + timedelta(days=index)
+        return {"year": day.year, "month": _MONTHS[day.month - 1], "date": day.day}
+
+    def techniques_for(self, chart_type: str) -> List[TechniqueKey]:
+        """获取支持指定图表类型且有构造模板的技术"""
+        if self._techniques is None:
+            self._techniques = [
+                technique for technique in list_techniques()
+                if has_annotation_template(technique)
+            ]
+        return [technique for technique in self._techniques if supports_chart_type(technique, chart_type)]
+
+    def annotation(self, chart: Dict[str, Any], technique: TechniqueKey, index: int = 0) -> Dict[str, Any]:
+        """
+        为图表生成使用指定技术的注释
+
+        参数:
+            chart: 由chart()生成的chart字典
+            technique: (注释类型, 子类型, 技术名称)
+            index: 注释序号，用于生成id
+
+        返回:
+            注释字典
+        """
+        return build_annotation(
+            technique,
+            filter_obj=self.filter(chart),
+            coordinates=self._coordinates(chart),
+            color=self.rng.choice(_COLORS),
+            annotation_id=f"a{index}"
+        )
+
+    def spec(self, chart_type: Optional[str] = None,
+             techniques: Optional[Iterable[TechniqueKey]] = None) -> Dict[str, Any]:
+        """
+        生成一个完整的ChartMark规范
+
+        参数:
+            chart_type: 图表类型，为None时随机选择
+            techniques: 使用的技术，为None时按轮转顺序从该图表类型支持的技术中选取annotations个
+
+        返回:
+            ChartMark规范字典
+        """
+        chart_type = chart_type or self.rng.choice(CHART_TYPES)
+        chart = self.chart(chart_type)
+        if techniques is None:
+            candidates = self.techniques_for(chart_type)
+            cursor = self._technique_cursor.get(chart_type, 0)
+            techniques = [candidates[(cursor + i) % len(candidates)] for i in range(self.annotations)] \
+                if candidates else []
+            self._technique_cursor[chart_type] = cursor + len(techniques)
+        annotations = [self.annotation(chart, technique, index) for index, technique in enumerate(techniques)]
+        return {"chart": chart, "annotations": annotations}
+
+    def specs(self, count: int, chart_types: Optional[Iterable[str]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        依次生成count个规范，图表类型按chart_types轮转
+
+        参数:
+            count: 规范个数
+            chart_types: 图表类型，为None时使用全部内置类型
+
+        返回:
+            ChartMark规范的迭代器
+        """
+        chart_types = list(chart_types or CHART_TYPES)
+        for i in range(count):
+            yield self.spec(chart_types[i % len(chart_types)])
+
+
+def write_jsonl(specs: Iterable[Dict[str, Any]], output_stream: TextIO) -> int:
+    """
+    将规范逐行写为JSONL
+
+    参数:
+        specs: ChartMark规范的可迭代对象
+        output_stream: 文本输出流
+
+    返回:
+        写出的行数
+    """
+    count = 0
+    for spec in specs:
+        output_stream.write(json_backend.dumps(spec))
+        output_stream.write("\n")
+        count += 1
+    return count
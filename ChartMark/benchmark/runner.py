@@ -0,0 +1,334 @@
+import contextlib
+import math
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Iterable, Callable, Tuple
+
+from ChartMark.version import __version__
+from ChartMark import json_backend
+from ChartMark.benchmark.workloads import (
+    CHART_TYPES,
+    ORIGINAL_CASE,
+    build_chart,
+    get_case_names,
+    get_case_annotations
+)
+
+# 默认的数据量档位（数据项总数）
+DEFAULT_SIZES = (10, 100, 1_000, 10_000, 100_000, 1_000_000)
+
+# 基准测试结果文件的格式版本，字段不兼容变更时递增
+REPORT_FORMAT_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    单个基准测试用例（图表类型 × 注释用例 × 数据量）的测量结果，时间单位为秒
+    """
+    chart_type: str
+    case: str
+    rows: int
+    method: str  # render_original_chart或render_annotations
+    iterations: int = 0
+    total_time: float = 0.0
+    mean: float = 0.0
+    p50: float = 0.0
+    p99: float = 0.0
+    min: float = 0.0
+    max: float = 0.0
+    specs_per_second: float = 0.0
+    rows_per_second: float = 0.0
+    peak_memory_bytes: Optional[int] = None  # 单次渲染的tracemalloc峰值，未测量时为None
+    error: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        """用于在不同运行之间匹配同一用例的键"""
+        return f"{self.chart_type}|{self.case}|{self.rows}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class BenchmarkReport:
+    """
+    一次基准测试运行的全部结果及运行环境信息
+    """
+    results: List[BenchmarkResult] = field(default_factory=list)
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "format_version": REPORT_FORMAT_VERSION,
+            "meta": self.meta,
+            "results": [result.to_dict() for result in self.results]
+        }
+
+    def save(self, path: str) -> None:
+        """保存为JSON文件"""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json_backend.dumps(self.to_dict(), indent=2))
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "BenchmarkReport":
+        if data.get("format_version") != REPORT_FORMAT_VERSION:
+            raise ValueError(f"不支持的基准测试结果格式版本: {data.get('format_version')}")
+        return cls(
+            results=[BenchmarkResult(**result) for result in data.get("results", [])],
+            meta=data.get("meta", {})
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BenchmarkReport":
+        """从JSON文件加载"""
+        with open(path, 'rb') as f:
+            return cls.from_dict(json_backend.load(f))
+
+
+@dataclass
+class BenchmarkComparison:
+    """
+    两次运行中同一用例的p50对比结果
+    """
+    key: str
+    baseline_p50: float
+    current_p50: float
+
+    @property
+    def ratio(self) -> float:
+        """当前p50与基线p50之比，大于1表示变慢"""
+        if self.baseline_p50 <= 0:
+            return math.inf if self.current_p50 > 0 else 1.0
+        return self.current_p50 / self.baseline_p50
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    最近秩法计算百分位数
+
+    参数:
+        sorted_values: 升序排列的样本
+        q: 0到1之间的分位
+
+    返回:
+        分位数，样本为空时返回0
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def collect_environment(service_options: Dict[str, Any]) -> Dict[str, Any]:
+    """收集运行环境信息，写入结果文件便于对比不同运行"""
+    return {
+        "chartmark_version": __version__,
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "json_backend": json_backend.get_json_backend().name,
+        "service_options": service_options,
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds")
+    }
+
+
+def _build_render(service, chart: Dict[str, Any], annotations: Optional[List[Dict[str, Any]]],
+                  chart_type: str, case: str) -> Tuple[Callable[[], Dict[str, Any]], Callable[[Dict[str, Any]], Any]]:
+    """
+    构造渲染输入和渲染调用
+    注释在渲染时可能被修改，每次渲染前都要调用prepare生成新的副本，副本的拷贝不计入渲染耗时
+
+    返回:
+        (prepare, render)，render(prepare())执行一次渲染
+    """
+    if annotations is None:
+        data = {"chart": chart}
+        return (lambda: data), service.render_original_chart
+
+    def prepare() -> Dict[str, Any]:
+        return {"chart": chart, "annotations": get_case_annotations(case, chart_type)}
+    return prepare, service.render_annotations
+
+
+def _measure_peak_memory(render: Callable[[], Any]) -> int:
+    """在tracemalloc下执行一次渲染，返回分配峰值（字节）"""
+    was_tracing = tracemalloc.is_tracing()
+    if not was_tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = render()
+        _, peak = tracemalloc.get_traced_memory()
+        del result
+        return peak - baseline
+    finally:
+        if not was_tracing:
+            tracemalloc.stop()
+
+
+def run_case(service, chart_type: str, case: str, rows: int, min_time: float = 1.0,
+             min_iterations: int = 3, max_iterations: int = 1000, measure_memory: bool = True,
+             groups: Optional[int] = None, seed: int = 0) -> BenchmarkResult:
+    """
+    测量单个用例
+
+    先预热一次，然后重复渲染直到累计时间超过min_time（至少min_iterations次，最多max_iterations次）。
+    峰值内存在计时结束后单独测量一次，tracemalloc的开销不计入耗时。
+    渲染过程中输出到标准输出的信息被丢弃
+
+    参数:
+        service: ChartMark实例，应关闭渲染缓存，否则测到的是缓存命中
+        chart_type: 图表类型
+        case: 注释用例名称，见workloads.get_case_names
+        rows: 数据项总数
+        min_time: 每个用例的最短测量时间（秒）
+        min_iterations: 最少测量次数
+        max_iterations: 最多测量次数
+        measure_memory: 是否测量峰值内存
+        groups: 分组图表的分组数，为None时使用默认值
+        seed: 数据的随机种子
+
+    返回:
+        BenchmarkResult
+    """
+    annotations = get_case_annotations(case, chart_type)
+    method = "render_original_chart" if case == ORIGINAL_CASE else "render_annotations"
+    result = BenchmarkResult(chart_type=chart_type, case=case, rows=rows, method=method)
+
+    chart_kwargs: Dict[str, Any] = {"seed": seed}
+    if groups is not None:
+        chart_kwargs["groups"] = groups
+    chart = build_chart(chart_type, rows, **chart_kwargs)
+    prepare, render = _build_render(service, chart, annotations, chart_type, case)
+
+    samples: List[float] = []
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        try:
+            render(prepare())
+            elapsed_total = 0.0
+            while len(samples) < max_iterations and (len(samples) < min_iterations or elapsed_total < min_time):
+                data = prepare()
+                start = time.perf_counter()
+                render(data)
+                elapsed = time.perf_counter() - start
+                samples.append(elapsed)
+                elapsed_total += elapsed
+            if measure_memory:
+                data = prepare()
+                result.peak_memory_bytes = _measure_peak_memory(lambda: render(data))
+        except Exception as e:
+            result.error = str(e)
+            return result
+
+    samples.sort()
+    total = sum(samples)
+    result.iterations = len(samples)
+    result.total_time = total
+    result.mean = total / len(samples)
+    result.p50 = percentile(samples, 0.50)
+    result.p99 = percentile(samples, 0.99)
+    result.min = samples[0]
+    result.max = samples[-1]
+    if total > 0:
+        result.specs_per_second = len(samples) / total
+        result.rows_per_second = rows * len(samples) / total
+    return result
+
+
+def run_benchmarks(chart_types: Optional[Iterable[str]] = None, cases: Optional[Iterable[str]] = None,
+                   sizes: Iterable[int] = DEFAULT_SIZES, service_options: Optional[Dict[str, Any]] = None,
+                   progress: Optional[Callable[[BenchmarkResult], None]] = None, **case_kwargs: Any) -> BenchmarkReport:
+    """
+    运行图表类型 × 注释用例 × 数据量的基准测试矩阵
+
+    参数:
+        chart_types: 图表类型，为None时测试全部内置类型
+        cases: 注释用例名称或任务前缀（如"summary"、"reference/extra_line"），为None时测试全部用例
+        sizes: 数据量档位
+        service_options: 传给ChartMark构造函数的参数，默认不启用任何缓存
+        progress: 每个用例完成后的回调
+        **case_kwargs: 传给run_case的其他参数
+
+    返回:
+        BenchmarkReport
+
+    异常:
+        ValueError: 用例名称或前缀不匹配任何用例
+    """
+    from ChartMark.api.service import ChartMark
+
+    service_options = dict(service_options or {})
+    service = ChartMark(**service_options)
+
+    selected_cases = select_cases(cases)
+    report = BenchmarkReport(meta=collect_environment(service_options))
+    report.meta["sizes"] = list(sizes)
+
+    for rows in sizes:
+        for chart_type in (chart_types or CHART_TYPES):
+            for case in selected_cases:
+                result = run_case(service, chart_type, case, rows, **case_kwargs)
+                report.results.append(result)
+                if progress is not None:
+                    progress(result)
+    return report
+
+
+def select_cases(patterns: Optional[Iterable[str]]) -> List[str]:
+    """
+    按名称或任务前缀筛选用例
+
+    参数:
+        patterns: 用例名称或前缀列表，为None时返回全部用例
+
+    返回:
+        用例名称列表，保持get_case_names的顺序
+
+    异常:
+        ValueError: 某个名称或前缀不匹配任何用例
+    """
+    all_cases = get_case_names()
+    if patterns is None:
+        return all_cases
+
+    selected = []
+    for pattern in patterns:
+        matched = [case for case in all_cases if case == pattern or case.startswith(pattern + "/")]
+        if not matched:
+            raise ValueError(f"未知的基准测试用例: {pattern}")
+        selected.extend(case for case in matched if case not in selected)
+    return [case for case in all_cases if case in selected]
+
+
+def compare_reports(baseline: BenchmarkReport, current: BenchmarkReport) -> List[BenchmarkComparison]:
+    """
+    按用例对比两次运行的p50，只包含两次都成功测量的用例
+
+    参数:
+        baseline: 基线运行结果
+        current: 当前运行结果
+
+    返回:
+        BenchmarkComparison列表，按变慢程度降序排列
+    """
+    baseline_results = {result.key: result for result in baseline.results if result.error is None}
+    comparisons = []
+    for result in current.results:
+        base = baseline_results.get(result.key)
+        if base is None or result.error is not None:
+            continue
+        comparisons.append(BenchmarkComparison(key=result.key, baseline_p50=base.p50, current_p50=result.p50))
+    comparisons.sort(key=lambda comparison: comparison.ratio, reverse=True)
+    return comparisons
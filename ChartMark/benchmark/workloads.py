@@ -0,0 +1,110 @@
+import copy
+from typing import Dict, Any, List, Optional
+
+from ChartMark.benchmark.generator import (
+    CHART_TYPES,
+    WorkloadGenerator,
+    build_annotation,
+    has_annotation_template,
+    list_techniques
+)
+
+# 分组图表的默认分组数
+DEFAULT_GROUPS = 3
+
+# 数据项筛选条件：y值大于50，约选中一半数据
+_QUANTITY_FILTER = {"and": [{"axisType": "quantity", "gt": 50}]}
+
+# coordinate目标使用的固定坐标
+_COORDINATES = {"x": 10, "x1": 40, "y": 25, "y1": 75}
+
+
+def _build_annotation_cases() -> Dict[str, Dict[str, Any]]:
+    """
+    为注释路由中每个有构造模板的技术构造一个注释，键为"任务/子类型/技术"或"任务/技术"
+    """
+    cases: Dict[str, Dict[str, Any]] = {}
+    for technique in list_techniques():
+        if not has_annotation_template(technique):
+            continue
+        case = "/".join(part for part in technique if part is not None)
+        cases[case] = build_annotation(technique, filter_obj=_QUANTITY_FILTER, coordinates=_COORDINATES)
+    return cases
+
+
+# 注释用例: "任务/子类型/技术" -> 注释字典
+ANNOTATION_CASES: Dict[str, Dict[str, Any]] = _build_annotation_cases()
+
+# 不带注释的原始图表用例和包含全部注释的组合用例
+ORIGINAL_CASE = "original"
+ALL_ANNOTATIONS_CASE = "all"
+
+
+def get_case_names() -> List[str]:
+    """
+    获取全部用例名称，依次为原始图表、单个注释技术和全部注释组合
+
+    返回:
+        用例名称列表
+    """
+    return [ORIGINAL_CASE] + list(ANNOTATION_CASES) + [ALL_ANNOTATIONS_CASE]
+
+
+def _adapt_filters(obj: Any, axis_type: str) -> Any:
+    """把筛选条件中的quantity轴替换为指定的轴类型（原地修改）"""
+    if isinstance(obj, dict):
+        if obj.get("axisType") == "quantity":
+            obj["axisType"] = axis_type
+        for value in obj.values():
+            _adapt_filters(value, axis_type)
+    elif isinstance(obj, list):
+        for item in obj:
+            _adapt_filters(item, axis_type)
+    return obj
+
+
+def get_case_annotations(case: str, chart_type: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    获取用例的注释列表副本
+
+    参数:
+        case: 用例名称
+        chart_type: 图表类型。散点图的两个轴都是数值轴，筛选条件改为按y_quantity筛选
+
+    返回:
+        注释列表，原始图表用例返回None
+
+    异常:
+        ValueError: 未知的用例
+    """
+    if case == ORIGINAL_CASE:
+        return None
+    if case == ALL_ANNOTATIONS_CASE:
+        annotations = copy.deepcopy(list(ANNOTATION_CASES.values()))
+    else:
+        annotation = ANNOTATION_CASES.get(case)
+        if annotation is None:
+            raise ValueError(f"未知的基准测试用例: {case}")
+        annotations = [copy.deepcopy(annotation)]
+    if chart_type in ("scatter", "group_scatter"):
+        _adapt_filters(annotations, "y_quantity")
+    return annotations
+
+
+def build_chart(chart_type: str, rows: int, groups: int = DEFAULT_GROUPS, seed: int = 0) -> Dict[str, Any]:
+    """
+    构造指定类型和数据量的chart字段
+
+    参数:
+        chart_type: 图表类型
+        rows: 数据项总数，分组图表平均分配到各组
+        groups: 分组图表的分组数
+        seed: 随机种子，相同参数生成相同数据
+
+    返回:
+        chart字典
+
+    异常:
+        ValueError: 参数无效
+    """
+    return WorkloadGenerator(seed=seed, rows=rows, groups=groups).chart(chart_type)
@@ -0,0 +1,356 @@
+import argparse
+import contextlib
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+from typing import Dict, Any, Optional, List, Callable
+
+from ChartMark.version import __version__
+from ChartMark import json_backend, timing
+from ChartMark.diagnostics import Diagnostic
+
+# 退出码
+EXIT_OK = 0
+EXIT_FAILED = 1
+
+
+class _Timings:
+    """
+    --timings开关对应的计时器，按阶段记录耗时并在结束时输出到标准错误
+    未启用时所有方法都是空操作
+    """
+    def __init__(self, enabled: bool):
+        self.enabled = enabled
+        self.stages: List[tuple] = []
+        self.extra: Dict[str, Any] = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def report(self, stream) -> None:
+        if not self.enabled:
+            return
+        total = sum(elapsed for _, elapsed in self.stages)
+        for name, elapsed in self.stages:
+            print(f"[timings] {name}: {elapsed * 1000:.2f} ms", file=stream)
+        print(f"[timings] total: {total * 1000:.2f} ms", file=stream)
+        for key, value in self.extra.items():
+            print(f"[timings] {key}: {value}", file=stream)
+
+
+def _record_import_times(timings: _Timings) -> None:
+    """把路由中按需导入的图表类和注释类的导入耗时加入计时结果"""
+    for module_name, prefix in (("ChartMark.router.chart_router", "chart"),
+                                ("ChartMark.router.annotation_router", "annotation")):
+        # 只读取已经加载的路由，不为了计时而导入
+        module = sys.modules.get(module_name)
+        if module is None:
+            continue
+        router = getattr(module, "CHART_ROUTER", None) or getattr(module, "ANNOTATION_ROUTER", None)
+        for name, elapsed in getattr(router, "import_times", {}).items():
+            timings.extra[f"import {prefix}:{name}"] = f"{elapsed * 1000:.2f} ms"
+
+
+def _record_stage_times(timings: _Timings, sink: timing.HistogramSink) -> None:
+    """把渲染各阶段（含每个注释和技术）的汇总耗时加入计时结果，按总耗时降序"""
+    for key, stats in sink.summary().items():
+        timings.extra[f"stage {key}"] = (
+            f"{stats['count']} calls, total {stats['total'] * 1000:.2f} ms, "
+            f"p50 {stats['p50'] * 1000:.3f} ms, max {stats['max'] * 1000:.3f} ms"
+        )
+
+
+def _create_service(args: argparse.Namespace):
+    """根据全局参数创建ChartMark实例"""
+    from ChartMark.api.service import ChartMark
+    return ChartMark(
+        compose_in_place=args.compose_in_place,
+        cache_size=args.cache_size,
+        disk_cache_path=args.disk_cache,
+        compact_output=args.compact,
+        profile_memory=bool(args.memory_profile or args.memory_report),
+        downsample=args.downsample,
+        downsample_method=args.downsample_method,
+        density_bins=args.density_bins
+    )
+
+
+def _report_memory(args: argparse.Namespace, service) -> None:
+    """输出并保存--memory-profile的内存汇总"""
+    if service.memory_report is None:
+        return
+    print("[memory] " + service.memory_report.format_summary().replace("\n", "\n[memory] "), file=sys.stderr)
+    if args.memory_report:
+        service.memory_report.save(args.memory_report)
+
+
+def _print_warning_counts(counts: Dict[str, int]) -> None:
+    """输出按类型聚合的渲染诊断信息"""
+    for key, count in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+        print(f"警告 {key}: {count} 次", file=sys.stderr)
+
+
+def _cmd_render(args: argparse.Namespace, timings: _Timings) -> int:
+    """render子命令：渲染单个文件"""
+    if args.stream and args.annotations:
+        print("错误: --stream只能用于原始图表，不能与-a同时使用", file=sys.stderr)
+        return EXIT_FAILED
+
+    with timings.stage("setup"):
+        service = _create_service(args)
+
+    to_stdout = args.output in (None, "-")
+    with timings.stage("load"):
+        data = json_backend.load(sys.stdin) if args.input == "-" else service.load_json(args.input)
+    if args.stream:
+        vegalite_spec = None
+    else:
+        with timings.stage("render"):
+            if args.annotations:
+                vegalite_spec = service.render_annotations(data)
+            else:
+                vegalite_spec = service.render_original_chart(data)
+
+    with timings.stage("write"):
+        if vegalite_spec is None:
+            # 流式写出原始图表，data.values不生成完整的行字典列表
+            service.write_original_chart(data, sys.stdout if to_stdout else args.output)
+            if to_stdout:
+                sys.stdout.write("\n")
+        elif to_stdout:
+            sys.stdout.write(vegalite_spec)
+            sys.stdout.write("\n")
+        else:
+            service.save_vegalite_spec(vegalite_spec, args.output)
+    return EXIT_OK
+
+
+def _cmd_batch(args: argparse.Namespace, timings: _Timings) -> int:
+    """batch子命令：批量处理目录"""
+    with timings.stage("setup"):
+        service = _create_service(args)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    with timings.stage("batch"):
+        if args.incremental:
+            incremental = service.batch_process_incremental(
+                args.input_dir, args.output_dir, with_annotations=args.annotations,
+                workers=args.jobs, chunksize=args.chunksize, remove_stale=args.remove_stale
+            )
+            results = incremental.results
+            timings.extra["skipped"] = len(incremental.skipped)
+            timings.extra["stale"] = len(incremental.stale)
+        else:
+            results = service.batch_process_parallel(
+                args.input_dir, args.output_dir, with_annotations=args.annotations,
+                workers=args.jobs, chunksize=args.chunksize
+            )
+
+    _report_memory(args, service)
+    warning_counts: Dict[str, int] = {}
+    for result in results:
+        for warning in result.warnings:
+            key = Diagnostic(**warning).key
+            warning_counts[key] = warning_counts.get(key, 0) + 1
+    _print_warning_counts(warning_counts)
+    failed = [result for result in results if not result.ok]
+    for result in failed:
+        print(f"处理文件 {result.filename} 失败: {result.error}", file=sys.stderr)
+    print(f"成功处理 {len(results) - len(failed)} 个文件，失败 {len(failed)} 个", file=sys.stderr)
+
+    if results:
+        elapsed = [result.elapsed for result in results]
+        timings.extra["files"] = len(results)
+        timings.extra["per_file_mean"] = f"{sum(elapsed) / len(elapsed) * 1000:.2f} ms"
+        timings.extra["per_file_max"] = f"{max(elapsed) * 1000:.2f} ms"
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _cmd_stream(args: argparse.Namespace, timings: _Timings) -> int:
+    """stream子命令：流式处理JSONL"""
+    with timings.stage("setup"):
+        service = _create_service(args)
+
+    with timings.stage("stream"):
+        result = service.process_jsonl_file(args.input, args.output, with_annotations=args.annotations)
+
+    for line_no, error in result.errors:
+        print(f"第 {line_no} 行处理失败: {error}", file=sys.stderr)
+    _print_warning_counts(result.warning_counts)
+    _report_memory(args, service)
+
+    stream_elapsed = timings.stages[-1][1] if timings.enabled else 0.0
+    timings.extra["lines"] = f"{result.processed} ok, {result.failed} failed"
+    if stream_elapsed > 0:
+        timings.extra["throughput"] = f"{(result.processed + result.failed) / stream_elapsed:.1f} lines/s"
+    return EXIT_FAILED if result.failed else EXIT_OK
+
+
+def _cmd_list(args: argparse.Namespace, timings: _Timings) -> int:
+    """list子命令：列出路由中注册的图表类型和注释类型"""
+    with timings.stage("setup"):
+        from ChartMark.router.chart_router import get_supported_chart_types
+        from ChartMark.router.annotation_router import get_supported_annotation_types, get_annotation_class
+
+    charts = get_supported_chart_types()
+    annotations: Dict[str, Any] = {}
+    for annotation_type in get_supported_annotation_types():
+        technique_classes = getattr(get_annotation_class(annotation_type), "TECHNIQUE_CLASSES", {})
+        # 部分注释类的技术映射是两层结构: subtype -> {name -> class}
+        annotations[annotation_type] = {
+            key: sorted(value) if isinstance(value, dict) else value.__name__
+            for key, value in technique_classes.items()
+        }
+
+    if args.json:
+        print(json.dumps({"charts": charts, "annotations": annotations}, ensure_ascii=False, indent=2))
+        return EXIT_OK
+
+    print("charts:")
+    for chart_type in charts:
+        print(f"  {chart_type}")
+    print("annotations:")
+    for annotation_type, techniques in annotations.items():
+        print(f"  {annotation_type}")
+        for key, value in techniques.items():
+            if isinstance(value, list):
+                print(f"    {key}: {', '.join(value)}")
+            else:
+                print(f"    {key}")
+    return EXIT_OK
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(prog="python -m ChartMark", description="将ChartMark规范转换为VegaLite规范")
+    parser.add_argument("--version", action="version", version=f"ChartMark {__version__}")
+    parser.add_argument("--profile", action="store_true",
+                        help="使用cProfile分析命令执行，结果输出到标准错误（并行批处理只分析主进程）")
+    parser.add_argument("--profile-output", default=None, help="将cProfile统计结果保存到文件")
+    parser.add_argument("--profile-limit", type=int, default=30, help="输出的函数条数")
+    parser.add_argument("--timings", action="store_true",
+                        help="将各阶段耗时（含每个注释和技术）输出到标准错误（并行批处理只统计主进程）")
+    parser.add_argument("--memory-profile", action="store_true",
+                        help="batch和stream用tracemalloc测量每个规范的峰值内存并按阶段归因，汇总输出到标准错误（明显变慢）")
+    parser.add_argument("--memory-report", default=None, help="将内存汇总保存为JSON文件，隐含--memory-profile")
+    parser.add_argument("--compose-in-place", action="store_true", help="启用合成模式渲染注释")
+    parser.add_argument("--cache-size", type=int, default=0, help="进程内LRU渲染缓存的容量")
+    parser.add_argument("--disk-cache", default=None, help="持久化SQLite渲染缓存的文件路径")
+    parser.add_argument("--compact", action="store_true", help="输出紧凑JSON，不使用缩进")
+    parser.add_argument("--downsample", type=int, default=None, metavar="N",
+                        help="把折线图（分组折线图的每个分组）降采样到约N个点，注释选中的行总会保留")
+    parser.add_argument("--downsample-method", default="lttb", choices=("lttb", "minmax"),
+                        help="降采样算法，默认lttb")
+    parser.add_argument("--density-bins", type=int, default=None, metavar="N",
+                        help="点数超过N*N的散点图按N x N网格分箱显示密度，注释选中的点保留原样")
+    parser.add_argument("--json-backend", default=None,
+                        choices=("auto",) + json_backend.AUTO_BACKEND_ORDER,
+                        help="JSON编解码后端，默认按环境变量CHARTMARK_JSON_BACKEND或自动选择")
+
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    render_parser = subparsers.add_parser("render", help="渲染单个ChartMark文件")
+    render_parser.add_argument("input", help="输入JSON文件，\"-\"表示标准输入")
+    render_parser.add_argument("-o", "--output", default=None, help="输出文件，默认写到标准输出")
+    render_parser.add_argument("-a", "--annotations", action="store_true", help="处理注释")
+    render_parser.add_argument("--stream", action="store_true",
+                               help="流式写出原始图表的data.values，适合超大图表，不能与-a同时使用")
+    render_parser.set_defaults(handler=_cmd_render)
+
+    batch_parser = subparsers.add_parser("batch", help="批量处理目录中的JSON文件")
+    batch_parser.add_argument("input_dir", help="输入目录")
+    batch_parser.add_argument("output_dir", help="输出目录")
+    batch_parser.add_argument("-a", "--annotations", action="store_true", help="处理注释")
+    batch_parser.add_argument("-j", "--jobs", type=int, default=1, help="工作进程数，0表示使用CPU核数")
+    batch_parser.add_argument("--chunksize", type=int, default=1, help="每次分发给工作进程的任务数")
+    batch_parser.add_argument("--incremental", action="store_true", help="只重新渲染新增或内容变化的文件")
+    batch_parser.add_argument("--remove-stale", action="store_true", help="增量模式下删除输入已不存在的输出")
+    batch_parser.set_defaults(handler=_cmd_batch)
+
+    stream_parser = subparsers.add_parser("stream", help="流式处理JSONL，每行一个ChartMark规范")
+    stream_parser.add_argument("-i", "--input", default="-", help="输入JSONL文件，默认标准输入")
+    stream_parser.add_argument("-o", "--output", default="-", help="输出JSONL文件，默认标准输出")
+    stream_parser.add_argument("-a", "--annotations", action="store_true", help="处理注释")
+    stream_parser.set_defaults(handler=_cmd_stream)
+
+    list_parser = subparsers.add_parser("list", help="列出支持的图表类型和注释类型")
+    list_parser.add_argument("--json", action="store_true", help="以JSON格式输出")
+    list_parser.set_defaults(handler=_cmd_list)
+
+    return parser
+
+
+def _run_profiled(handler: Callable[[], int], args: argparse.Namespace) -> int:
+    """在cProfile下执行命令并输出统计结果"""
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(handler)
+    finally:
+        if args.profile_output:
+            profiler.dump_stats(args.profile_output)
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.sort_stats("cumulative").print_stats(args.profile_limit)
+        sys.stderr.write(buffer.getvalue())
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    命令行入口
+
+    参数:
+        argv: 命令行参数，为None时使用sys.argv[1:]
+
+    返回:
+        退出码，全部成功时为0
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "jobs", 1) == 0:
+        args.jobs = None
+
+    timings = _Timings(args.timings)
+    stage_sink = timing.HistogramSink() if args.timings else None
+
+    if args.json_backend:
+        try:
+            json_backend.set_json_backend(args.json_backend)
+        except ImportError as e:
+            print(f"错误: JSON后端 {args.json_backend} 不可用: {str(e)}", file=sys.stderr)
+            return EXIT_FAILED
+        # 通过环境变量传递给并行批处理的工作进程
+        os.environ[json_backend.JSON_BACKEND_ENV] = args.json_backend
+
+    def handler() -> int:
+        return args.handler(args, timings)
+
+    previous_sink = timing.set_timing_sink(stage_sink) if stage_sink is not None else None
+    try:
+        if args.profile or args.profile_output:
+            exit_code = _run_profiled(handler, args)
+        else:
+            exit_code = handler()
+    except (OSError, ValueError) as e:
+        print(f"错误: {str(e)}", file=sys.stderr)
+        exit_code = EXIT_FAILED
+    finally:
+        if stage_sink is not None:
+            timing.set_timing_sink(previous_sink)
+            _record_stage_times(timings, stage_sink)
+        if timings.enabled:
+            _record_import_times(timings)
+        timings.report(sys.stderr)
+
+    return exit_code
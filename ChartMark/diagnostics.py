@@ -0,0 +1,145 @@
+import contextlib
+import logging
+from contextvars import ContextVar
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, Iterator, List, Literal, Optional
+
+# 诊断级别
+DiagnosticLevel = Literal["warning", "error"]
+
+# 诊断代码
+CODE_ANNOTATION_SKIPPED = "annotation_skipped"  # 注释缺少有效的method或type，被跳过
+CODE_ANNOTATION_FAILED = "annotation_failed"    # 注释解析或应用失败，其余注释继续处理
+CODE_TECHNIQUE_FAILED = "technique_failed"      # 单个技术应用失败，其余技术继续处理
+CODE_INVALID_LAYER_INDEX = "invalid_layer_index"  # 交换图层时索引越界
+CODE_SUMMARY_UNRESOLVED = "summary_unresolved"  # 降采样或分箱后无法在服务端按完整数据计算的汇总
+CODE_FILE_FAILED = "file_failed"                # 批量处理中单个文件处理失败，其余文件继续处理
+
+# 没有收集器时，诊断写入该日志器；调试信息只写入日志，不进入收集器
+logger = logging.getLogger("ChartMark")
+
+_LOG_LEVELS = {"warning": logging.WARNING, "error": logging.ERROR}
+
+
+@dataclass
+class Diagnostic:
+    """
+    渲染过程中产生的一条结构化诊断信息
+    """
+    level: DiagnosticLevel
+    code: str
+    message: str
+    annotation_index: Optional[int] = None  # 注释在annotations数组中的下标
+    annotation_id: Optional[str] = None
+    annotation_type: Optional[str] = None
+    technique: Optional[str] = None
+    error: Optional[str] = None  # 异常信息
+
+    @property
+    def key(self) -> str:
+        """用于聚合的键，如"technique_failed/highlight/bounding_box" """
+        return "/".join(part for part in (self.code, self.annotation_type, self.technique) if part)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+@dataclass
+class DiagnosticsCollector:
+    """
+    收集一次或多次渲染中产生的诊断信息
+    """
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+
+    def add(self, diagnostic: Diagnostic) -> None:
+        self.diagnostics.append(diagnostic)
+
+    @property
+    def warnings(self) -> List[Diagnostic]:
+        return [diagnostic for diagnostic in self.diagnostics if diagnostic.level == "warning"]
+
+    def counts(self) -> Dict[str, int]:
+        """按Diagnostic.key聚合的次数"""
+        counts: Dict[str, int] = {}
+        for diagnostic in self.diagnostics:
+            counts[diagnostic.key] = counts.get(diagnostic.key, 0) + 1
+        return counts
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        return [diagnostic.to_dict() for diagnostic in self.diagnostics]
+
+
+@dataclass
+class RenderResult:
+    """
+    带诊断信息的渲染结果
+    """
+    spec: str
+    diagnostics: List[Diagnostic] = field(default_factory=list)
+
+    @property
+    def warnings(self) -> List[Dict[str, Any]]:
+        """机器可读的诊断信息列表"""
+        return [diagnostic.to_dict() for diagnostic in self.diagnostics]
+
+
+# 当前上下文的收集器，线程和asyncio任务之间互不影响
+_current_collector: ContextVar[Optional[DiagnosticsCollector]] = ContextVar("chartmark_diagnostics", default=None)
+
+
+@contextlib.contextmanager
+def collect_diagnostics(collector: Optional[DiagnosticsCollector] = None) -> Iterator[DiagnosticsCollector]:
+    """
+    在with块内把诊断信息收集到collector中，而不是写入日志
+
+    参数:
+        collector: 诊断收集器，为None时创建新的收集器
+
+    使用示例:
+    ```python
+    with collect_diagnostics() as collector:
+        chart_mark.render_annotations(data)
+    print(collector.to_list())
+    ```
+    """
+    if collector is None:
+        collector = DiagnosticsCollector()
+    token = _current_collector.set(collector)
+    try:
+        yield collector
+    finally:
+        _current_collector.reset(token)
+
+
+def report(level: DiagnosticLevel, code: str, message: str, **fields: Any) -> None:
+    """
+    报告一条诊断信息
+
+    有收集器时加入收集器；否则写入ChartMark日志器，未配置日志时WARNING及以上级别输出到标准错误
+
+    参数:
+        level: "warning"或"error"
+        code: 诊断代码，如CODE_TECHNIQUE_FAILED
+        message: 可读的信息
+        **fields: Diagnostic的其他字段，如annotation_id、technique、error
+    """
+    collector = _current_collector.get()
+    if collector is not None:
+        collector.add(Diagnostic(level=level, code=code, message=message, **fields))
+        return
+    logger.log(_LOG_LEVELS[level], message)
+
+
+def warning(code: str, message: str, **fields: Any) -> None:
+    """报告一条warning级别的诊断信息"""
+    report("warning", code, message, **fields)
+
+
+def debug_enabled() -> bool:
+    """调试信息是否会被输出，构造开销大的调试信息应先检查"""
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def debug(message: str, *args: Any) -> None:
+    """输出调试信息到ChartMark日志器，默认不输出，args按logging的%格式延迟格式化"""
+    logger.debug(message, *args)
@@ -0,0 +1,213 @@
+import json
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional, IO, Union
+
+# 通过环境变量指定JSON后端，取值同set_json_backend
+JSON_BACKEND_ENV = "CHARTMARK_JSON_BACKEND"
+
+# auto模式下按顺序尝试的后端
+AUTO_BACKEND_ORDER = ("orjson", "ujson", "simdjson", "json")
+
+# 标准库在ensure_ascii模式下会转义的字符（DEL及以上），JSON中这些字符只可能出现在字符串内
+_NON_ASCII = re.compile('[\x7f-\U0010ffff]')
+
+
+def _escape_non_ascii_char(match: "re.Match[str]") -> str:
+    """按标准库的格式把一个字符转义为\\uXXXX，基本多文种平面以外的字符转义为代理对"""
+    code = ord(match.group())
+    if code < 0x10000:
+        return '\\u{0:04x}'.format(code)
+    code -= 0x10000
+    return '\\u{0:04x}\\u{1:04x}'.format(0xd800 | (code >> 10), 0xdc00 | (code & 0x3ff))
+
+
+def escape_non_ascii(text: str) -> str:
+    """把JSON文本中的非ASCII字符转义，结果与标准库ensure_ascii=True的输出一致"""
+    if text.isascii() and '\x7f' not in text:
+        return text
+    return _NON_ASCII.sub(_escape_non_ascii_char, text)
+
+
+class JsonBackend:
+    """
+    JSON编解码后端，统一loads/dumps接口
+
+    - loads接受str或bytes，解析失败时抛出json.JSONDecodeError
+    - dumps返回str，indent为None时输出紧凑格式，非ASCII字符与标准库一样转义为\\uXXXX
+    - 后端不支持的序列化参数（如orjson只支持2空格缩进）或无法序列化的对象会回退到标准库json
+    - 各后端的输出只在以下方面不同：浮点数的指数写法（orjson为1e-7，标准库为1e-07），
+      以及NaN和Infinity（orjson输出null，标准库输出NaN、Infinity，ujson回退到标准库）。
+      以输出字符串为准的缓存键和增量构建清单因此包含后端名称
+    """
+    def __init__(self, name: str, loads: Callable[[Union[str, bytes]], Any],
+                 dumps: Optional[Callable[[Any, Optional[int]], str]] = None):
+        self.name = name
+        self._loads = loads
+        self._dumps = dumps
+
+    def loads(self, text: Union[str, bytes]) -> Any:
+        """
+        解析JSON文本
+
+        异常:
+            json.JSONDecodeError: JSON格式错误
+        """
+        try:
+            return self._loads(text)
+        except json.JSONDecodeError:
+            raise
+        except ValueError as e:
+            # ujson、simdjson的解析错误统一转换为json.JSONDecodeError
+            doc = text.decode('utf-8', errors='replace') if isinstance(text, bytes) else text
+            raise json.JSONDecodeError(str(e), doc, 0)
+
+    def load(self, fp: IO) -> Any:
+        """从文件对象读取并解析JSON"""
+        return self.loads(fp.read())
+
+    def dumps(self, obj: Any, indent: Optional[int] = None) -> str:
+        """
+        序列化为JSON字符串
+
+        参数:
+            obj: 可JSON序列化的对象
+            indent: 缩进空格数，为None时输出紧凑格式
+
+        异常:
+            TypeError: 对象无法JSON序列化
+        """
+        if self._dumps is not None:
+            try:
+                result = self._dumps(obj, indent)
+                if result is not None:
+                    return result
+            except (TypeError, OverflowError):
+                pass
+        if indent is None:
+            return json.dumps(obj, separators=(',', ':'))
+        return json.dumps(obj, indent=indent)
+
+    def __repr__(self) -> str:
+        return f"JsonBackend({self.name})"
+
+
+def _create_stdlib_backend() -> JsonBackend:
+    return JsonBackend("json", json.loads)
+
+
+def _create_orjson_backend() -> JsonBackend:
+    import orjson
+
+    def dumps(obj: Any, indent: Optional[int]) -> Optional[str]:
+        if indent is None:
+            return escape_non_ascii(orjson.dumps(obj).decode('utf-8'))
+        if indent == 2:
+            return escape_non_ascii(orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode('utf-8'))
+        # orjson只支持2空格缩进，其他缩进交给标准库
+        return None
+
+    return JsonBackend("orjson", orjson.loads, dumps)
+
+
+def _create_ujson_backend() -> JsonBackend:
+    import ujson
+
+    def dumps(obj: Any, indent: Optional[int]) -> str:
+        # ujson默认会把"/"转义为"\/"，关闭以保持与标准库一致
+        return ujson.dumps(obj, indent=indent or 0, ensure_ascii=True, escape_forward_slashes=False)
+
+    return JsonBackend("ujson", ujson.loads, dumps)
+
+
+def _create_simdjson_backend() -> JsonBackend:
+    import simdjson
+
+    # simdjson只提供解析，序列化使用标准库
+    return JsonBackend("simdjson", simdjson.loads)
+
+
+_BACKEND_FACTORIES: Dict[str, Callable[[], JsonBackend]] = {
+    "orjson": _create_orjson_backend,
+    "ujson": _create_ujson_backend,
+    "simdjson": _create_simdjson_backend,
+    "json": _create_stdlib_backend,
+}
+
+_current_backend: Optional[JsonBackend] = None
+
+
+def available_json_backends() -> List[str]:
+    """
+    获取当前环境中可用的JSON后端名称列表
+
+    返回:
+        按auto模式优先级排序的后端名称列表
+    """
+    available = []
+    for name in AUTO_BACKEND_ORDER:
+        try:
+            _BACKEND_FACTORIES[name]()
+            available.append(name)
+        except ImportError:
+            continue
+    return available
+
+
+def set_json_backend(name: str = "auto") -> JsonBackend:
+    """
+    设置全局使用的JSON后端
+
+    参数:
+        name: "auto"、"orjson"、"ujson"、"simdjson"或"json"。
+            auto按orjson、ujson、simdjson、json的顺序选择第一个已安装的后端
+
+    返回:
+        设置后的JsonBackend
+
+    异常:
+        ValueError: 不支持的后端名称
+        ImportError: 指定的后端未安装
+    """
+    global _current_backend
+
+    if name == "auto":
+        for candidate in AUTO_BACKEND_ORDER:
+            try:
+                _current_backend = _BACKEND_FACTORIES[candidate]()
+                return _current_backend
+            except ImportError:
+                continue
+
+    factory = _BACKEND_FACTORIES.get(name)
+    if factory is None:
+        raise ValueError(f"不支持的JSON后端: {name}")
+    _current_backend = factory()
+    return _current_backend
+
+
+def get_json_backend() -> JsonBackend:
+    """
+    获取当前的JSON后端，首次调用时根据环境变量CHARTMARK_JSON_BACKEND选择，默认为auto
+
+    返回:
+        当前的JsonBackend
+    """
+    if _current_backend is None:
+        return set_json_backend(os.environ.get(JSON_BACKEND_ENV, "auto"))
+    return _current_backend
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """使用当前后端解析JSON文本"""
+    return get_json_backend().loads(text)
+
+
+def load(fp: IO) -> Any:
+    """使用当前后端从文件对象读取并解析JSON"""
+    return get_json_backend().load(fp)
+
+
+def dumps(obj: Any, indent: Optional[int] = None) -> str:
+    """使用当前后端序列化为JSON字符串，indent为None时输出紧凑格式"""
+    return get_json_backend().dumps(obj, indent)
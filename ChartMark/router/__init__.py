@@ -4,10 +4,12 @@ from ChartMark.router.chart_router import (
     get_supported_chart_types,
     CHART_ROUTER
 )
+from ChartMark.router.lazy_router import LazyRouter
 
 __all__ = [
     'get_chart_class',
     'register_chart_type',
     'get_supported_chart_types',
-    'CHART_ROUTER'
+    'CHART_ROUTER',
+    'LazyRouter'
 ] 
\ No newline at end of file
@@ -1,34 +1,68 @@
-from typing import Dict, Type
+import threading
+from typing import Dict, Type, Union, List, Any
 
-# 导入注释相关类
-from ChartMark.annotation_spec.description.BaseDescription import BaseDescription
-from ChartMark.annotation_spec.encoding.BaseEncoding import BaseEncoding
-from ChartMark.annotation_spec.highlight.BaseHighlight import BaseHighlight
-from ChartMark.annotation_spec.reference.BaseReference import BaseReference
-from ChartMark.annotation_spec.summary.BaseSummary import BaseSummary
-from ChartMark.annotation_spec.trend.BaseTrend import BaseTrend
-# 注释类型到注释类的映射
-ANNOTATION_ROUTER: Dict[str, Type] = {
+from ChartMark.router.lazy_router import LazyRouter, get_entry_points
+
+# 第三方注释类型注册用的入口点组，值为"模块路径:类名"
+ANNOTATION_ENTRY_POINT_GROUP = "chartmark.annotations"
+
+# 第三方技术注册用的入口点组。名称为"注释类型.技术名称"，
+# 技术按子类型分组的注释（description、reference、summary）为"注释类型.子类型.技术名称"
+TECHNIQUE_ENTRY_POINT_GROUP = "chartmark.techniques"
+
+# 技术入口点只扫描一次，按注释类型分组后缓存
+_technique_entry_points: Dict[str, List[Any]] = {}
+_technique_entry_points_loaded = False
+_technique_entry_points_lock = threading.Lock()
+
+
+def _register_entry_point_techniques(annotation_type: str, annotation_class: Type) -> None:
+    """
+    注释类第一次导入时，注册入口点中属于该注释类型的第三方技术
+    
+    参数:
+        annotation_type: 注释类型
+        annotation_class: 注释类
+    """
+    global _technique_entry_points_loaded
+    
+    if not _technique_entry_points_loaded:
+        with _technique_entry_points_lock:
+            if not _technique_entry_points_loaded:
+                for entry_point in get_entry_points(TECHNIQUE_ENTRY_POINT_GROUP):
+                    owner = entry_point.name.split(".", 1)[0]
+                    _technique_entry_points.setdefault(owner, []).append(entry_point)
+                # 分组完成后才设置标记，其他线程看到标记时缓存已经完整
+                _technique_entry_points_loaded = True
+    
+    for entry_point in _technique_entry_points.get(annotation_type, []):
+        # 去掉注释类型前缀，剩余部分为"技术名称"或"子类型.技术名称"
+        parts = entry_point.name.split(".")[1:]
+        annotation_class.register_technique_class(*parts, entry_point.load())
+
+
+# 注释类型到注释类的映射，值为类路径，第一次使用时才导入注释类及其全部技术
+ANNOTATION_ROUTER: LazyRouter = LazyRouter({
     # 描述类注释
-    "description": BaseDescription,
+    "description": "ChartMark.annotation_spec.description.BaseDescription:BaseDescription",
     
     # 编码类注释
-    "encoding": BaseEncoding,
+    "encoding": "ChartMark.annotation_spec.encoding.BaseEncoding:BaseEncoding",
     
     # 高亮类注释
-    "highlight": BaseHighlight,
+    "highlight": "ChartMark.annotation_spec.highlight.BaseHighlight:BaseHighlight",
     
     # 引用类注释
-    "reference": BaseReference,
+    "reference": "ChartMark.annotation_spec.reference.BaseReference:BaseReference",
     
     # 摘要类注释
-    "summary": BaseSummary,
+    "summary": "ChartMark.annotation_spec.summary.BaseSummary:BaseSummary",
     
     # 趋势类注释
-    "trend": BaseTrend,
+    "trend": "ChartMark.annotation_spec.trend.BaseTrend:BaseTrend",
     
     # 可以在这里添加更多注释类型
-}
+}, entry_point_group=ANNOTATION_ENTRY_POINT_GROUP, on_resolve=_register_entry_point_techniques)
 
 def get_annotation_class(annotation_type: str) -> Type:
     """
@@ -43,18 +77,18 @@ def get_annotation_class(annotation_type: str) -> Type:
     异常:
         ValueError: 不支持的注释类型
     """
-    annotation_class = ANNOTATION_ROUTER.get(annotation_type)
+    annotation_class = ANNOTATION_ROUTER.resolve(annotation_type)
     if not annotation_class:
         raise ValueError(f"不支持的注释类型: {annotation_type}")
     return annotation_class
 
-def register_annotation_type(annotation_type: str, annotation_class: Type) -> None:
+def register_annotation_type(annotation_type: str, annotation_class: Union[Type, str]) -> None:
     """
     注册新的注释类型
     
     参数:
         annotation_type: 注释类型
-        annotation_class: 注释类
+        annotation_class: 注释类，或"模块路径:类名"形式的类路径（第一次使用时才导入）
         
     异常:
         ValueError: 注释类型已存在
@@ -70,4 +104,4 @@ def get_supported_annotation_types() -> list:
     返回:
         支持的注释类型列表
     """
-    return list(ANNOTATION_ROUTER.keys())
+    return ANNOTATION_ROUTER.names()
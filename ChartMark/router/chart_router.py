@@ -1,29 +1,25 @@
-from typing import Dict, Type
+from typing import Dict, Type, Union
 
-# 导入图表相关类
-from ChartMark.annotation_ast_genetic.chart_node.non_group.BarChartNode import BarChartNode
-from ChartMark.annotation_ast_genetic.chart_node.non_group.ScatterChartNode import ScatterChartNode
-from ChartMark.annotation_ast_genetic.chart_node.non_group.LineChartNode import LineChartNode
-from ChartMark.annotation_ast_genetic.chart_node.non_group.PieChartNode import PieChartNode
-from ChartMark.annotation_ast_genetic.chart_node.group.GroupBarChartNode import GroupBarChartNode
-from ChartMark.annotation_ast_genetic.chart_node.group.GroupLineChartNode import GroupLineChartNode
-from ChartMark.annotation_ast_genetic.chart_node.group.GroupScatterChartNode import GroupScatterChartNode
+from ChartMark.router.lazy_router import LazyRouter
 
-# 图表类型到图表类的映射
-CHART_ROUTER: Dict[str, Type] = {
+# 第三方图表类型注册用的入口点组，值为"模块路径:类名"
+CHART_ENTRY_POINT_GROUP = "chartmark.charts"
+
+# 图表类型到图表类的映射，值为类路径，第一次使用时才导入
+CHART_ROUTER: LazyRouter = LazyRouter({
     # 非分组图表
-    "bar": BarChartNode,
-    "scatter": ScatterChartNode,
-    "line": LineChartNode,
-    "pie": PieChartNode,
+    "bar": "ChartMark.annotation_ast_genetic.chart_node.non_group.BarChartNode:BarChartNode",
+    "scatter": "ChartMark.annotation_ast_genetic.chart_node.non_group.ScatterChartNode:ScatterChartNode",
+    "line": "ChartMark.annotation_ast_genetic.chart_node.non_group.LineChartNode:LineChartNode",
+    "pie": "ChartMark.annotation_ast_genetic.chart_node.non_group.PieChartNode:PieChartNode",
     
     # 分组图表
-    "group_bar": GroupBarChartNode,
-    "group_line": GroupLineChartNode,
-    "group_scatter": GroupScatterChartNode,
+    "group_bar": "ChartMark.annotation_ast_genetic.chart_node.group.GroupBarChartNode:GroupBarChartNode",
+    "group_line": "ChartMark.annotation_ast_genetic.chart_node.group.GroupLineChartNode:GroupLineChartNode",
+    "group_scatter": "ChartMark.annotation_ast_genetic.chart_node.group.GroupScatterChartNode:GroupScatterChartNode",
     
     # 可以在这里添加更多图表类型
-}
+}, entry_point_group=CHART_ENTRY_POINT_GROUP)
 
 def get_chart_class(chart_type: str) -> Type:
     """
@@ -38,18 +34,18 @@ def get_chart_class(chart_type: str) -> Type:
     异常:
         ValueError: 不支持的图表类型
     """
-    chart_class = CHART_ROUTER.get(chart_type)
+    chart_class = CHART_ROUTER.resolve(chart_type)
     if not chart_class:
         raise ValueError(f"不支持的图表类型: {chart_type}")
     return chart_class
 
-def register_chart_type(chart_type: str, chart_class: Type) -> None:
+def register_chart_type(chart_type: str, chart_class: Union[Type, str]) -> None:
     """
     注册新的图表类型
     
     参数:
         chart_type: 图表类型
-        chart_class: 图表类
+        chart_class: 图表类，或"模块路径:类名"形式的类路径（第一次使用时才导入）
         
     异常:
         ValueError: 图表类型已存在
@@ -65,4 +61,4 @@ def get_supported_chart_types() -> list:
     返回:
         支持的图表类型列表
     """
-    return list(CHART_ROUTER.keys()) 
\ No newline at end of file
+    return CHART_ROUTER.names() 
\ No newline at end of file
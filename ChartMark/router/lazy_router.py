@@ -0,0 +1,146 @@
+import importlib
+import threading
+import time
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Type, Union, Callable, Optional
+
+# 类的引用: 类本身，或"模块路径:类名"形式的字符串
+ClassRef = Union[Type, str]
+
+
+def get_entry_points(group: str) -> list:
+    """
+    获取指定组的入口点，兼容Python 3.8-3.12的importlib.metadata接口
+    """
+    from importlib import metadata
+
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=group))
+    return list(entry_points.get(group, []))
+
+
+def import_class(path: str) -> Type:
+    """
+    按"模块路径:类名"导入类
+
+    参数:
+        path: 类路径，例如"ChartMark.annotation_ast_genetic.chart_node.non_group.BarChartNode:BarChartNode"
+
+    返回:
+        导入的类
+
+    异常:
+        ValueError: 路径格式无效
+        ImportError: 模块导入失败或模块中没有该类
+    """
+    module_name, _, attr = path.partition(":")
+    if not module_name or not attr:
+        raise ValueError(f"类路径必须是\"模块路径:类名\"格式: {path}")
+    module = importlib.import_module(module_name)
+    try:
+        return getattr(module, attr)
+    except AttributeError:
+        raise ImportError(f"模块 {module_name} 中没有 {attr}")
+
+
+class LazyRouter(MutableMapping):
+    """
+    按需导入的类型路由表
+
+    - 值可以是类，也可以是"模块路径:类名"字符串；字符串在第一次查找时才导入并替换为类，
+      因此只渲染柱状图的进程不会导入其他图表和注释的模块
+    - entry_point_group不为空时，第一次查找不到类型或列出全部类型时，才扫描该组的入口点进行注册，
+      入口点不能覆盖已存在的类型
+    - 每个类型的导入耗时记录在import_times中（秒）
+    - keys、in和len不会触发导入；values、items会导入全部类型
+    """
+    def __init__(self, routes: Dict[str, ClassRef], entry_point_group: Optional[str] = None,
+                 on_resolve: Optional[Callable[[str, Type], None]] = None):
+        """
+        参数:
+            routes: 类型名称到类或类路径的映射
+            entry_point_group: 第三方扩展注册用的入口点组名
+            on_resolve: 类导入后的回调，参数为类型名称和类
+        """
+        self._routes: Dict[str, ClassRef] = dict(routes)
+        self.entry_point_group = entry_point_group
+        self.on_resolve = on_resolve
+        self.import_times: Dict[str, float] = {}
+        self._entry_points_loaded = entry_point_group is None
+        self._entry_points_lock = threading.Lock()
+
+    def load_entry_points(self) -> None:
+        """扫描入口点组，把其中尚未注册的类型加入路由表，只执行一次"""
+        if self._entry_points_loaded:
+            return
+        with self._entry_points_lock:
+            if self._entry_points_loaded:
+                return
+            for entry_point in get_entry_points(self.entry_point_group):
+                if entry_point.name not in self._routes:
+                    self._routes[entry_point.name] = entry_point.value
+            # 注册完成后才设置标记，其他线程看到标记时路由表已经完整
+            self._entry_points_loaded = True
+
+    def resolve(self, key: str) -> Optional[Type]:
+        """
+        获取类型对应的类，必要时导入
+
+        参数:
+            key: 类型名称
+
+        返回:
+            对应的类，类型不存在时返回None
+
+        异常:
+            ImportError: 类路径无法导入
+        """
+        ref = self._routes.get(key)
+        if ref is None and not self._entry_points_loaded:
+            self.load_entry_points()
+            ref = self._routes.get(key)
+        if ref is None or not isinstance(ref, str):
+            return ref
+
+        start = time.perf_counter()
+        resolved = import_class(ref)
+        self.import_times[key] = time.perf_counter() - start
+        self._routes[key] = resolved
+        if self.on_resolve is not None:
+            self.on_resolve(key, resolved)
+        return resolved
+
+    def is_resolved(self, key: str) -> bool:
+        """类型是否已经导入"""
+        return key in self._routes and not isinstance(self._routes[key], str)
+
+    def names(self) -> List[str]:
+        """获取全部类型名称（包含入口点注册的类型），不触发导入"""
+        self.load_entry_points()
+        return list(self._routes)
+
+    def __getitem__(self, key: str) -> Type:
+        resolved = self.resolve(key)
+        if resolved is None:
+            raise KeyError(key)
+        return resolved
+
+    def __setitem__(self, key: str, value: ClassRef) -> None:
+        self._routes[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._routes[key]
+        self.import_times.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._routes))
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._routes
+
+    def __repr__(self) -> str:
+        return f"LazyRouter({list(self._routes)})"
@@ -0,0 +1,274 @@
+import contextlib
+import logging
+import math
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+# 渲染过程中计时的阶段名称
+STAGE_LOAD_JSON = "load_json"          # 读取并解析输入JSON文件
+STAGE_CHART_NODE = "chart_node"        # 图表节点构造，包含_parse_data_properties
+STAGE_DOWNSAMPLE = "downsample"        # 折线图节点的降采样，包含注释目标的行判定
+STAGE_BINNING = "binning"              # 散点图节点的二维分箱，包含注释目标的行判定
+STAGE_TEMPLATE_FILL = "template_fill"  # 由编译后的ORIGINAL_CHART_TEMPLATE生成原始规范
+STAGE_METADATA = "metadata"            # _parse_to_metadata生成data.values的行字典，位于template_fill内
+STAGE_CHART_PARSE = "chart_parse"      # 由规范字典构建vegalite_ast.Chart
+STAGE_ANNOTATION = "annotation"        # 单个注释的parse_techniques_to_vegalite或合成模式应用
+STAGE_TECHNIQUE = "technique"          # 单个技术的parse_to_vegalite
+STAGE_SERIALIZE = "serialize"          # 规范字典序列化为JSON字符串
+
+STAGES = (
+    STAGE_LOAD_JSON,
+    STAGE_CHART_NODE,
+    STAGE_DOWNSAMPLE,
+    STAGE_BINNING,
+    STAGE_TEMPLATE_FILL,
+    STAGE_METADATA,
+    STAGE_CHART_PARSE,
+    STAGE_ANNOTATION,
+    STAGE_TECHNIQUE,
+    STAGE_SERIALIZE
+)
+
+
+class TimingSink:
+    """
+    计时结果的接收端，子类实现record方法
+
+    record可能在多个线程中被并发调用，需要自行保证线程安全
+    """
+    # 为True且tracemalloc正在跟踪时，阶段结束时attrs中附加memory_delta：
+    # 阶段内分配且在阶段结束时仍存活的字节数（可能为负）
+    measure_memory = False
+
+    def record(self, stage: str, elapsed: float, attrs: Dict[str, Any]) -> None:
+        """
+        记录一次阶段耗时
+
+        参数:
+            stage: 阶段名称，见STAGES
+            elapsed: 耗时（秒）
+            attrs: 阶段的附加属性，如chart_type、annotation、technique
+        """
+        raise NotImplementedError
+
+
+class CallbackSink(TimingSink):
+    """把每次计时结果转交给回调函数callback(stage, elapsed, attrs)"""
+    def __init__(self, callback: Callable[[str, float, Dict[str, Any]], None]):
+        self.callback = callback
+
+    def record(self, stage: str, elapsed: float, attrs: Dict[str, Any]) -> None:
+        self.callback(stage, elapsed, attrs)
+
+
+class LoggingSink(TimingSink):
+    """把每次计时结果写入日志，默认使用ChartMark.timing日志器的DEBUG级别"""
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.DEBUG):
+        self.logger = logger if logger is not None else logging.getLogger(__name__)
+        self.level = level
+
+    def record(self, stage: str, elapsed: float, attrs: Dict[str, Any]) -> None:
+        if not self.logger.isEnabledFor(self.level):
+            return
+        detail = " ".join(f"{key}={value}" for key, value in attrs.items())
+        self.logger.log(self.level, "%s %.3fms %s", stage, elapsed * 1000, detail)
+
+
+class MultiSink(TimingSink):
+    """把计时结果依次转交给多个接收端"""
+    def __init__(self, sinks: Iterable[TimingSink]):
+        self.sinks = list(sinks)
+        self.measure_memory = any(sink.measure_memory for sink in self.sinks)
+
+    def record(self, stage: str, elapsed: float, attrs: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            sink.record(stage, elapsed, attrs)
+
+
+class HistogramSink(TimingSink):
+    """
+    在内存中按键汇总耗时样本，用summary获取次数、总耗时和p50/p99等统计
+
+    键由阶段名称和group_by中出现的属性值组成，默认按注释类型和技术名称区分，
+    例如"technique:highlight/bounding_box"，便于定位慢的技术
+    """
+    def __init__(self, group_by: Iterable[str] = ("annotation", "technique"), max_samples: int = 10000):
+        """
+        参数:
+            group_by: 参与分组的属性名
+            max_samples: 每个键最多保留的样本数，超出后只更新次数、总耗时和最值，百分位数基于已保留的样本
+        """
+        self.group_by = tuple(group_by)
+        self.max_samples = max_samples
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def _key(self, stage: str, attrs: Dict[str, Any]) -> str:
+        labels = [str(attrs[name]) for name in self.group_by if attrs.get(name) is not None]
+        return f"{stage}:{'/'.join(labels)}" if labels else stage
+
+    def record(self, stage: str, elapsed: float, attrs: Dict[str, Any]) -> None:
+        key = self._key(stage, attrs)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = {"count": 0, "total": 0.0, "min": elapsed, "max": elapsed, "samples": []}
+            stats["count"] += 1
+            stats["total"] += elapsed
+            stats["min"] = min(stats["min"], elapsed)
+            stats["max"] = max(stats["max"], elapsed)
+            if len(stats["samples"]) < self.max_samples:
+                stats["samples"].append(elapsed)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        获取各键的统计结果，时间单位为秒
+
+        返回:
+            键到{count, total, mean, min, max, p50, p99}的字典，按总耗时降序排列
+        """
+        with self._lock:
+            snapshot = {key: dict(stats, samples=sorted(stats["samples"])) for key, stats in self._stats.items()}
+        summary = {}
+        for key, stats in sorted(snapshot.items(), key=lambda item: item[1]["total"], reverse=True):
+            samples = stats["samples"]
+            summary[key] = {
+                "count": stats["count"],
+                "total": stats["total"],
+                "mean": stats["total"] / stats["count"],
+                "min": stats["min"],
+                "max": stats["max"],
+                "p50": _percentile(samples, 0.50),
+                "p99": _percentile(samples, 0.99)
+            }
+        return summary
+
+    def reset(self) -> None:
+        """清空已记录的样本"""
+        with self._lock:
+            self._stats.clear()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩法计算百分位数，样本为空时返回0"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class _StageTimer:
+    """启用计时时stage返回的上下文管理器"""
+    __slots__ = ("sink", "stage", "attrs", "start", "memory_start")
+
+    def __init__(self, sink: TimingSink, stage: str, attrs: Dict[str, Any]):
+        self.sink = sink
+        self.stage = stage
+        self.attrs = attrs
+        self.start = 0.0
+        self.memory_start: Optional[int] = None
+
+    def __enter__(self) -> "_StageTimer":
+        if self.sink.measure_memory and tracemalloc.is_tracing():
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        elapsed = time.perf_counter() - self.start
+        if self.memory_start is not None:
+            self.attrs["memory_delta"] = tracemalloc.get_traced_memory()[0] - self.memory_start
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.sink.record(self.stage, elapsed, self.attrs)
+        return False
+
+
+class _NullTimer:
+    """未启用计时时stage返回的共享空上下文管理器"""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+# 当前的计时接收端，为None时不计时
+_current_sink: Optional[TimingSink] = None
+
+
+def set_timing_sink(sink: Optional[TimingSink]) -> Optional[TimingSink]:
+    """
+    设置全局的计时接收端
+
+    接收端是进程级的全局状态，并行批处理的工作进程和AsyncChartMark的进程池不会继承
+
+    参数:
+        sink: TimingSink实例，为None时关闭计时
+
+    返回:
+        之前的接收端
+    """
+    global _current_sink
+    previous = _current_sink
+    _current_sink = sink
+    return previous
+
+
+def get_timing_sink() -> Optional[TimingSink]:
+    """获取当前的计时接收端，未启用时返回None"""
+    return _current_sink
+
+
+def timing_enabled() -> bool:
+    """是否已设置计时接收端"""
+    return _current_sink is not None
+
+
+def stage(name: str, **attrs: Any):
+    """
+    为一个渲染阶段计时的上下文管理器
+
+    未设置接收端时返回共享的空上下文管理器，不读取时钟也不创建计时器；
+    阶段内抛出异常时仍会记录耗时，attrs中附加error为异常类名
+
+    参数:
+        name: 阶段名称，见STAGES
+        **attrs: 附加属性，原样传给接收端
+
+    使用示例:
+    ```python
+    with timing.stage(timing.STAGE_TECHNIQUE, technique=technique.name):
+        technique.parse_to_vegalite(chart, chart_type)
+    ```
+    """
+    sink = _current_sink
+    if sink is None:
+        return _NULL_TIMER
+    return _StageTimer(sink, name, attrs)
+
+
+@contextlib.contextmanager
+def use_timing_sink(sink: Optional[TimingSink]) -> Iterator[Optional[TimingSink]]:
+    """
+    在with块内临时设置计时接收端，退出时恢复之前的接收端
+
+    使用示例:
+    ```python
+    sink = HistogramSink()
+    with use_timing_sink(sink):
+        chart_mark.render_annotations(data)
+    print(sink.summary())
+    ```
+    """
+    previous = set_timing_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_timing_sink(previous)
@@ -4,6 +4,7 @@ from ChartMark.vegalite_ast.EncodingNode import Encoding
 from dataclasses import dataclass
 from datetime import datetime
 from ChartMark.vegalite_ast.ast_base import BaseNode
+from ChartMark import diagnostics
 
 
 @dataclass
@@ -113,9 +114,10 @@ class Chart(BaseNode):
                 self.layers[index2],
                 self.layers[index1],
             )
-            print(f"Swapped layer {index1} with layer {index2}.")
+            diagnostics.debug("Swapped layer %d with layer %d.", index1, index2)
         else:
-            print(f"Invalid indices: {index1} or {index2}. No swap performed.")
+            diagnostics.warning(diagnostics.CODE_INVALID_LAYER_INDEX,
+                                f"Invalid indices: {index1} or {index2}. No swap performed.")
 
     def print_layer_positions(self) -> None:
         """
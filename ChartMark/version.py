@@ -0,0 +1,2 @@
+# ChartMark版本号，增量构建清单和渲染缓存使用它判断已有输出是否仍然有效
+__version__ = "0.1.0"
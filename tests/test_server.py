@@ -0,0 +1,50 @@
+import http.client
+import json
+import threading
+import unittest
+
+from ChartMark.api.server import create_server
+
+CHART = {
+    "chart": {
+        "title": "Temp",
+        "type": "line",
+        "x_name": "Date",
+        "y_name": "Temp",
+        "x_data": ["2023-01-01", "2023-01-02", "2023-01-03"],
+        "y_data": [1, 5, 3]
+    }
+}
+
+
+class KeepAliveTest(unittest.TestCase):
+    """同一keep-alive连接上的请求互不影响"""
+
+    def setUp(self):
+        self.server = create_server(port=0, workers=0)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=10)
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _post(self, path, payload):
+        self.connection.request("POST", path, body=json.dumps(payload),
+                                headers={"Content-Type": "application/json"})
+        response = self.connection.getresponse()
+        return response.status, response.read()
+
+    def test_unknown_path_post_keeps_connection_usable(self):
+        status, _ = self._post("/render/unknown", CHART)
+        self.assertEqual(status, 404)
+
+        status, body = self._post("/render/original", CHART)
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body)["title"], "Temp")
+
+
+if __name__ == "__main__":
+    unittest.main()
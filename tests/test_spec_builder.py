@@ -0,0 +1,33 @@
+import json
+import unittest
+
+from ChartMark.annotation_ast_genetic.chart_node.SpecBuilder import SpecBuilder
+from ChartMark.annotation_ast_genetic.chart_node.non_group.ScatterChartNode import ScatterChartNode
+
+
+class SpecBuilderTest(unittest.TestCase):
+    """SpecBuilder生成的规范与str.format填充模板的结果一致"""
+
+    def test_non_string_title_and_field_names_are_stringified(self):
+        builder = SpecBuilder(ScatterChartNode.ORIGINAL_CHART_TEMPLATE)
+        rows = [{1: 0.5, 2: 1.5}]
+        spec = builder.build(title=3, x_name=1, y_name=2, metadata_list=rows)
+
+        self.assertEqual(spec["title"], "3")
+        encoding = spec["layer"][0]["encoding"] if "layer" in spec else spec["encoding"]
+        self.assertEqual(encoding["x"]["field"], "1")
+        self.assertEqual(encoding["y"]["field"], "2")
+        # 数据列表仍使用原对象，序列化后键名与字段名一致
+        self.assertIs(spec["data"]["values"], rows)
+        row = json.loads(json.dumps(spec))["data"]["values"][0]
+        self.assertIn(encoding["x"]["field"], row)
+        self.assertIn(encoding["y"]["field"], row)
+
+    def test_embedded_placeholder_is_stringified(self):
+        builder = SpecBuilder('{{"title": "Chart {title}", "data": {{"values": {metadata_list} }} }}')
+        spec = builder.build(title=None, metadata_list=[])
+        self.assertEqual(spec, {"title": "Chart None", "data": {"values": []}})
+
+
+if __name__ == "__main__":
+    unittest.main()